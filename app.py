@@ -1,3 +1,4 @@
+import os
 from flask import Flask
 from flasgger import Swagger
 from recommendation.config import Config as RecommendationConfig
@@ -5,9 +6,13 @@ from recommendation.database import db
 from recommendation.routes import recommendation_blueprint
 from quiz.config import Config as QuizConfig
 from quiz.routes import quiz_blueprint
+from observability import configure_logging
+from observability.metrics import metrics_blueprint
+from observability.tracing import init_tracing
 
 def create_app():
     """Create and configure the unified Flask application."""
+    configure_logging()
     app = Flask(__name__)
 
     # Load configuration (can be merged if necessary)
@@ -20,9 +25,11 @@ def create_app():
     # Register Blueprints to keep routes organized
     app.register_blueprint(recommendation_blueprint, url_prefix='/recommendation')
     app.register_blueprint(quiz_blueprint, url_prefix='/quiz')
+    app.register_blueprint(metrics_blueprint)  # Prometheus scrape endpoint at /metrics
+    init_tracing(app)  # Request traces to TRACE_FILE (sampled, or on demand with the X-Trace header)
 
     return app
 
 if __name__ == "__main__":
     app = create_app()
-    app.run(debug=False, host="0.0.0.0",port="5000")
+    app.run(debug=False, host="0.0.0.0",port=int(os.getenv("PORT", "5000")))
@@ -0,0 +1,23 @@
+# asgi.py
+"""
+ASGI entry point: uvicorn asgi:app --workers N
+(or gunicorn -k uvicorn.workers.UvicornWorker asgi:app)
+
+Requests under /recommendation/async go to the async Quart app; everything else is served
+by the Flask app, which runs in a thread pool.
+"""
+from asgiref.wsgi import WsgiToAsgi
+
+from app import create_app
+from recommendation.async_app import ASYNC_PREFIX, create_async_app
+
+flask_app = WsgiToAsgi(create_app())
+async_app = create_async_app()
+
+
+async def app(scope, receive, send):
+    # Lifespan events open/close the async app's resources.
+    if scope["type"] == "lifespan" or scope.get("path", "").startswith(ASYNC_PREFIX):
+        await async_app(scope, receive, send)
+    else:
+        await flask_app(scope, receive, send)
@@ -0,0 +1,139 @@
+# benchmarks/bench_pipeline.py
+"""
+End-to-end benchmark of the quiz pipeline on the local backends (quiz/local_backends.py):
+embedded in-memory Qdrant, hashing embedder, replayed completions, fixture transcripts and an
+in-memory quiz store. Needs no Qdrant server, Groq key, GPU, PostgreSQL or Redis.
+
+Synthetic lectures are pushed through the stages one stage at a time (as the per-stage worker
+queues would), and the throughput and per-lecture latency of every stage are reported.
+Only the pipeline's own work is measured: the stand-ins replace Whisper, the embedding model
+and Groq, so absolute numbers are not those of production.
+
+With --check it is a smoke test: exits with status 1 unless every lecture got a quiz.
+
+Usage:
+    python -m benchmarks.bench_pipeline [--lectures N] [--segments N] [--replay PATH] [--check]
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import tempfile
+import warnings
+import statistics
+
+DEFAULT_REPLAY = os.path.join(os.path.dirname(__file__), "data", "quiz_completions.jsonl")
+
+
+def configure_backends(work_dir, replay_file):
+    """Selects the local backends; must run before quiz.config is imported."""
+    os.environ.update({
+        "QDRANT_URL": ":memory:",
+        "EMBEDDING_BACKEND": "hashing",
+        "LLM_BACKEND": "replay",
+        "LLM_REPLAY_FILE": replay_file,
+        "LLM_CACHE_ENABLED": "false",
+        "TRANSCRIPTION_BACKEND": "fixture",
+        "QUIZ_STORE_BACKEND": "memory",
+        "OUTPUT_DIRECTORY": os.path.join(work_dir, "output"),
+        "TRANSCRIPT_DIRECTORY": os.path.join(work_dir, "transcripts"),
+    })
+    os.environ.pop("QDRANT_PATH", None)
+
+
+def corpus_sentences(replay_file):
+    """Question and explanation lines of the replayed completions, used as lecture speech."""
+    sentences = []
+    with open(replay_file, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            for text in json.loads(line)["completion"].splitlines():
+                text = text.strip()
+                if text.startswith("Explanation:"):
+                    sentences.append(text[len("Explanation:"):].strip())
+                elif text and not text.startswith(("(", "Question", "Correct Answer:", "Difficulty:", "---")):
+                    sentences.append(text)
+    return sentences
+
+
+def write_fixtures(video_dir, lectures, segments, sentences, seed=0):
+    """Writes an (empty) video and its segment fixture per lecture; returns the jobs' arguments."""
+    from quiz.local_backends import fixture_path
+    from quiz.transcripts import write_segments
+
+    rng = random.Random(seed)
+    os.makedirs(video_dir, exist_ok=True)
+    lectures_args = []
+    for i in range(lectures):
+        course_id, lecture_id = str(uuid.UUID(int=rng.getrandbits(128))), str(uuid.UUID(int=rng.getrandbits(128)))
+        video_path = os.path.join(video_dir, f"lecture_{i}.mp4")
+        open(video_path, "wb").close()
+        write_segments(fixture_path(video_path), (
+            {"start": 4.0 * n, "end": 4.0 * n + 3.8, "text": " ".join(rng.sample(sentences, 2))}
+            for n in range(segments)
+        ))
+        lectures_args.append((course_id, lecture_id, video_path))
+    return lectures_args
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--lectures", type=int, default=20, help="Synthetic lectures to process")
+    arg_parser.add_argument("--segments", type=int, default=150, help="Transcript segments per lecture")
+    arg_parser.add_argument("--replay", default=DEFAULT_REPLAY, help="Replay file of recorded completions")
+    arg_parser.add_argument("--check", action="store_true", help="Fail unless every lecture got a quiz")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as work_dir:
+        configure_backends(work_dir, os.path.abspath(args.replay))
+        from quiz import pipeline
+        from quiz.local_backends import MemoryQuizStore
+
+        # Embedded Qdrant ignores payload indexes (and says so for every collection).
+        warnings.filterwarnings("ignore", message="Payload indexes have no effect")
+
+        # One extra lecture warms up outside the measurement: imports, Qdrant collections, the parser.
+        lectures_args = write_fixtures(os.path.join(work_dir, "videos"), args.lectures + 1, args.segments,
+                                       corpus_sentences(args.replay))
+        warmup = pipeline.run_pipeline(pipeline.new_job(*lectures_args.pop()))
+        if warmup["status"] != "success":
+            print(f"Warm-up job failed: {warmup['error']}")
+            return 1
+        jobs = [pipeline.new_job(*lecture_args) for lecture_args in lectures_args]
+        print(f"{args.lectures} lectures x {args.segments} segments, replay file {args.replay}")
+
+        print(f"{'stage':<12} {'lectures/s':>11} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+        total = 0.0
+        for run_stage in pipeline.STAGES:
+            durations = []
+            for i, job in enumerate(jobs):
+                start = time.perf_counter()
+                jobs[i] = run_stage(job)
+                durations.append(time.perf_counter() - start)
+            total += sum(durations)
+            ms = [duration * 1e3 for duration in durations]
+            print(f"{run_stage.stage_name:<12} {len(jobs) / sum(durations):>11.1f} {statistics.median(ms):>9.2f} "
+                  f"{percentile(ms, 0.95):>9.2f} {max(ms):>9.2f}")
+        print(f"{'pipeline':<12} {len(jobs) / total:>11.1f}")
+
+        failed = [job for job in jobs if job["status"] != "success"]
+        for job in failed:
+            print(f"lecture {job['lecture_id']} failed: {job['error']}")
+        stored = sum(1 for job in jobs if job["lecture_id"] in MemoryQuizStore.quizzes and job.get("quiz"))
+        print(f"{len(jobs) - len(failed)}/{len(jobs)} succeeded, {stored} quizzes stored")
+        if args.check and (failed or stored != len(jobs)):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+# benchmarks/bench_quiz_parser.py
+"""
+Microbenchmark for QuizParser over a corpus of recorded completions.
+
+Usage:
+    python -m benchmarks.bench_quiz_parser [--corpus PATH] [--repeat N] [--chunk-size N]
+"""
+import os
+import json
+import time
+import argparse
+import statistics
+
+from quiz.quiz import QuizParser, IncrementalQuizParser
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), "data", "quiz_completions.jsonl")
+
+
+def load_corpus(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line)["completion"] for line in f if line.strip()]
+
+
+def time_runs(func, repeat):
+    """Runs func `repeat` times and returns the per-run durations in seconds."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def report(name, durations, completions, questions):
+    per_completion = statistics.median(durations) / completions * 1e6
+    print(f"{name:<14} median {statistics.median(durations) * 1e3:8.3f} ms/corpus  "
+          f"{per_completion:8.1f} us/completion  ({questions} questions)")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSONL file with a 'completion' field per line")
+    arg_parser.add_argument("--repeat", type=int, default=200, help="Number of passes over the corpus")
+    arg_parser.add_argument("--chunk-size", type=int, default=16, help="Characters per streamed chunk")
+    args = arg_parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    parser = QuizParser()
+    questions = sum(len(parser.parse(completion)) for completion in corpus)
+    print(f"Corpus: {len(corpus)} completions, {sum(map(len, corpus))} characters")
+
+    def parse_full():
+        for completion in corpus:
+            parser.parse(completion)
+
+    chunked = [
+        [completion[i:i + args.chunk_size] for i in range(0, len(completion), args.chunk_size)]
+        for completion in corpus
+    ]
+
+    def parse_streamed():
+        for chunks in chunked:
+            incremental = IncrementalQuizParser(parser)
+            for chunk in chunks:
+                incremental.feed(chunk)
+            incremental.close()
+
+    report("parse", time_runs(parse_full, args.repeat), len(corpus), questions)
+    report("incremental", time_runs(parse_streamed, args.repeat), len(corpus), questions)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_startup.py
+"""
+Startup benchmark for the web app: time and peak memory to import wsgi (the module gunicorn
+loads: WEB_PRELOAD_MODULES, then create_app()), measured in fresh interpreters, plus the
+slowest imports (python -X importtime).
+
+With --check it is an import budget check: exits with status 1 if the median startup time
+exceeds --budget-ms or if any of the heavy ML modules is imported by the web process.
+
+Usage:
+    python -m benchmarks.bench_startup [--runs N] [--top N]
+    python -m benchmarks.bench_startup --check [--budget-ms MS]
+"""
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Modules only the Celery workers need; the web process must never import them.
+FORBIDDEN_MODULES = ("torch", "whisper", "sentence_transformers", "groq", "qdrant_client", "sklearn")
+
+PROBE = """
+import sys, json, time, resource
+start = time.perf_counter()
+import wsgi
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": sorted(m for m in sys.modules if "." not in m),
+}))
+"""
+
+
+def probe_once():
+    """Runs the probe in a fresh interpreter and returns its measurements."""
+    output = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(top):
+    """Returns (cumulative microseconds, module) of the slowest imports of `import wsgi`."""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import wsgi"],
+                            capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure")
+    arg_parser.add_argument("--top", type=int, default=15, help="Slowest imports to list")
+    arg_parser.add_argument("--check", action="store_true", help="Fail if the budget is exceeded")
+    arg_parser.add_argument("--budget-ms", type=float, default=2000, help="Median startup budget for --check")
+    args = arg_parser.parse_args()
+
+    runs = [probe_once() for _ in range(args.runs)]
+    median_ms = statistics.median(run["seconds"] for run in runs) * 1e3
+    max_rss = max(run["max_rss_mb"] for run in runs)
+    heavy = sorted(set(FORBIDDEN_MODULES) & set(runs[0]["modules"]))
+    print(f"Startup: median {median_ms:.0f} ms over {args.runs} runs, peak RSS {max_rss:.0f} MB")
+    print(f"Heavy modules imported: {', '.join(heavy) or 'none'}")
+
+    if not args.check:
+        print("\nSlowest imports (cumulative):")
+        for cumulative, name in slowest_imports(args.top):
+            print(f"  {cumulative / 1e3:8.1f} ms  {name}")
+        return
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f"startup {median_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+    if heavy:
+        failures.append(f"web process imports {', '.join(heavy)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: within the import budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+# benchmarks/load_test.py
+"""
+HTTP load test: N concurrent keep-alive clients request one path for a fixed duration and
+report requests per second and latency percentiles.
+
+Either point it at a running server (--url), or let it start the Flask development server
+(python app.py, the previous Docker CMD) and gunicorn (gunicorn.conf.py) one after the other
+and compare them (--compare).
+
+Usage:
+    python -m benchmarks.load_test --url http://127.0.0.1:5000 [--path /apispec_1.json] [--clients 32] [--duration 15]
+    python -m benchmarks.load_test --compare [--path ...] [--clients 32] [--duration 15]
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import threading
+import statistics
+import subprocess
+import http.client
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    "flask-dev": [sys.executable, "app.py"],
+    "gunicorn": [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"],
+}
+
+
+def run_load(url, path, clients, duration):
+    """Runs the load and returns (completed requests, errors, latencies in seconds, elapsed seconds)."""
+    parts = urlsplit(url)
+    deadline = time.perf_counter() + duration
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def connect():
+        return http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+
+    def request(conn):
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+
+    def client():
+        conn = connect()
+        local_latencies, local_errors = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                try:
+                    status = request(conn)
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    # The server closed an idle keep-alive connection (or recycled a worker): reconnect once.
+                    conn.close()
+                    conn = connect()
+                    status = request(conn)
+                if status >= 500:
+                    local_errors += 1
+                else:
+                    local_latencies.append(time.perf_counter() - start)
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                conn.close()
+                conn = connect()
+        conn.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies), errors[0], latencies, time.perf_counter() - started
+
+
+def report(name, completed, errors, latencies, elapsed):
+    if not latencies:
+        print(f"{name:<10} no successful requests ({errors} errors)")
+        return
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"{name:<10} {completed / elapsed:8.1f} req/s  p50 {quantiles[49] * 1e3:7.1f} ms  "
+          f"p95 {quantiles[94] * 1e3:7.1f} ms  p99 {quantiles[98] * 1e3:7.1f} ms  errors {errors}")
+
+
+def wait_for_port(port, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server did not start listening on port {port}")
+
+
+def compare(args):
+    for name, command in SERVERS.items():
+        env = dict(os.environ, PORT=str(args.port), GUNICORN_ACCESS_LOG="")
+        server = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for_port(args.port)
+            # Warm-up: first requests import lazily loaded modules.
+            run_load(f"http://127.0.0.1:{args.port}", args.path, args.clients, 1)
+            report(name, *run_load(f"http://127.0.0.1:{args.port}", args.path, args.clients, args.duration))
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--url", help="Base URL of a running server")
+    arg_parser.add_argument("--compare", action="store_true", help="Start and compare the dev server and gunicorn")
+    arg_parser.add_argument("--port", type=int, default=5000, help="Port used by the servers started with --compare")
+    arg_parser.add_argument("--path", default="/apispec_1.json", help="Path to request")
+    arg_parser.add_argument("--clients", type=int, default=32, help="Concurrent connections")
+    arg_parser.add_argument("--duration", type=float, default=15, help="Seconds of load per server")
+    args = arg_parser.parse_args()
+
+    print(f"GET {args.path} with {args.clients} clients for {args.duration:g}s")
+    if args.compare:
+        compare(args)
+    elif args.url:
+        report("server", *run_load(args.url, args.path, args.clients, args.duration))
+    else:
+        arg_parser.error("pass --url or --compare")
+
+
+if __name__ == "__main__":
+    main()
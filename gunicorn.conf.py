@@ -0,0 +1,63 @@
+# gunicorn.conf.py
+"""
+Production server settings: gunicorn -c gunicorn.conf.py wsgi:app
+
+All values can be overridden with environment variables.
+"""
+import gc
+import os
+import multiprocessing
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5000')}")
+
+# Processes x threads. The views mostly wait on PostgreSQL/Redis, so threads are cheap concurrency;
+# processes add CPU parallelism for the recommendation computations.
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread"
+
+# Load the app (and wsgi.PRELOAD_MODULES) once in the master; workers are forked from it
+# and share that memory copy-on-write.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+# Recycle workers now and then so slow leaks can't accumulate.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "200"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None  # empty = disabled
+errorlog = os.getenv("GUNICORN_ERROR_LOG", "-")
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def when_ready(server):
+    # Move everything loaded so far out of the collector's reach: otherwise the first GC pass
+    # in each worker touches every preloaded object and un-shares their pages.
+    if preload_app:
+        gc.collect()
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    # Connections opened by the master must not be shared between processes.
+    if preload_app:
+        from wsgi import app
+        from recommendation.database import db
+        with app.app_context():
+            db.engine.dispose(close=False)
+
+    # Load the embedding model for GET /quiz/search in the background, so the first search
+    # of the worker doesn't pay for it (after the fork: torch must not be initialised in the master).
+    from quiz.config import Config as QuizConfig
+    if QuizConfig.SEARCH_WARM_MODEL:
+        import threading
+        from quiz.qdrant_ops import get_embedding_model
+        threading.Thread(target=get_embedding_model, name="warm-embedding-model", daemon=True).start()
+
+
+def child_exit(server, worker):
+    # Drop the live gauges of the exited worker from the multiprocess metrics.
+    from observability.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
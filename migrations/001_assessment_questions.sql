@@ -0,0 +1,49 @@
+-- migrations/001_assessment_questions.sql
+-- Normalised storage for quiz questions (see AssessmentQuestion in recommendation/models.py).
+-- Safe to run more than once.
+
+BEGIN;
+
+-- The quiz service upserts one assessment per lecture (ON CONFLICT (lecture_id)).
+ALTER TABLE assessments ADD COLUMN IF NOT EXISTS lecture_id UUID REFERENCES lectures (id);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_assessments_lecture_id ON assessments (lecture_id);
+
+CREATE TABLE IF NOT EXISTS assessment_questions (
+    id            UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    assessment_id UUID NOT NULL REFERENCES assessments (id) ON DELETE CASCADE,
+    course_id     UUID REFERENCES courses (id),
+    lecture_id    UUID REFERENCES lectures (id),
+    position      INTEGER NOT NULL,
+    question      TEXT NOT NULL,
+    options       JSONB,
+    answer        VARCHAR,
+    explanation   TEXT,
+    difficulty    VARCHAR,
+    created_at    TIMESTAMP DEFAULT now(),
+    CONSTRAINT uq_assessment_questions_position UNIQUE (assessment_id, position)
+);
+
+CREATE INDEX IF NOT EXISTS ix_assessment_questions_lecture
+    ON assessment_questions (lecture_id, position);
+CREATE INDEX IF NOT EXISTS ix_assessment_questions_course_difficulty
+    ON assessment_questions (course_id, difficulty);
+
+-- Backfill from the existing assessment_data blobs (lists of question objects).
+INSERT INTO assessment_questions
+    (assessment_id, course_id, lecture_id, position, question, options, answer, explanation, difficulty)
+SELECT a.id,
+       a.course_id,
+       a.lecture_id,
+       q.ordinality - 1,
+       q.value ->> 'question',
+       (q.value -> 'options')::jsonb,
+       q.value ->> 'answer',
+       q.value ->> 'explanation',
+       q.value ->> 'difficulty'
+FROM assessments a
+CROSS JOIN LATERAL json_array_elements(a.assessment_data::json) WITH ORDINALITY AS q (value, ordinality)
+WHERE json_typeof(a.assessment_data::json) = 'array'
+  AND q.value ->> 'question' IS NOT NULL
+ON CONFLICT (assessment_id, position) DO NOTHING;
+
+COMMIT;
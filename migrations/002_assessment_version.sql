@@ -0,0 +1,10 @@
+-- migrations/002_assessment_version.sql
+-- Version counter used for the ETag of GET /quiz/lectures/<lecture_id>/quiz.
+-- The quiz service bumps it on every upsert. Safe to run more than once.
+
+BEGIN;
+
+ALTER TABLE assessments ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE assessments ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+
+COMMIT;
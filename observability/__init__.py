@@ -0,0 +1,2 @@
+# observability/__init__.py
+from observability.logging_config import configure_logging
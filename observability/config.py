@@ -0,0 +1,37 @@
+# observability/config.py
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class Config:
+    # LOGGING: one configuration for the web app and the Celery workers.
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    # Also write the logs to this file (in addition to stderr) if set.
+    LOG_FILE = os.getenv("LOG_FILE")
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "%(asctime)s - %(process)d - %(name)s - %(levelname)s - %(message)s")
+
+    # METRICS
+    # Directory shared by all processes of a host (gunicorn and Celery workers) for prometheus_client's
+    # multiprocess mode. Must be set in the environment before the processes start, and emptied on restart.
+    PROMETHEUS_MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    # Port of the metrics HTTP server started in each Celery worker's main process (0 = disabled).
+    WORKER_METRICS_PORT = int(os.getenv("WORKER_METRICS_PORT", "0"))
+
+    # TRACING
+    # Traces (one JSON line per traced request, with its spans and optional profile) are appended
+    # to this file, for a collector to tail. Tracing is disabled when unset.
+    TRACE_FILE = os.getenv("TRACE_FILE")
+    # Fraction of requests traced without being asked to (0 = only requests sending TRACE_HEADER).
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+    # Request header switching tracing per request: "1" traces, "profile" also samples the
+    # request thread's stack, "0" never traces.
+    TRACE_HEADER = os.getenv("TRACE_HEADER", "X-Trace")
+    # The header is only honoured on requests that also send TRACE_TOKEN_HEADER with this secret
+    # (profiling is expensive and must not be switchable by any client). Unset = header ignored,
+    # only TRACE_SAMPLE_RATE applies.
+    TRACE_HEADER_SECRET = os.getenv("TRACE_HEADER_SECRET")
+    TRACE_TOKEN_HEADER = os.getenv("TRACE_TOKEN_HEADER", "X-Trace-Token")
+    PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+    # Most frequent stacks kept in an exported profile.
+    PROFILE_MAX_STACKS = int(os.getenv("PROFILE_MAX_STACKS", "50"))
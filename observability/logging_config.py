@@ -0,0 +1,21 @@
+# observability/logging_config.py
+import logging
+
+from observability.config import Config
+
+_configured = False
+
+
+def configure_logging() -> None:
+    """
+    Configures the root logger once per process. Modules only call logging.getLogger(__name__),
+    so every module's records end up in the same handlers, with the logger name in each line.
+    """
+    global _configured
+    if _configured:
+        return
+    handlers = [logging.StreamHandler()]
+    if Config.LOG_FILE:
+        handlers.append(logging.FileHandler(Config.LOG_FILE))
+    logging.basicConfig(level=Config.LOG_LEVEL, format=Config.LOG_FORMAT, handlers=handlers, force=True)
+    _configured = True
@@ -0,0 +1,95 @@
+# observability/metrics.py
+import os
+import time
+import logging
+import contextlib
+from typing import Iterator
+
+# Imported first: it loads .env, and prometheus_client picks its multiprocess mode from
+# PROMETHEUS_MULTIPROC_DIR when it is imported.
+from observability.config import Config
+
+from flask import Blueprint, Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess,
+)
+
+logger = logging.getLogger(__name__)
+
+# Stages run from seconds (download of a short clip) to the better part of an hour (Whisper on CPU).
+STAGE_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200, 1800, 3600)
+CALL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+STAGE_DURATION = Histogram(
+    "quiz_stage_duration_seconds", "Duration of a quiz pipeline stage",
+    ["stage", "status"], buckets=STAGE_BUCKETS
+)
+STAGE_IN_PROGRESS = Gauge(
+    "quiz_stage_in_progress", "Quiz pipeline stages currently running",
+    ["stage"], multiprocess_mode="livesum"
+)
+DEPENDENCY_DURATION = Histogram(
+    "quiz_dependency_duration_seconds", "Duration of calls to external services (Qdrant, Groq, ...)",
+    ["dependency", "operation"], buckets=CALL_BUCKETS
+)
+DEPENDENCY_ERRORS = Counter(
+    "quiz_dependency_errors_total", "Failed calls to external services",
+    ["dependency", "operation"]
+)
+DOWNLOADED_BYTES = Counter("quiz_downloaded_bytes_total", "Bytes of lecture video downloaded")
+AUDIO_SECONDS = Counter("quiz_audio_seconds_transcribed_total", "Seconds of lecture audio transcribed")
+CHUNKS_EMBEDDED = Counter("quiz_chunks_embedded_total", "Transcript chunks embedded and stored in Qdrant")
+LLM_TOKENS = Counter(
+    "quiz_llm_tokens_total", "Tokens sent to (prompt) and received from (completion) the LLM",
+    ["model", "kind"]
+)
+LLM_CACHE_HITS = Counter("quiz_llm_cache_hits_total", "Completions served from the LLM cache")
+
+
+@contextlib.contextmanager
+def track_dependency(dependency: str, operation: str) -> Iterator[None]:
+    """Times a call to an external service and counts it as failed if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        DEPENDENCY_ERRORS.labels(dependency, operation).inc()
+        raise
+    finally:
+        DEPENDENCY_DURATION.labels(dependency, operation).observe(time.perf_counter() - start)
+
+
+def metrics_registry() -> CollectorRegistry:
+    """
+    The registry to expose: in multiprocess mode a fresh one that aggregates the files
+    written by every process of the host, otherwise the default in-process registry.
+    """
+    if not Config.PROMETHEUS_MULTIPROC_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drops the live gauges of an exited worker process (multiprocess mode only)."""
+    if Config.PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
+
+
+metrics_blueprint = Blueprint('metrics', __name__)
+
+
+@metrics_blueprint.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus scrape endpoint."""
+    return Response(generate_latest(metrics_registry()), mimetype=CONTENT_TYPE_LATEST)
+
+
+def start_worker_metrics_server() -> None:
+    """Serves /metrics from a Celery worker's main process on Config.WORKER_METRICS_PORT."""
+    if not Config.WORKER_METRICS_PORT:
+        return
+    from prometheus_client import start_http_server
+    start_http_server(Config.WORKER_METRICS_PORT, registry=metrics_registry())
+    logger.info(f"Worker metrics served on port {Config.WORKER_METRICS_PORT} (pid {os.getpid()})")
@@ -0,0 +1,100 @@
+# observability/trace_report.py
+"""
+Summarises a trace file written by observability/tracing.py: latency percentiles per span
+name (where the time of a request goes) and, for profiled requests, the functions most often
+on top of the sampled stacks.
+
+Usage:
+    python -m observability.trace_report traces.jsonl [--name "GET /recommendation/recommendations"] [--top 15]
+    python -m observability.trace_report traces.jsonl --collapsed > stacks.txt   # input for flamegraph.pl
+"""
+import json
+import argparse
+import statistics
+from collections import Counter, defaultdict
+
+
+def load_traces(path, name=None):
+    """Reads the traces of the file, optionally only those whose root span has this name."""
+    traces = []
+    with open(path, encoding="utf-8") as trace_file:
+        for line in trace_file:
+            line = line.strip()
+            if not line:
+                continue
+            trace = json.loads(line)
+            if name is None or trace["name"] == name:
+                traces.append(trace)
+    return traces
+
+
+def percentile(values, q):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def span_table(traces):
+    """Returns (name, count, p50, p95, max, mean share of the request) rows, slowest first."""
+    durations = defaultdict(list)
+    shares = defaultdict(list)
+    for trace in traces:
+        total = trace["duration_ms"] or 0
+        durations[trace["name"]].append(total)
+        for span in trace["spans"]:
+            if span["duration_ms"] is None:
+                continue
+            durations[span["name"]].append(span["duration_ms"])
+            if total:
+                shares[span["name"]].append(span["duration_ms"] / total)
+    rows = []
+    for name, values in durations.items():
+        share = statistics.mean(shares[name]) if shares[name] else 1.0
+        rows.append((name, len(values), percentile(values, 50), percentile(values, 95), max(values), share))
+    return sorted(rows, key=lambda row: row[2] * row[1], reverse=True)
+
+
+def profile_stacks(traces):
+    """Adds up the sampled stacks of all profiled traces."""
+    stacks = Counter()
+    for trace in traces:
+        for entry in (trace.get("profile") or {}).get("stacks", []):
+            stacks[entry["stack"]] += entry["count"]
+    return stacks
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("path", help="Trace file (TRACE_FILE)")
+    arg_parser.add_argument("--name", help="Only traces whose root span has this name")
+    arg_parser.add_argument("--top", type=int, default=15, help="Functions to list from the profiles")
+    arg_parser.add_argument("--collapsed", action="store_true", help="Print the profiles as collapsed stacks")
+    args = arg_parser.parse_args()
+
+    traces = load_traces(args.path, args.name)
+    stacks = profile_stacks(traces)
+    if args.collapsed:
+        for stack, count in stacks.most_common():
+            print(f"{stack} {count}")
+        return
+    if not traces:
+        print("No traces")
+        return
+
+    print(f"{len(traces)} traces\n")
+    print(f"{'span':<40} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'share':>6}")
+    for name, count, p50, p95, longest, share in span_table(traces):
+        print(f"{name:<40} {count:>6} {p50:>9.1f} {p95:>9.1f} {longest:>9.1f} {share:>6.0%}")
+
+    if stacks:
+        samples = sum(stacks.values())
+        leaves = Counter()
+        for stack, count in stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        print(f"\nProfiled: {samples} samples, functions on top of the stack:")
+        for frame, count in leaves.most_common(args.top):
+            print(f"  {count / samples:6.1%}  {frame}")
+
+
+if __name__ == "__main__":
+    main()
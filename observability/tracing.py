@@ -0,0 +1,287 @@
+# observability/tracing.py
+"""
+Request tracing: named, nested spans (OpenTelemetry-style trace/span/parent ids, start time,
+duration, attributes) collected per request in a context variable, plus an optional sampling
+profiler of the request thread. Each finished trace is appended to Config.TRACE_FILE as one
+JSON line; see observability/trace_report.py to summarise the file.
+
+span() is a no-op outside a trace, so instrumented code costs nothing on untraced requests.
+"""
+import os
+import sys
+import hmac
+import json
+import time
+import uuid
+import random
+import logging
+import threading
+import contextlib
+import contextvars
+from collections import Counter
+from typing import Any, Dict, Iterator, List, Optional
+
+from flask import Flask, g, request
+
+from observability.config import Config
+
+logger = logging.getLogger(__name__)
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("current_trace", default=None)
+_current_span: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+
+
+class Span:
+    """One timed operation of a trace."""
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.status = "ok"
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self) -> None:
+        self.duration_ms = (time.perf_counter() - self._started) * 1e3
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Returned by span() outside a trace."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread every `interval` seconds from a background thread
+    (sys._current_frames), counting collapsed stacks ("outer;...;inner", flamegraph format).
+    Only the traced request pays for it; the interpreter is not instrumented.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trace-profiler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _run(self) -> None:
+        own_file = __file__
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                if code.co_filename != own_file:
+                    frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if frames:
+                self.stacks[";".join(reversed(frames))] += 1
+
+    def stop(self) -> Dict[str, Any]:
+        self._stop.set()
+        self._thread.join()
+        return {
+            "interval_ms": self.interval * 1e3,
+            "samples": sum(self.stacks.values()),
+            "stacks": [{"stack": stack, "count": count}
+                       for stack, count in self.stacks.most_common(Config.PROFILE_MAX_STACKS)],
+        }
+
+
+class Trace:
+    """The spans of one request (or job), rooted at a span named after it."""
+
+    def __init__(self, name: str, profile: bool = False, **attributes: Any):
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self.root = Span(self.trace_id, None, name, attributes)
+        self.profiler = (SamplingProfiler(threading.get_ident(), Config.PROFILE_INTERVAL_MS / 1e3)
+                         if profile else None)
+        self.profile: Optional[Dict[str, Any]] = None
+        self._tokens = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = {
+            "trace_id": self.trace_id,
+            "pid": os.getpid(),
+            **self.root.to_dict(),
+            "spans": [span.to_dict() for span in self.spans],
+        }
+        if self.profile is not None:
+            record["profile"] = self.profile
+        return record
+
+    def server_timing(self) -> str:
+        """Server-Timing header value with the finished direct children of the root span."""
+        return ", ".join(
+            f"{span.name.rsplit('.', 1)[-1]};dur={span.duration_ms:.1f}"
+            for span in self.spans
+            if span.parent_id == self.root.span_id and span.duration_ms is not None
+        )
+
+
+def start_trace(name: str, profile: bool = False, **attributes: Any) -> Trace:
+    """
+    Starts a trace in the current context; spans opened until finish_trace() belong to it.
+
+    :param name: Name of the root span (e.g. "GET /recommendation/recommendations").
+    :param profile: Also sample the current thread's stack while the trace is running.
+    """
+    trace = Trace(name, profile=profile, **attributes)
+    trace._tokens = (_current_trace.set(trace), _current_span.set(trace.root.span_id))
+    if trace.profiler:
+        trace.profiler.start()
+    return trace
+
+
+def finish_trace(trace: Trace, error: Optional[BaseException] = None) -> None:
+    """Ends the root span, stops the profiler and exports the trace."""
+    trace.root.end()
+    if error is not None:
+        trace.root.status = "error"
+        trace.root.attributes["error"] = repr(error)
+    if trace.profiler:
+        trace.profile = trace.profiler.stop()
+    if trace._tokens:
+        trace_token, span_token = trace._tokens
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        trace._tokens = None
+    export(trace)
+
+
+@contextlib.contextmanager
+def traced(name: str, profile: bool = False, **attributes: Any) -> Iterator[Trace]:
+    """start_trace / finish_trace around a block (scripts, Celery tasks)."""
+    trace = start_trace(name, profile=profile, **attributes)
+    try:
+        yield trace
+    except BaseException as exc:
+        finish_trace(trace, error=exc)
+        raise
+    finish_trace(trace)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """
+    Times the block as a child of the current span. Yields the span (set_attribute() to record
+    sizes, counts, ...); outside a trace it yields a no-op span and records nothing.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield _NOOP_SPAN
+        return
+    current = Span(trace.trace_id, _current_span.get(), name, attributes)
+    token = _current_span.set(current.span_id)
+    try:
+        yield current
+    except BaseException as exc:
+        current.status = "error"
+        current.attributes["error"] = repr(exc)
+        raise
+    finally:
+        current.end()
+        _current_span.reset(token)
+        trace.spans.append(current)
+
+
+def export(trace: Trace) -> None:
+    """Appends the trace to Config.TRACE_FILE as one JSON line."""
+    if not Config.TRACE_FILE:
+        return
+    line = json.dumps(trace.to_dict(), default=str) + "\n"
+    try:
+        with _export_lock, open(Config.TRACE_FILE, "a", encoding="utf-8") as trace_file:
+            trace_file.write(line)
+    except OSError as exc:
+        logger.warning(f"Could not export trace {trace.trace_id}: {exc}")
+
+
+def header_trusted(token: Optional[str]) -> bool:
+    """Whether the request's token matches Config.TRACE_HEADER_SECRET (never, if the secret is unset)."""
+    if not Config.TRACE_HEADER_SECRET or not token:
+        return False
+    return hmac.compare_digest(token.encode("utf-8"), Config.TRACE_HEADER_SECRET.encode("utf-8"))
+
+
+def sampling_decision(header_value: Optional[str], token: Optional[str] = None) -> Optional[str]:
+    """
+    Whether to trace a request: None (don't), "trace" or "profile".
+    With a valid token the header wins over the sample rate, so a single request can be traced
+    (or excluded) on demand; without one only the sample rate applies.
+    """
+    value = (header_value or "").strip().lower() if header_trusted(token) else ""
+    if value == "profile":
+        return "profile"
+    if value in ("1", "true", "yes"):
+        return "trace"
+    if value in ("0", "false", "no"):
+        return None
+    if Config.TRACE_SAMPLE_RATE > 0 and random.random() < Config.TRACE_SAMPLE_RATE:
+        return "trace"
+    return None
+
+
+def init_tracing(app: Flask) -> None:
+    """
+    Traces the app's requests (sampled, or switched on with the TRACE_HEADER header and the
+    TRACE_TOKEN_HEADER secret) and adds
+    X-Trace-Id and Server-Timing headers to traced responses. Does nothing if TRACE_FILE is unset.
+    """
+    if not Config.TRACE_FILE:
+        return
+
+    @app.before_request
+    def _start_request_trace():
+        decision = sampling_decision(request.headers.get(Config.TRACE_HEADER),
+                                     request.headers.get(Config.TRACE_TOKEN_HEADER))
+        if decision is None:
+            return
+        rule = request.url_rule.rule if request.url_rule else request.path
+        g.trace = start_trace(f"{request.method} {rule}", profile=decision == "profile",
+                              query=request.query_string.decode("utf-8", "replace"))
+
+    @app.after_request
+    def _add_trace_headers(response):
+        trace = g.get("trace")
+        if trace is not None:
+            trace.root.set_attribute("status_code", response.status_code)
+            response.headers["X-Trace-Id"] = trace.trace_id
+            timing = trace.server_timing()
+            if timing:
+                response.headers["Server-Timing"] = timing
+        return response
+
+    @app.teardown_request
+    def _finish_request_trace(error=None):
+        trace = g.pop("trace", None)
+        if trace is not None:
+            finish_trace(trace, error=error)
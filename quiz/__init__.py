@@ -3,10 +3,12 @@
 from flask import Flask
 from flasgger import Swagger
 from quiz.config import Config
-from quiz.routes import quiz_blueprint
 
 def create_app():
     """Create and configure the Flask application."""
+    # Imported here so Celery workers importing quiz.task don't load the web routes.
+    from quiz.routes import quiz_blueprint
+
     app = Flask(__name__)
     
     # Load config
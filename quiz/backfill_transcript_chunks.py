@@ -0,0 +1,88 @@
+# quiz/backfill_transcript_chunks.py
+"""
+Copies the chunks of the per-lecture collections (lecture_<id>) into the shared transcript
+chunk collection searched by GET /quiz/search, adding each lecture's course_id. Dense vectors
+are copied as they are, nothing is re-embedded; bm25 vectors are computed from the text.
+Lectures embedded after the shared collection was introduced are written to it by the
+pipeline and don't need this.
+
+Usage:
+    python -m quiz.backfill_transcript_chunks [--course-id UUID]
+"""
+import argparse
+import logging
+
+from quiz.config import Config
+from quiz.qdrant_ops import (
+    chunk_point_id, chunk_vector, dense_vector, ensure_transcript_chunks_collection, get_qdrant_client,
+    has_sparse_vectors,
+)
+from quiz.sql_ops import SqlOps
+from observability import configure_logging
+
+logger = logging.getLogger(__name__)
+
+UPSERT_BATCH_SIZE = 256
+
+
+def backfill_lecture(client, course_id: str, lecture_id: str) -> int:
+    """
+    Copies one lecture's chunks; returns the number of chunks copied.
+    Older points have no chunk_index: the lecture's chunks are then numbered in lecture order
+    (the order fetch_lecture_chunks uses) and the index is written into the copied payload.
+    """
+    from qdrant_client import models
+
+    collection_name = f"lecture_{lecture_id}"
+    if not client.collection_exists(collection_name):
+        return 0
+    points, offset = [], None
+    while True:
+        page, offset = client.scroll(collection_name=collection_name, limit=256, offset=offset,
+                                     with_payload=True, with_vectors=True)
+        points.extend(page)
+        if offset is None:
+            break
+    if any("chunk_index" not in point.payload for point in points):
+        points.sort(key=lambda point: point.payload.get("chunk_index", point.id))
+        chunk_indexes = list(range(len(points)))
+    else:
+        chunk_indexes = [point.payload["chunk_index"] for point in points]
+
+    with_sparse = has_sparse_vectors(client, Config.TRANSCRIPT_CHUNKS_COLLECTION)
+    for start in range(0, len(points), UPSERT_BATCH_SIZE):
+        client.upsert(collection_name=Config.TRANSCRIPT_CHUNKS_COLLECTION, points=[
+            models.PointStruct(
+                id=chunk_point_id(lecture_id, chunk_index),
+                # bm25 vectors are computed from the text (older lecture collections have none).
+                vector=chunk_vector(dense_vector(point), point.payload.get("text", ""), with_sparse),
+                payload={**point.payload, "chunk_index": chunk_index,
+                         "lecture_id": lecture_id, "course_id": course_id},
+            )
+            for point, chunk_index in zip(points[start:start + UPSERT_BATCH_SIZE],
+                                          chunk_indexes[start:start + UPSERT_BATCH_SIZE])
+        ])
+    return len(points)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--course-id", help="Only the lectures of this course")
+    args = arg_parser.parse_args()
+    configure_logging()
+
+    with SqlOps() as sql_ops:
+        courses = sql_ops.fetch_courses_for_embedding()
+    client = get_qdrant_client()
+    ensure_transcript_chunks_collection(client)
+    total = 0
+    for course in courses:
+        if args.course_id and course["course_id"] != args.course_id:
+            continue
+        for lecture_id in course["lecture_ids"]:
+            total += backfill_lecture(client, course["course_id"], lecture_id)
+    logger.info(f"Copied {total} transcript chunks into {Config.TRANSCRIPT_CHUNKS_COLLECTION}")
+
+
+if __name__ == "__main__":
+    main()
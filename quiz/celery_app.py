@@ -0,0 +1,72 @@
+# quiz/celery_app.py
+import os
+from celery import Celery, signals
+from quiz.config import Config
+from observability import configure_logging
+
+# Kept free of the pipeline modules (Whisper, sentence-transformers, Groq, Qdrant): the web
+# process only needs the app to send tasks by name, the workers import quiz.task.
+celery_app = Celery(
+    'quiz_tasks',
+    broker=Config.CELERY_BROKER_URL,
+    backend=Config.CELERY_RESULT_BACKEND,
+    include=['quiz.task']
+)
+
+# Each pipeline stage has its own queue so workers can be sized per stage:
+# prefork with low concurrency for Whisper, threads/gevent for the I/O-bound stages.
+STAGE_QUEUES = {
+    'download': 'quiz.download',
+    'transcribe': 'quiz.transcribe',
+    'embed': 'quiz.embed',
+    'generate': 'quiz.generate',
+    'persist': 'quiz.persist',
+}
+
+# Registered task names, used to dispatch without importing quiz.task.
+STAGE_TASKS = {name: f'quiz.task.{name}_task' for name in STAGE_QUEUES}
+COLLECT_COURSE_RESULTS_TASK = 'quiz.task.collect_course_results'
+FAIL_COURSE_JOB_TASK = 'quiz.task.fail_course_job'
+REFRESH_COURSE_EMBEDDINGS_TASK = 'quiz.task.refresh_course_embeddings_task'
+
+celery_app.conf.update(
+    task_routes={
+        **{STAGE_TASKS[name]: {'queue': queue} for name, queue in STAGE_QUEUES.items()},
+        COLLECT_COURSE_RESULTS_TASK: {'queue': STAGE_QUEUES['persist']},
+        FAIL_COURSE_JOB_TASK: {'queue': STAGE_QUEUES['persist']},
+        # Needs the embedding model, which the embed workers already load.
+        REFRESH_COURSE_EMBEDDINGS_TASK: {'queue': STAGE_QUEUES['embed']},
+    },
+    # Run with `celery -A quiz.task beat` (one beat process per deployment).
+    beat_schedule={
+        'refresh-course-embeddings': {
+            'task': REFRESH_COURSE_EMBEDDINGS_TASK,
+            'schedule': Config.COURSE_EMBEDDINGS_REFRESH_INTERVAL,
+            # A refresh that couldn't start before the next one is due is dropped.
+            'options': {'expires': Config.COURSE_EMBEDDINGS_REFRESH_INTERVAL},
+        },
+    },
+    # Stages are long-running: fetch one message at a time and only ack once done,
+    # so a busy transcription worker never sits on messages another worker could run.
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    result_expires=Config.JOB_TTL,
+)
+
+
+@signals.setup_logging.connect
+def setup_logging(**kwargs):
+    # Connecting this signal stops Celery from installing its own root handlers.
+    configure_logging()
+
+
+@signals.worker_init.connect
+def start_metrics_server(**kwargs):
+    from observability.metrics import start_worker_metrics_server
+    start_worker_metrics_server()
+
+
+@signals.worker_process_shutdown.connect
+def drop_process_metrics(**kwargs):
+    from observability.metrics import mark_process_dead
+    mark_process_dead(os.getpid())
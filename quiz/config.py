@@ -8,6 +8,53 @@ load_dotenv()
 class Config:
     # FOR QUIZ GENERATION
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+    GROQ_MODEL = os.getenv("GROQ_MODEL", "mixtral-8x7b-32768")
+    # Provider quotas shared by all Groq calls of a process.
+    GROQ_REQUESTS_PER_MINUTE = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+    # Each call reserves its prompt (up to ~QUIZ_CONTEXT_TOKENS) plus GROQ_MAX_COMPLETION_TOKENS
+    # until its usage is known, so the quota must hold several reservations.
+    GROQ_TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "30000"))
+    GROQ_MAX_COMPLETION_TOKENS = int(os.getenv("GROQ_MAX_COMPLETION_TOKENS", "2048"))
+    GROQ_TIMEOUT = float(os.getenv("GROQ_TIMEOUT", "60"))
+    # Retries on 429/5xx/timeouts with jittered exponential backoff (seconds).
+    GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "5"))
+    GROQ_BACKOFF_BASE = float(os.getenv("GROQ_BACKOFF_BASE", "1"))
+    GROQ_BACKOFF_MAX = float(os.getenv("GROQ_BACKOFF_MAX", "60"))
+    QUIZ_NUM_QUESTIONS = int(os.getenv("QUIZ_NUM_QUESTIONS", "5"))
+    # Upper bound on the questions of one quiz (the pipeline's QUIZ_NUM_QUESTIONS and the
+    # num_questions of the streaming endpoint are clamped to it).
+    QUIZ_MAX_QUESTIONS = int(os.getenv("QUIZ_MAX_QUESTIONS", "20"))
+    # Pagination of the question read API (GET /quiz/questions).
+    QUESTIONS_PAGE_SIZE = int(os.getenv("QUESTIONS_PAGE_SIZE", "20"))
+    QUESTIONS_MAX_PAGE_SIZE = int(os.getenv("QUESTIONS_MAX_PAGE_SIZE", "100"))
+    # Quiz read API cache: per-process LRU entries, and the lifetime of the Redis copies.
+    QUIZ_CACHE_LRU_SIZE = int(os.getenv("QUIZ_CACHE_LRU_SIZE", "1024"))
+    QUIZ_CACHE_TTL = int(os.getenv("QUIZ_CACHE_TTL", str(24 * 3600)))
+    # Question bank: generated questions are embedded into one Qdrant collection and new
+    # candidates more similar than the threshold to a course's earlier questions are dropped.
+    # QUESTION_BANK_EXTRA extra candidates are requested so the quiz keeps its size.
+    QUESTION_BANK_ENABLED = os.getenv("QUESTION_BANK_ENABLED", "true").lower() == "true"
+    QUESTION_BANK_COLLECTION = os.getenv("QUESTION_BANK_COLLECTION", "question_bank")
+    QUESTION_BANK_THRESHOLD = float(os.getenv("QUESTION_BANK_THRESHOLD", "0.9"))
+    QUESTION_BANK_EXTRA = int(os.getenv("QUESTION_BANK_EXTRA", "3"))
+
+    # Prompt content: "coverage" picks a diverse, representative set of chunks of the whole
+    # lecture (MMR over the stored vectors) within QUIZ_CONTEXT_TOKENS; "query" takes the
+    # 3 chunks closest to a generic query.
+    QUIZ_RETRIEVAL_MODE = os.getenv("QUIZ_RETRIEVAL_MODE", "coverage")
+    QUIZ_CONTEXT_TOKENS = int(os.getenv("QUIZ_CONTEXT_TOKENS", "3000"))
+    # Chunks retrieved for the prompt in "query" mode.
+    QUIZ_QUERY_TOP_K = int(os.getenv("QUIZ_QUERY_TOP_K", "3"))
+    QUIZ_MMR_DIVERSITY = float(os.getenv("QUIZ_MMR_DIVERSITY", "0.5"))
+    # "map_reduce" generates candidates for every QUIZ_CONTEXT_TOKENS-sized section of the
+    # lecture concurrently, then deduplicates them and keeps a balanced selection.
+    QUIZ_MAP_OVERGENERATION = float(os.getenv("QUIZ_MAP_OVERGENERATION", "2"))
+    QUIZ_DEDUP_THRESHOLD = float(os.getenv("QUIZ_DEDUP_THRESHOLD", "0.9"))
+    # Ask the model for a JSON object (JSON mode) instead of parsing the text format.
+    QUIZ_STRUCTURED_OUTPUT = os.getenv("QUIZ_STRUCTURED_OUTPUT", "false").lower() == "true"
+    # Completions are cached in Redis by model + prompt hash + generation parameters.
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600)))
 
     # DATABASE CONFIGURATION (PostgreSQL)
     DB_HOST = os.getenv("DB_HOST")
@@ -15,6 +62,11 @@ class Config:
     DB_NAME = os.getenv("DB_NAME")
     DB_USER = os.getenv("DB_USER")
     DB_PASSWORD = os.getenv("DB_PASSWORD")
+    # Process-wide psycopg2 pool used by SqlOps.
+    DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+    DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+    # Connections idle for longer than this are checked with SELECT 1 before reuse.
+    DB_POOL_HEALTHCHECK_IDLE = float(os.getenv("DB_POOL_HEALTHCHECK_IDLE", "30"))
 
     # Construct the SQLAlchemy Database URI
     SQLALCHEMY_DATABASE_URI = (
@@ -26,8 +78,89 @@ class Config:
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
     # QDRANT
+    # ":memory:" runs Qdrant embedded in the process (nothing persisted, see LOCAL BACKENDS).
     QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
+    # If set, Qdrant runs embedded in the process and stores its data in this directory
+    # (one process at a time); QDRANT_URL is then ignored.
+    QDRANT_PATH = os.getenv("QDRANT_PATH")
+
+    # TRANSCRIPT SEARCH
+    # Transcript chunks of every lecture in one collection (payload-indexed on course_id and
+    # lecture_id), written next to the per-lecture collections used for quiz prompts.
+    TRANSCRIPT_CHUNKS_COLLECTION = os.getenv("TRANSCRIPT_CHUNKS_COLLECTION", "transcript_chunks")
+    SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "10"))
+    SEARCH_MAX_PAGE_SIZE = int(os.getenv("SEARCH_MAX_PAGE_SIZE", "50"))
+    SEARCH_MAX_QUERY_LENGTH = int(os.getenv("SEARCH_MAX_QUERY_LENGTH", "512"))
+    # Embeddings of recent search queries kept per web process.
+    SEARCH_QUERY_CACHE_SIZE = int(os.getenv("SEARCH_QUERY_CACHE_SIZE", "4096"))
+    # Load the embedding model in each web worker right after it starts, instead of on the first search.
+    SEARCH_WARM_MODEL = os.getenv("SEARCH_WARM_MODEL", "false").lower() == "true"
+
+    # HYBRID RETRIEVAL: transcript chunks also get a BM25-style sparse vector ("bm25"), and
+    # searches fuse the dense and sparse results with Reciprocal Rank Fusion. Collections
+    # created before this have no sparse vector and are searched dense-only.
+    HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+    # Candidates taken from each retriever before fusion.
+    HYBRID_PREFETCH_LIMIT = int(os.getenv("HYBRID_PREFETCH_LIMIT", "20"))
+    BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+    BM25_B = float(os.getenv("BM25_B", "0.75"))
+    # Typical chunk length in terms (512-character chunks).
+    BM25_AVG_CHUNK_TOKENS = float(os.getenv("BM25_AVG_CHUNK_TOKENS", "60"))
+
+    # COURSE EMBEDDINGS (content-based recommendations)
+    # One point per course (id = course id): title, description and lecture titles, blended with
+    # the centroid of the course's transcript chunks.
+    COURSE_EMBEDDINGS_COLLECTION = os.getenv("COURSE_EMBEDDINGS_COLLECTION", "course_embeddings")
+    # Weight of the transcript centroid in a course vector (0 = text only).
+    COURSE_TRANSCRIPT_WEIGHT = float(os.getenv("COURSE_TRANSCRIPT_WEIGHT", "0.5"))
+    # Seconds between incremental refreshes (courses/quizzes updated since the last one), run by Celery beat.
+    COURSE_EMBEDDINGS_REFRESH_INTERVAL = int(os.getenv("COURSE_EMBEDDINGS_REFRESH_INTERVAL", "900"))
+
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
+    # Chords (course-level fan-out) need a result backend.
+    CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", "redis://localhost:6379/1")
+
+    # Job status records (and Celery results) are kept this many seconds.
+    JOB_TTL = int(os.getenv("JOB_TTL", str(7 * 24 * 3600)))
+
+    # COURSE-LEVEL FAN-OUT
+    # Maximum number of lectures of one course processed at the same time (0 = unlimited).
+    COURSE_MAX_CONCURRENCY = int(os.getenv("COURSE_MAX_CONCURRENCY", "8"))
+    # A slot is a lease renewed by every stage of the lecture: a slot held by a crashed worker
+    # is released after this many seconds (longer than the slowest single stage).
+    COURSE_SLOT_TTL = int(os.getenv("COURSE_SLOT_TTL", "3600"))
+    # How long a lecture waits before asking for a free slot again.
+    COURSE_SLOT_RETRY_SECONDS = int(os.getenv("COURSE_SLOT_RETRY_SECONDS", "15"))
+    # A lecture that got no slot within this many seconds fails at the download stage.
+    COURSE_SLOT_MAX_WAIT = int(os.getenv("COURSE_SLOT_MAX_WAIT", str(6 * 3600)))
+
+    # Working directory shared by the pipeline stages (downloads, transcripts, quiz files).
+    # When stages run on different hosts this must be a shared volume.
+    OUTPUT_DIRECTORY = os.getenv("OUTPUT_DIRECTORY")
+    # Durable store of the transcripts (one <lecture_id>.jsonl of Whisper segments per lecture),
+    # kept after the job: re-chunking, re-embedding or regenerating a quiz doesn't re-transcribe.
+    TRANSCRIPT_DIRECTORY = os.getenv("TRANSCRIPT_DIRECTORY") or os.path.join(OUTPUT_DIRECTORY or ".", "transcripts")
+    # Maximum characters of a transcript chunk (chunks end on segment boundaries).
+    TRANSCRIPT_CHUNK_CHARS = int(os.getenv("TRANSCRIPT_CHUNK_CHARS", "512"))
+    WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")
+    WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cuda")
 
-    CELERY_BROKER_URL = 'redis://localhost:6379/0'
+    # LOCAL BACKENDS (quiz/local_backends.py): stand-ins that run the pipeline without a
+    # Qdrant server, Groq, a GPU or PostgreSQL, for CI and benchmarks/bench_pipeline.py.
+    # "sentence_transformers" or "hashing" (deterministic hashed bag of words, no model download).
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence_transformers")
+    EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-mpnet-base-v2")
+    # Vector size of the transcript chunk collections: must match the embedding model.
+    EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "768"))
+    # "groq" or "replay" (completions read from LLM_REPLAY_FILE).
+    LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+    LLM_REPLAY_FILE = os.getenv("LLM_REPLAY_FILE")
+    # If set, the Groq gateway appends every completion it receives to this file, in the replay format.
+    LLM_RECORD_FILE = os.getenv("LLM_RECORD_FILE")
+    # "whisper" or "fixture" (segments read from <video path without extension>.jsonl).
+    TRANSCRIPTION_BACKEND = os.getenv("TRANSCRIPTION_BACKEND", "whisper")
+    # "postgres" or "memory" (quizzes kept in the process, lost on exit).
+    QUIZ_STORE_BACKEND = os.getenv("QUIZ_STORE_BACKEND", "postgres")
 
 
@@ -0,0 +1,130 @@
+# quiz/course_embeddings.py
+"""
+Course embeddings for content-based recommendations: one Qdrant point per course (point id =
+course id) whose vector blends the embedding of the course text (title, description, lecture
+titles) with the centroid of its transcript chunks. Refreshed incrementally: only the courses
+whose row, lectures or lecture quizzes changed since the last refresh are re-embedded.
+Runs in the Celery workers (quiz.task.refresh_course_embeddings_task).
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from quiz.config import Config
+from quiz.qdrant_ops import dense_vector, get_embedding_model, get_qdrant_client
+from quiz.redis_ops import get_redis
+from quiz.sql_ops import SqlOps
+from observability.metrics import track_dependency
+
+logger = logging.getLogger(__name__)
+
+# Latest changed_at already embedded (ISO format).
+WATERMARK_KEY = "recommendation:course_embeddings:watermark"
+ENCODE_BATCH_SIZE = 32
+UPSERT_BATCH_SIZE = 256
+
+
+def course_text(course: Dict[str, Any]) -> str:
+    """The text embedded for a course."""
+    parts = [course["title"], course["description"]]
+    if course["lecture_titles"]:
+        parts.append(f"Lectures: {course['lecture_titles']}")
+    return ". ".join(part.strip() for part in parts if part and part.strip())
+
+
+def ensure_collection(client, size: int) -> None:
+    """Creates the course collection (cosine distance) if it doesn't exist yet."""
+    from qdrant_client import models
+
+    if not client.collection_exists(Config.COURSE_EMBEDDINGS_COLLECTION):
+        client.create_collection(
+            collection_name=Config.COURSE_EMBEDDINGS_COLLECTION,
+            vectors_config=models.VectorParams(size=size, distance=models.Distance.COSINE),
+        )
+
+
+def transcript_centroid(client, lecture_ids: List[str]) -> Optional[np.ndarray]:
+    """Mean of the transcript chunk vectors stored for the lectures, or None if there are none."""
+    total, count = None, 0
+    for lecture_id in lecture_ids:
+        collection_name = f"lecture_{lecture_id}"
+        if not client.collection_exists(collection_name):
+            continue
+        offset = None
+        while True:
+            with track_dependency("qdrant", "scroll"):
+                points, offset = client.scroll(collection_name=collection_name, limit=256, offset=offset,
+                                               with_payload=False, with_vectors=True)
+            if points:
+                vectors = np.asarray([dense_vector(point) for point in points], dtype=np.float32)
+                total = vectors.sum(axis=0) if total is None else total + vectors.sum(axis=0)
+                count += len(points)
+            if offset is None:
+                break
+    return total / count if count else None
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def refresh_course_embeddings(full: bool = False) -> int:
+    """
+    Re-embeds the courses changed since the last refresh (all of them if `full` or on the
+    first run) and advances the watermark.
+
+    :return: Number of courses embedded.
+    """
+    from qdrant_client import models
+
+    redis_client = get_redis()
+    watermark = None if full else redis_client.get(WATERMARK_KEY)
+    since = datetime.fromisoformat(watermark) if watermark else None
+
+    with SqlOps() as sql_ops:
+        courses = sql_ops.fetch_courses_for_embedding(since)
+    if not courses:
+        return 0
+
+    model = get_embedding_model()
+    client = get_qdrant_client()
+    ensure_collection(client, model.get_sentence_embedding_dimension())
+
+    with track_dependency("sentence_transformers", "encode"):
+        text_vectors = model.encode([course_text(course) for course in courses],
+                                    batch_size=ENCODE_BATCH_SIZE, normalize_embeddings=True)
+
+    weight = Config.COURSE_TRANSCRIPT_WEIGHT
+    points = []
+    for course, text_vector in zip(courses, text_vectors):
+        vector = text_vector
+        if weight > 0 and course["lecture_ids"]:
+            centroid = transcript_centroid(client, course["lecture_ids"])
+            if centroid is not None:
+                vector = (1 - weight) * text_vector + weight * _normalize(centroid)
+        points.append(models.PointStruct(
+            id=course["course_id"],
+            vector=_normalize(vector).tolist(),
+            payload={
+                "course_id": course["course_id"],
+                "title": course["title"],
+                "category_id": course["category_id"],
+                "changed_at": course["changed_at"].isoformat() if course["changed_at"] else None,
+            },
+        ))
+
+    for start in range(0, len(points), UPSERT_BATCH_SIZE):
+        with track_dependency("qdrant", "upsert"):
+            client.upsert(collection_name=Config.COURSE_EMBEDDINGS_COLLECTION,
+                          points=points[start:start + UPSERT_BATCH_SIZE])
+
+    changed = [course["changed_at"] for course in courses if course["changed_at"]]
+    if changed:
+        latest = max(changed)
+        if since is None or latest > since:
+            redis_client.set(WATERMARK_KEY, latest.isoformat())
+    logger.info(f"Embedded {len(points)} courses into {Config.COURSE_EMBEDDINGS_COLLECTION}")
+    return len(points)
@@ -0,0 +1,98 @@
+# quiz/dispatch.py
+import uuid
+from datetime import datetime
+from celery import chain, chord, group
+from quiz.config import Config
+from quiz.celery_app import celery_app, STAGE_TASKS, COLLECT_COURSE_RESULTS_TASK, FAIL_COURSE_JOB_TASK
+from quiz.jobs import claim_lecture, save_job, save_course_job
+from quiz.pipeline import new_job
+
+# Tasks are referenced by name so the web process never imports quiz.task (and the
+# stage implementations behind it); only the workers do.
+
+
+def build_quiz_pipeline(job):
+    """
+    Builds the chain download -> transcribe -> embed -> generate -> persist for a lecture job.
+    Each task receives the job dict returned by the previous one.
+    """
+    return chain(
+        celery_app.signature(STAGE_TASKS['download'], args=(job,)),
+        *(celery_app.signature(STAGE_TASKS[name]) for name in ('transcribe', 'embed', 'generate', 'persist'))
+    )
+
+
+def submit_lecture_job(course_id, lecture_id, video_path, use_cache=True):
+    """
+    Enqueues the pipeline for a lecture unless a job for it is already in flight.
+
+    :param use_cache: If False, the LLM response cache is bypassed for this job.
+    :return: (job_id, deduplicated) where deduplicated is True if an existing job was returned.
+    """
+    job = new_job(course_id, lecture_id, video_path, use_cache)
+    existing_job_id = claim_lecture(lecture_id, job["job_id"])
+    if existing_job_id:
+        return existing_job_id, True
+
+    save_job(job)
+    build_quiz_pipeline(job).apply_async()
+    return job["job_id"], False
+
+
+def submit_course_job(course_id, lectures, max_concurrency=None, use_cache=True):
+    """
+    Fans out one lecture pipeline per lecture and aggregates them with a chord.
+    All lectures are enqueued at once; the course slots cap how many run concurrently,
+    so the course takes about as long as its slowest lectures rather than their sum.
+    Lectures that already have a job in flight are attached to the course job, not re-run.
+    If a lecture's chain breaks (an unhandled task error), the chord callback never runs;
+    its error handler (fail_course_job) persists the finished lectures and fails the course job.
+
+    :param lectures: (lecture_id, video_path) rows for the course.
+    :param max_concurrency: Course-wide cap (0 = unlimited), defaults to Config.COURSE_MAX_CONCURRENCY.
+    :param use_cache: If False, the LLM response cache is bypassed for these jobs.
+    :return: The course job record.
+    """
+    if max_concurrency is None:
+        max_concurrency = Config.COURSE_MAX_CONCURRENCY
+
+    course_job_id = str(uuid.uuid4())
+    lecture_job_ids = []
+    # (job_id, lecture_id) of the jobs started here; the course job releases their lectures.
+    started = []
+    lecture_pipelines = []
+    for lecture_id, video_path in lectures:
+        job = new_job(course_id, str(lecture_id), video_path, use_cache)
+        existing_job_id = claim_lecture(job["lecture_id"], job["job_id"])
+        if existing_job_id:
+            lecture_job_ids.append(existing_job_id)
+            continue
+        # The course callback persists every quiz of the course in one transaction.
+        job["defer_persist"] = True
+        job["course_job_id"] = course_job_id
+        if max_concurrency > 0:
+            job["slot"] = {"name": f"quiz:course_slots:{course_id}", "limit": max_concurrency}
+        save_job(job)
+        lecture_job_ids.append(job["job_id"])
+        started.append((job["job_id"], job["lecture_id"]))
+        lecture_pipelines.append(build_quiz_pipeline(job))
+
+    course_job = {
+        "job_id": course_job_id,
+        "kind": "course",
+        "course_id": course_id,
+        # Also running when every lecture was attached to a job in flight: get_job reports the
+        # course as finished once its lecture jobs are.
+        "status": "running" if lecture_job_ids else "success",
+        "lecture_jobs": lecture_job_ids,
+        "started_jobs": started,
+        "created_at": datetime.now().isoformat(),
+        "summary": None,
+        "error": None,
+    }
+    save_course_job(course_job)
+    if lecture_pipelines:
+        callback = celery_app.signature(COLLECT_COURSE_RESULTS_TASK, args=(course_job,))
+        callback.link_error(celery_app.signature(FAIL_COURSE_JOB_TASK, args=(course_job,)))
+        chord(group(lecture_pipelines), callback).apply_async()
+    return course_job
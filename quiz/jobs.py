@@ -0,0 +1,185 @@
+# quiz/jobs.py
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from quiz.config import Config
+from quiz.redis_ops import get_redis
+
+logger = logging.getLogger(__name__)
+
+JOB_KEY = "quiz:job:{}"
+LECTURE_JOB_KEY = "quiz:lecture_job:{}"
+# Hash of lecture_id -> job waiting for its course's bulk persist, per course job.
+COURSE_RESULTS_KEY = "quiz:course_results:{}"
+
+TERMINAL_STATUSES = ("success", "error")
+
+# Only deletes the in-flight marker if it still points at the finishing job.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Replaces the marker only if it still holds the stale job id (or has disappeared meanwhile).
+_TAKEOVER_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current == false or current == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    return 1
+end
+return 0
+"""
+
+# Claim attempts before giving up on a marker that keeps changing hands.
+CLAIM_ATTEMPTS = 3
+
+
+def job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Public status of a lecture job: no local paths or quiz payload."""
+    stages = job.get("stages", {})
+    done = sum(1 for s in stages.values() if s.get("status") == "success")
+    return {
+        "job_id": job["job_id"],
+        "kind": "lecture",
+        "course_id": job["course_id"],
+        "lecture_id": job["lecture_id"],
+        "status": job["status"],
+        "current_stage": job.get("current_stage"),
+        "progress": {"completed_stages": done, "total_stages": job.get("total_stages")},
+        "stages": stages,
+        "error": job.get("error"),
+        "created_at": job.get("created_at"),
+    }
+
+
+def save_job(job: Dict[str, Any]) -> None:
+    """Publishes the job's status. Failures are logged, never raised into the pipeline."""
+    try:
+        get_redis().set(JOB_KEY.format(job["job_id"]), json.dumps(job_view(job)), ex=Config.JOB_TTL)
+    except Exception as e:
+        logger.error(f"Could not save status of job {job.get('job_id')}: {e}")
+
+
+def save_course_job(course_job: Dict[str, Any]) -> None:
+    """Stores a course fan-out record: the course plus the ids of its lecture jobs."""
+    get_redis().set(JOB_KEY.format(course_job["job_id"]), json.dumps(course_job), ex=Config.JOB_TTL)
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the status of a lecture or course job, or None if unknown/expired.
+    Course jobs are expanded with the current status of each lecture job, and their status and
+    summary are worked out from those: lectures attached from an earlier submission finish on
+    their own, outside the course's chord.
+    """
+    raw = get_redis().get(JOB_KEY.format(job_id))
+    if raw is None:
+        return None
+    job = json.loads(raw)
+    if job.get("kind") == "course":
+        job["lectures"] = _get_lecture_jobs(job.get("lecture_jobs", []))
+        counts: Dict[str, int] = {}
+        for lecture in job["lectures"]:
+            counts[lecture["status"]] = counts.get(lecture["status"], 0) + 1
+        job["progress"] = {"lectures": len(job["lectures"]), "by_status": counts}
+        # A fan-out that failed as a whole (fail_course_job) keeps its status.
+        if job["lectures"] and not job.get("error"):
+            job["status"], job["summary"] = course_status(job["lectures"])
+    return job
+
+
+def course_status(lectures: List[Dict[str, Any]]) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """
+    Status and summary of a course job from the status of its lecture jobs: "running" until
+    every lecture has finished (expired records count as failed), then "success", "partial"
+    or "error".
+    """
+    if any(lecture["status"] not in TERMINAL_STATUSES + ("expired",) for lecture in lectures):
+        return "running", None
+    failed = [
+        {"lecture_id": lecture.get("lecture_id"), "error": lecture.get("error")}
+        for lecture in lectures if lecture["status"] != "success"
+    ]
+    summary = {"total": len(lectures), "succeeded": len(lectures) - len(failed), "failed": failed}
+    if not failed:
+        return "success", summary
+    return ("partial" if summary["succeeded"] else "error"), summary
+
+
+def _get_lecture_jobs(job_ids: List[str]) -> List[Dict[str, Any]]:
+    if not job_ids:
+        return []
+    raws = get_redis().mget([JOB_KEY.format(job_id) for job_id in job_ids])
+    lectures = []
+    for job_id, raw in zip(job_ids, raws):
+        if raw is None:
+            lectures.append({"job_id": job_id, "status": "expired"})
+        else:
+            lecture = json.loads(raw)
+            lectures.append({key: lecture[key] for key in ("job_id", "lecture_id", "status", "current_stage", "error")})
+    return lectures
+
+
+def claim_lecture(lecture_id: str, job_id: str) -> Optional[str]:
+    """
+    Registers job_id as the in-flight job for the lecture.
+
+    :return: None if the claim succeeded, otherwise the id of the job already in flight.
+    """
+    redis_client = get_redis()
+    key = LECTURE_JOB_KEY.format(lecture_id)
+    existing_id = None
+    for _ in range(CLAIM_ATTEMPTS):
+        if redis_client.set(key, job_id, nx=True, ex=Config.JOB_TTL):
+            return None
+
+        existing_id = redis_client.get(key)
+        if existing_id is None:
+            continue
+        existing = get_job(existing_id)
+        if existing and existing["status"] not in TERMINAL_STATUSES:
+            return existing_id
+
+        # The marker outlived its job (expired record or a crash before release): take it over,
+        # unless another submitter took it over first (then its job is the one in flight).
+        if redis_client.eval(_TAKEOVER_SCRIPT, 1, key, existing_id, job_id, Config.JOB_TTL):
+            return None
+    return redis_client.get(key) or existing_id
+
+
+def release_lecture(lecture_id: str, job_id: str) -> None:
+    """Clears the lecture's in-flight marker once its job has finished."""
+    try:
+        get_redis().eval(_RELEASE_SCRIPT, 1, LECTURE_JOB_KEY.format(lecture_id), job_id)
+    except Exception as e:
+        logger.error(f"Could not release lecture {lecture_id} from job {job_id}: {e}")
+
+
+def stash_course_result(job: Dict[str, Any]) -> None:
+    """
+    Keeps a finished lecture job (quiz included) until its course's bulk persist, so the
+    course's error handler can still persist it if the fan-out never reaches its callback.
+    """
+    try:
+        key = COURSE_RESULTS_KEY.format(job["course_job_id"])
+        redis_client = get_redis()
+        redis_client.hset(key, job["lecture_id"], json.dumps(job))
+        redis_client.expire(key, Config.JOB_TTL)
+    except Exception as e:
+        logger.error(f"Could not stash the result of job {job.get('job_id')}: {e}")
+
+
+def get_course_results(course_job_id: str) -> List[Dict[str, Any]]:
+    """Returns the lecture jobs stashed for a course job."""
+    return [json.loads(raw) for raw in get_redis().hvals(COURSE_RESULTS_KEY.format(course_job_id))]
+
+
+def clear_course_results(course_job_id: str) -> None:
+    """Drops a course job's stashed lecture jobs once they are persisted."""
+    try:
+        get_redis().delete(COURSE_RESULTS_KEY.format(course_job_id))
+    except Exception as e:
+        logger.error(f"Could not clear the stashed results of course job {course_job_id}: {e}")
@@ -0,0 +1,65 @@
+# quiz/llm_cache.py
+import json
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+from quiz.config import Config
+from quiz.redis_ops import get_redis
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "quiz:llm_cache:{}"
+# Hash of the transcript chunks indexed in a lecture collection, so generated quizzes can be
+# cached under their inputs before anything is retrieved.
+CONTENT_HASH_KEY = "quiz:content_hash:{}"
+
+
+def make_cache_key(model: str, prompt: str, params: Dict[str, Any]) -> str:
+    """Key = hash of model name + prompt hash + generation parameters."""
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    material = json.dumps({"model": model, "prompt": prompt_hash, "params": params}, sort_keys=True, default=str)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def get_cached_completion(key: str) -> Optional[str]:
+    """Returns the cached completion text, or None on a miss (or if Redis is unavailable)."""
+    try:
+        return get_redis().get(CACHE_KEY.format(key))
+    except Exception as e:
+        logger.warning(f"LLM cache lookup failed: {e}")
+        return None
+
+
+def content_hash(texts: List[str]) -> str:
+    """Hash of a lecture's chunk texts, in order."""
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def set_content_hash(collection: str, value: str) -> None:
+    """Records the content hash of the chunks just indexed in a collection."""
+    try:
+        get_redis().set(CONTENT_HASH_KEY.format(collection), value)
+    except Exception as e:
+        logger.warning(f"Could not record the content hash of {collection}: {e}")
+
+
+def get_content_hash(collection: str) -> Optional[str]:
+    """Content hash of a collection, or None if unknown (indexed before hashes were kept, or Redis is down)."""
+    try:
+        return get_redis().get(CONTENT_HASH_KEY.format(collection))
+    except Exception as e:
+        logger.warning(f"Content hash lookup failed: {e}")
+        return None
+
+
+def set_cached_completion(key: str, completion: str) -> None:
+    """Stores a completion for Config.LLM_CACHE_TTL seconds."""
+    try:
+        get_redis().set(CACHE_KEY.format(key), completion, ex=Config.LLM_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"LLM cache write failed: {e}")
@@ -0,0 +1,301 @@
+# quiz/llm_gateway.py
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
+
+from quiz.config import Config
+from quiz.llm_cache import make_cache_key, get_cached_completion, set_cached_completion
+from quiz.local_backends import get_replay_llm, record_completion
+from observability.metrics import LLM_CACHE_HITS, LLM_TOKENS, track_dependency
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at `per_minute` tokens per minute."""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1) -> float:
+        """
+        Waits until `amount` tokens are available and takes them. The lock is only held to
+        check and take tokens, never while sleeping, so a caller whose amount fits is not held
+        up by another one waiting for a larger amount.
+
+        :return: The amount taken (capped at the capacity), to be refunded if unused.
+        """
+        if amount > self.capacity:
+            logger.warning(f"Reservation of {amount:.0f} exceeds the bucket capacity {self.capacity:.0f}")
+            amount = self.capacity
+        while True:
+            async with self._lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return amount
+                wait = (amount - self.tokens) / self.rate
+            await asyncio.sleep(wait)
+
+    def refund(self, amount: float) -> None:
+        """Returns tokens that were reserved but not used."""
+        if amount > 0:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+def _is_retryable(error: Exception) -> bool:
+    import groq
+    if isinstance(error, (groq.RateLimitError, groq.APITimeoutError, groq.APIConnectionError)):
+        return True
+    return isinstance(error, groq.APIStatusError) and error.status_code >= 500
+
+
+def _retry_after(error: Exception) -> float:
+    """Seconds the provider asked us to wait (Retry-After header), 0 if not given."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return 0.0
+    try:
+        return float(response.headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _backoff_delay(error: Exception, attempt: int) -> float:
+    """Full-jitter exponential backoff, but never shorter than the provider's Retry-After."""
+    backoff = random.uniform(0, min(Config.GROQ_BACKOFF_MAX, Config.GROQ_BACKOFF_BASE * 2 ** attempt))
+    return max(_retry_after(error), backoff)
+
+
+class LLMGateway:
+    """
+    Shared entry point for Groq chat completions.
+
+    All calls run on one background event loop per process, so every thread of a worker
+    shares the same AsyncGroq connection pool and the same requests/tokens-per-minute
+    buckets. Prompts are sent concurrently up to the quota; 429/5xx/timeouts are retried
+    with full-jitter exponential backoff (or the provider's Retry-After, if longer).
+    Completions are cached by model + prompt hash + parameters (see quiz.llm_cache).
+    """
+
+    def __init__(self, api_key: str, model: str = None, requests_per_minute: int = None,
+                 tokens_per_minute: int = None, timeout: float = None, max_retries: int = None) -> None:
+        """
+        :param api_key: The API key for Groq.
+        :param model: Default model name.
+        :param requests_per_minute: Provider request quota.
+        :param tokens_per_minute: Provider token quota (prompt + completion).
+        :param timeout: Per-request timeout in seconds.
+        :param max_retries: Retries after the first attempt for retryable errors.
+        """
+        self.api_key = api_key
+        self.model = model or Config.GROQ_MODEL
+        self.requests_per_minute = requests_per_minute or Config.GROQ_REQUESTS_PER_MINUTE
+        self.tokens_per_minute = tokens_per_minute or Config.GROQ_TOKENS_PER_MINUTE
+        self.timeout = timeout or Config.GROQ_TIMEOUT
+        self.max_retries = Config.GROQ_MAX_RETRIES if max_retries is None else max_retries
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pid: Optional[int] = None
+        self._loop_lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Starts the background loop (again after a fork, since threads don't survive it)."""
+        with self._loop_lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                # Imported on first call so importing the gateway (e.g. in the web process) stays cheap.
+                from groq import AsyncGroq
+                self._loop = asyncio.new_event_loop()
+                # The client and buckets are bound to the loop they are used on.
+                self._client = AsyncGroq(api_key=self.api_key, timeout=self.timeout, max_retries=0)
+                self._request_bucket = TokenBucket(self.requests_per_minute)
+                self._token_bucket = TokenBucket(self.tokens_per_minute)
+                threading.Thread(target=self._loop.run_forever, name="llm-gateway", daemon=True).start()
+            return self._loop
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+    @staticmethod
+    def estimate_tokens(prompt: str, max_tokens: int) -> int:
+        """Rough token reservation: ~4 characters per prompt token plus the completion budget."""
+        return len(prompt) // 4 + max_tokens
+
+    async def acomplete(self, prompt: str, model: str = None, use_cache: bool = True, **params: Any) -> str:
+        """
+        Sends one prompt and returns the completion text.
+
+        :param prompt: User message content.
+        :param model: Overrides the default model.
+        :param use_cache: If False, skips the cache lookup (the fresh completion is still cached).
+        :param params: Extra chat.completions.create parameters (temperature, max_tokens, ...).
+        """
+        model = model or self.model
+        params.setdefault("max_tokens", Config.GROQ_MAX_COMPLETION_TOKENS)
+        cache_key, cached = await self._cache_lookup(model, prompt, params, use_cache)
+        if cached is not None:
+            return cached
+
+        response, reserved = await self._create(prompt, model, params)
+        completion = response.choices[0].message.content if response.choices else None
+        self._settle(model, prompt, completion or "", reserved, getattr(response, "usage", None))
+        if not response.choices:
+            raise RuntimeError("Groq returned no choices")
+        if cache_key:
+            await asyncio.to_thread(set_cached_completion, cache_key, completion)
+        if Config.LLM_RECORD_FILE:
+            record_completion(Config.LLM_RECORD_FILE, prompt, completion)
+        return completion
+
+    async def astream(self, prompt: str, model: str = None, use_cache: bool = True, **params: Any) -> AsyncIterator[str]:
+        """
+        Streams the completion text as it is generated (same rate limits and cache as acomplete).
+        Retries only happen before the first chunk has been received.
+        """
+        model = model or self.model
+        params.setdefault("max_tokens", Config.GROQ_MAX_COMPLETION_TOKENS)
+        cache_key, cached = await self._cache_lookup(model, prompt, params, use_cache)
+        if cached is not None:
+            yield cached
+            return
+
+        stream, reserved = await self._create(prompt, model, params, stream=True)
+        parts = []
+        usage = None
+        try:
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    yield delta
+                # Groq reports the usage of a streamed completion on its last chunk.
+                x_groq = getattr(chunk, "x_groq", None)
+                if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+                    usage = x_groq.usage
+        finally:
+            # Also when the consumer stopped early or the stream broke off.
+            self._settle(model, prompt, "".join(parts), reserved, usage)
+        if cache_key:
+            await asyncio.to_thread(set_cached_completion, cache_key, "".join(parts))
+        if Config.LLM_RECORD_FILE:
+            record_completion(Config.LLM_RECORD_FILE, prompt, "".join(parts))
+
+    async def _cache_lookup(self, model: str, prompt: str, params: Dict[str, Any], use_cache: bool):
+        """Returns (cache_key, cached completion or None); cache_key is None when caching is disabled."""
+        if not Config.LLM_CACHE_ENABLED:
+            return None, None
+        cache_key = make_cache_key(model, prompt, params)
+        if not use_cache:
+            return cache_key, None
+        cached = await asyncio.to_thread(get_cached_completion, cache_key)
+        if cached is not None:
+            LLM_CACHE_HITS.inc()
+            logger.info("Serving completion from the LLM cache")
+        return cache_key, cached
+
+    async def _create(self, prompt: str, model: str, params: Dict[str, Any], stream: bool = False):
+        """
+        Calls Groq under the rate limits, retrying retryable errors.
+        The tokens reserved for a failed attempt are refunded; those of the successful one are
+        settled by the caller once the usage is known (see _settle).
+
+        :return: (response or stream, tokens reserved for it).
+        """
+        estimate = self.estimate_tokens(prompt, params["max_tokens"])
+
+        attempt = 0
+        while True:
+            await self._request_bucket.acquire(1)
+            reserved = await self._token_bucket.acquire(estimate)
+            try:
+                with track_dependency("groq", "chat_completion"):
+                    response = await self._client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                        stream=stream,
+                        **params
+                    )
+            except Exception as e:
+                # A rejected or failed request consumed no tokens.
+                self._token_bucket.refund(reserved)
+                if not _is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                delay = _backoff_delay(e, attempt)
+                attempt += 1
+                logger.warning(f"Groq call failed ({e}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            return response, reserved
+
+    def _settle(self, model: str, prompt: str, completion: str, reserved: float, usage: Any) -> None:
+        """
+        Refunds the part of a reservation the call didn't use: the reported usage, or an estimate
+        from the prompt and completion lengths when the provider reported none.
+        """
+        if usage is not None and usage.total_tokens:
+            used = usage.total_tokens
+            self._count_tokens(model, usage)
+        else:
+            used = (len(prompt) + len(completion)) // 4
+        self._token_bucket.refund(reserved - used)
+
+    @staticmethod
+    def _count_tokens(model: str, usage: Any) -> None:
+        LLM_TOKENS.labels(model, "prompt").inc(usage.prompt_tokens or 0)
+        LLM_TOKENS.labels(model, "completion").inc(usage.completion_tokens or 0)
+
+    async def acomplete_many(self, prompts: List[str], **params: Any) -> List[Union[str, Exception]]:
+        """Sends all prompts concurrently; failed prompts yield their exception instead of a text."""
+        return await asyncio.gather(*(self.acomplete(prompt, **dict(params)) for prompt in prompts), return_exceptions=True)
+
+    def complete(self, prompt: str, **params: Any) -> str:
+        """Blocking wrapper around acomplete for sync callers (Flask views, Celery tasks)."""
+        return self._run(self.acomplete(prompt, **params))
+
+    def complete_many(self, prompts: List[str], **params: Any) -> List[Union[str, Exception]]:
+        """Blocking wrapper around acomplete_many."""
+        return self._run(self.acomplete_many(prompts, **params))
+
+    def stream(self, prompt: str, **params: Any) -> Iterator[str]:
+        """Blocking iterator over astream for sync callers (e.g. a streamed Flask response)."""
+        agen = self.astream(prompt, **params)
+        try:
+            while True:
+                try:
+                    yield self._run(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            # Also runs when the consumer stops early (client disconnected): close the HTTP stream.
+            self._run(agen.aclose())
+
+
+_gateways: Dict[str, LLMGateway] = {}
+_gateways_lock = threading.Lock()
+
+
+def get_gateway(api_key: str) -> LLMGateway:
+    """
+    Returns the process-wide gateway for an API key, so all callers share its quota.
+    With Config.LLM_BACKEND=replay, returns the ReplayLLM of Config.LLM_REPLAY_FILE instead.
+    """
+    if Config.LLM_BACKEND == "replay":
+        return get_replay_llm(Config.LLM_REPLAY_FILE)
+    with _gateways_lock:
+        if api_key not in _gateways:
+            _gateways[api_key] = LLMGateway(api_key)
+        return _gateways[api_key]
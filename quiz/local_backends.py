@@ -0,0 +1,182 @@
+# quiz/local_backends.py
+"""
+Stand-ins for the external services of the quiz pipeline, so it runs end to end on a CPU-only
+machine without network access (CI, benchmarks/bench_pipeline.py):
+
+- HashingEmbedder: deterministic hashed bag of words with the SentenceTransformer encode() API
+  (EMBEDDING_BACKEND=hashing);
+- ReplayLLM: replays recorded completions with the LLMGateway API (LLM_BACKEND=replay);
+- fixture_segments: transcript segments read from a fixture file (TRANSCRIPTION_BACKEND=fixture);
+- MemoryQuizStore: keeps quizzes in the process with the SqlOps persistence API
+  (QUIZ_STORE_BACKEND=memory).
+
+Qdrant itself runs embedded in the process with QDRANT_URL=:memory: or QDRANT_PATH.
+"""
+import os
+import json
+import uuid
+import asyncio
+import hashlib
+import logging
+import functools
+import threading
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from quiz.sparse import term_index, tokenize
+from quiz.transcripts import read_segments
+
+logger = logging.getLogger(__name__)
+
+
+class HashingEmbedder:
+    """
+    Embeds a text as the signed counts of its terms (quiz.sparse.tokenize) hashed into
+    `dimension` buckets, L2-normalised. Texts sharing terms get similar vectors, which is
+    enough to exercise retrieval, MMR and deduplication; the quality is not comparable to a
+    sentence-transformers model.
+    """
+
+    def __init__(self, dimension: int) -> None:
+        self.dimension = dimension
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dimension
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for term in tokenize(text):
+            index = term_index(term)
+            # The bits above the bucket pick the sign, so collisions tend to cancel out.
+            vector[index % self.dimension] += 1.0 if (index // self.dimension) % 2 == 0 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs: Any) -> np.ndarray:
+        """
+        Same call as SentenceTransformer.encode: one vector for a string, a 2-D array for a list.
+        Vectors are always normalised (normalize_embeddings is accepted and ignored).
+        """
+        if isinstance(sentences, str):
+            return self._embed(sentences)
+        if not sentences:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return np.stack([self._embed(sentence) for sentence in sentences])
+
+
+def prompt_hash(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+
+
+_record_lock = threading.Lock()
+
+
+def record_completion(path: str, prompt: str, completion: str) -> None:
+    """Appends a completion to a replay file (see ReplayLLM)."""
+    line = json.dumps({"prompt_sha256": prompt_hash(prompt), "completion": completion}, ensure_ascii=False)
+    with _record_lock, open(path, "a", encoding="utf-8") as f:
+        f.write(line + "\n")
+
+
+class ReplayLLM:
+    """
+    Replays recorded completions instead of calling Groq. Same methods as LLMGateway.
+
+    The replay file holds one JSON object per line with a "completion" and optionally the
+    "prompt_sha256" of the prompt it answers (LLM_RECORD_FILE writes both). A prompt whose hash
+    was recorded gets its own completion; any other prompt gets the completions without a hash
+    (or, if there are none, all of them) in turn, so a small corpus serves any number of prompts.
+    """
+
+    def __init__(self, path: str, chunk_size: int = 64) -> None:
+        """
+        :param path: Replay file (JSON lines).
+        :param chunk_size: Characters per chunk yielded by stream().
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        if not records:
+            raise ValueError(f"No completions in replay file {path}")
+        self.by_prompt = {record["prompt_sha256"]: record["completion"] for record in records if record.get("prompt_sha256")}
+        self.rotation = [record["completion"] for record in records if not record.get("prompt_sha256")] or \
+            [record["completion"] for record in records]
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def complete(self, prompt: str, **params: Any) -> str:
+        with self._lock:
+            self.calls += 1
+            completion = self.by_prompt.get(prompt_hash(prompt))
+            if completion is None:
+                completion = self.rotation[(self.calls - 1) % len(self.rotation)]
+        return completion
+
+    def complete_many(self, prompts: List[str], **params: Any) -> List[Union[str, Exception]]:
+        return [self.complete(prompt, **params) for prompt in prompts]
+
+    def stream(self, prompt: str, **params: Any) -> Iterator[str]:
+        completion = self.complete(prompt, **params)
+        for start in range(0, len(completion), self.chunk_size):
+            yield completion[start:start + self.chunk_size]
+
+    async def acomplete(self, prompt: str, **params: Any) -> str:
+        return self.complete(prompt, **params)
+
+    async def acomplete_many(self, prompts: List[str], **params: Any) -> List[Union[str, Exception]]:
+        return self.complete_many(prompts, **params)
+
+    async def astream(self, prompt: str, **params: Any) -> AsyncIterator[str]:
+        for chunk in self.stream(prompt, **params):
+            yield chunk
+            await asyncio.sleep(0)
+
+
+@functools.lru_cache(maxsize=None)
+def get_replay_llm(path: str) -> ReplayLLM:
+    """Returns the process-wide ReplayLLM of a replay file."""
+    return ReplayLLM(path)
+
+
+def fixture_path(video_path: str) -> str:
+    """Segment fixture of a video: the same path with a .jsonl extension."""
+    return os.path.splitext(video_path)[0] + ".jsonl"
+
+
+def fixture_segments(video_path: str) -> List[Dict[str, Any]]:
+    """Transcript segments of a video, read from its fixture (see quiz/transcripts.py for the format)."""
+    return read_segments(fixture_path(video_path))
+
+
+class MemoryQuizStore:
+    """
+    Persists quizzes in a process-wide dict (quizzes) instead of PostgreSQL. Same context
+    manager protocol and insert methods as SqlOps; assessment ids are stable per lecture.
+    """
+
+    quizzes: Dict[str, Dict[str, Any]] = {}
+    _lock = threading.Lock()
+
+    def __enter__(self) -> "MemoryQuizStore":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        return False
+
+    def insert_quiz(self, course_id: str, lecture_id: str, quiz_data: Any) -> Optional[str]:
+        return self.insert_quizzes_bulk([(course_id, lecture_id, quiz_data)]).get(str(lecture_id))
+
+    def insert_quizzes_bulk(self, quizzes: Iterable[Tuple[str, str, Any]]) -> Dict[str, str]:
+        ids = {}
+        with self._lock:
+            for course_id, lecture_id, quiz_data in quizzes:
+                lecture_id = str(lecture_id)
+                assessment_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"assessment/{lecture_id}"))
+                self.quizzes[lecture_id] = {
+                    "assessment_id": assessment_id,
+                    "course_id": str(course_id),
+                    "quiz": quiz_data,
+                }
+                ids[lecture_id] = assessment_id
+        return ids
@@ -0,0 +1,286 @@
+# quiz/pipeline.py
+import os
+import time
+import uuid
+import logging
+import functools
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+
+from quiz.config import Config
+from quiz.video_download import download_video_from_url
+from quiz.transcription import transcribe_video
+from quiz.transcripts import segments_path
+from quiz.qdrant_ops import get_qdrant_client, store_transcript_in_qdrant
+from quiz.quiz import MCQGenerator, LECTURE_QUIZ_QUERY
+from quiz.question_bank import QuestionBank
+from quiz.sql_ops import SqlOps
+from quiz.local_backends import MemoryQuizStore
+from observability.metrics import STAGE_DURATION, STAGE_IN_PROGRESS
+
+logger = logging.getLogger(__name__)
+
+# A job is a plain dict so it can travel between Celery tasks as JSON.
+Job = Dict[str, Any]
+
+
+def new_job(course_id: str, lecture_id: str, video_path: str, use_cache: bool = True) -> Job:
+    """
+    Creates the job state that is passed from stage to stage.
+
+    :param course_id: UUID of the course the lecture belongs to.
+    :param lecture_id: UUID of the lecture.
+    :param video_path: Remote URL or local path of the lecture video.
+    :param use_cache: If False, the quiz is generated by Groq even if a cached completion exists.
+    :return: The initial job dictionary.
+    """
+    return {
+        "job_id": str(uuid.uuid4()),
+        "course_id": course_id,
+        "lecture_id": lecture_id,
+        "video_path": video_path,
+        "use_cache": use_cache,
+        "local_dir": Config.OUTPUT_DIRECTORY,
+        "status": "queued",
+        "error": None,
+        "created_at": datetime.now().isoformat(),
+        "current_stage": None,
+        "stages": {},
+        "total_stages": len(STAGE_NAMES),
+    }
+
+
+def stage(name: str) -> Callable[[Callable[[Job], Job]], Callable[[Job], Job]]:
+    """
+    Decorator for pipeline stages.
+
+    A stage receives the job produced by the previous stage and returns it updated.
+    Once a stage has failed, the remaining stages pass the job through untouched so a
+    failure travels to the end of the chain instead of raising inside Celery.
+    Each stage's status, start time and duration are recorded in job["stages"] and
+    exported as the quiz_stage_duration_seconds histogram.
+    """
+    def decorator(func: Callable[[Job], Job]) -> Callable[[Job], Job]:
+        @functools.wraps(func)
+        def wrapper(job: Job) -> Job:
+            if job.get("status") == "error":
+                return job
+            job["status"] = "running"
+            job["current_stage"] = name
+            record = {"status": "running", "started_at": datetime.now().isoformat(), "duration": None}
+            job.setdefault("stages", {})[name] = record
+            start = time.perf_counter()
+            STAGE_IN_PROGRESS.labels(name).inc()
+            try:
+                job = func(job)
+            except Exception as e:
+                logger.error(f"Stage '{name}' failed for lecture {job.get('lecture_id')}: {e}")
+                job = fail(job, name, str(e))
+            finally:
+                STAGE_IN_PROGRESS.labels(name).dec()
+            duration = time.perf_counter() - start
+            record["duration"] = round(duration, 3)
+            record["status"] = "error" if job.get("status") == "error" else "success"
+            STAGE_DURATION.labels(name, record["status"]).observe(duration)
+            # Stages may return a new dict; make sure the record is attached to it.
+            job.setdefault("stages", {})[name] = record
+            return job
+
+        wrapper.stage_name = name
+        return wrapper
+    return decorator
+
+
+def fail(job: Job, stage_name: str, message: str) -> Job:
+    """Marks the job as failed at the given stage."""
+    job["status"] = "error"
+    job["error"] = {"stage": stage_name, "message": message}
+    return job
+
+
+@stage("download")
+def download_stage(job: Job) -> Job:
+    """Downloads the video if the path is a remote URL and the lecture isn't transcribed yet."""
+    local_dir = job["local_dir"]
+    os.makedirs(local_dir, exist_ok=True)
+    job["local_video_path"] = job["video_path"]
+    job["downloaded"] = False
+
+    if os.path.exists(segments_path(job["lecture_id"])):
+        # The stored transcript is reused: the video isn't needed.
+        job["local_video_path"] = None
+        return job
+    if job["video_path"].startswith("http"):
+        local_video_path = download_video_from_url(job["video_path"], local_dir)
+        if not local_video_path:
+            return fail(job, "download", f"Video download failed for {job['video_path']}")
+        job["local_video_path"] = local_video_path
+        job["downloaded"] = True
+    return job
+
+
+@stage("transcribe")
+def transcribe_stage(job: Job) -> Job:
+    """Transcribes the video into the lecture's segment file, reusing it if it already exists."""
+    transcript_path = segments_path(job["lecture_id"])
+    if not os.path.exists(transcript_path):
+        if not transcribe_video(job["local_video_path"], transcript_path):
+            return fail(job, "transcribe", "Transcription failed")
+    job["transcript_path"] = transcript_path
+    return job
+
+
+@stage("embed")
+def embed_stage(job: Job) -> Job:
+    """Stores the transcript embeddings in Qdrant once per lecture."""
+    # A marker file indicates that the transcript (and embeddings) have been stored.
+    qdrant_marker = os.path.join(job["local_dir"], f"qdrant_{job['lecture_id']}.done")
+    if not os.path.exists(qdrant_marker):
+        store_transcript_in_qdrant(lecture_id=job["lecture_id"], transcript_path=job["transcript_path"],
+                                   course_id=job["course_id"])
+        with open(qdrant_marker, "w") as marker:
+            marker.write("done")
+    job["qdrant_marker"] = qdrant_marker
+    return job
+
+
+@stage("generate")
+def generate_stage(job: Job) -> Job:
+    """
+    Generates the MCQs for the lecture from its Qdrant collection.
+    With the question bank enabled, a few extra candidates are requested and those too
+    similar to questions already generated for the course are dropped. If every candidate
+    is dropped, the quiz is generated once more without the caches (a cached quiz would be
+    rejected again). The kept questions enter the bank once the quiz is persisted.
+    """
+    num_questions = min(Config.QUIZ_NUM_QUESTIONS, Config.QUIZ_MAX_QUESTIONS)
+    extra = Config.QUESTION_BANK_EXTRA if Config.QUESTION_BANK_ENABLED else 0
+    mcq_gen = MCQGenerator(
+        api_key=Config.GROQ_API_KEY,
+        qdrant_url=Config.QDRANT_URL,
+        qdrant_collection=f"lecture_{job['lecture_id']}"
+    )
+    use_cache = job.get("use_cache", True)
+    for attempt in range(2):
+        generation_result = mcq_gen.generate_mcqs(LECTURE_QUIZ_QUERY, num_questions=num_questions + extra, use_cache=use_cache)
+        if generation_result.get("status") == "error":
+            return fail(job, "generate", generation_result.get("message", "MCQ generation failed"))
+        quiz = generation_result.get("quiz")
+        if not Config.QUESTION_BANK_ENABLED or not quiz:
+            break
+
+        bank = QuestionBank(mcq_gen.qdrant_client, mcq_gen.embedding_model)
+        fresh, embeddings = bank.filter_fresh(job["course_id"], quiz)
+        if fresh:
+            quiz = fresh[:num_questions]
+            # Added to the bank by the persist stage (add_to_question_bank).
+            job["question_embeddings"] = embeddings[:num_questions].round(6).tolist()
+            break
+        if attempt == 0:
+            logger.info(f"Every candidate for lecture {job['lecture_id']} is already in the question bank; regenerating")
+            use_cache = False
+    else:
+        # Better a repeated quiz than none: keep the generated questions.
+        logger.warning(f"Every candidate for lecture {job['lecture_id']} is already in the question bank")
+        quiz = quiz[:num_questions]
+
+    job["quiz"] = quiz
+    return job
+
+
+def add_to_question_bank(job: Job) -> None:
+    """
+    Adds the questions of a persisted quiz to the course's question bank. Only called once the
+    quiz is stored, so a failed or retried persist leaves nothing in the bank. Failures are logged.
+    """
+    embeddings = job.pop("question_embeddings", None)
+    if not embeddings or not job.get("quiz"):
+        return
+    try:
+        bank = QuestionBank(get_qdrant_client(Config.QDRANT_URL))
+        bank.add(job["course_id"], job["lecture_id"], job["quiz"], np.asarray(embeddings, dtype=np.float32))
+    except Exception as e:
+        logger.error(f"Could not add the quiz of lecture {job['lecture_id']} to the question bank: {e}")
+
+
+def quiz_store():
+    """Where quizzes are persisted: PostgreSQL (SqlOps), or process memory with Config.QUIZ_STORE_BACKEND=memory."""
+    if Config.QUIZ_STORE_BACKEND == "memory":
+        return MemoryQuizStore()
+    return SqlOps()
+
+
+@stage("persist")
+def persist_stage(job: Job) -> Job:
+    """
+    Upserts the quiz into PostgreSQL and removes the job's working files.
+    Jobs of a course fan-out (defer_persist) are left in status "persisting": the course
+    callback writes all of the course's quizzes in one transaction (see persist_jobs).
+    """
+    if job.get("defer_persist"):
+        job["status"] = "persisting"
+    else:
+        with quiz_store() as store:
+            job["assessment_id"] = store.insert_quiz(
+                course_id=job["course_id"],
+                lecture_id=job["lecture_id"],
+                quiz_data=job["quiz"]
+            )
+        job["status"] = "success"
+        add_to_question_bank(job)
+
+    # Only this job's files are removed: other lectures may be in flight in the same directory.
+    # The transcript is kept (Config.TRANSCRIPT_DIRECTORY): re-embedding doesn't re-transcribe.
+    leftovers = [job.get("qdrant_marker")]
+    if job.get("downloaded"):
+        leftovers.append(job.get("local_video_path"))
+    for file_path in leftovers:
+        if file_path and os.path.isfile(file_path):
+            os.remove(file_path)
+    return job
+
+
+def persist_jobs(jobs: List[Job]) -> List[Job]:
+    """
+    Writes the quizzes of every job left in status "persisting" with one bulk upsert,
+    then marks those jobs as succeeded (or failed at the persist stage if the write fails).
+    """
+    pending = [job for job in jobs if job.get("status") == "persisting"]
+    if not pending:
+        return jobs
+    try:
+        with quiz_store() as store:
+            ids = store.insert_quizzes_bulk(
+                (job["course_id"], job["lecture_id"], job["quiz"]) for job in pending
+            )
+    except Exception as e:
+        logger.error(f"Bulk persist of {len(pending)} quizzes failed: {e}")
+        for job in pending:
+            fail(job, "persist", str(e))
+            job["stages"]["persist"]["status"] = "error"
+        return jobs
+
+    for job in pending:
+        job["assessment_id"] = ids.get(job["lecture_id"])
+        job["status"] = "success"
+        add_to_question_bank(job)
+    return jobs
+
+
+STAGES: List[Callable[[Job], Job]] = [
+    download_stage,
+    transcribe_stage,
+    embed_stage,
+    generate_stage,
+    persist_stage,
+]
+STAGE_NAMES: List[str] = [run_stage.stage_name for run_stage in STAGES]
+
+
+def run_pipeline(job: Job) -> Job:
+    """Runs every stage in the current process."""
+    for run_stage in STAGES:
+        job = run_stage(job)
+    return job
@@ -86,83 +86,294 @@
 #     return [hit.payload["text"] for hit in results]
 
 
-from qdrant_client import QdrantClient, models
-from sentence_transformers import SentenceTransformer
 import os
-import hashlib
+import uuid
 import logging
+import functools
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
 
+from quiz import sparse
 from quiz.config import Config
-
-logging.basicConfig(
-    filename="qdrant_ops.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
-
-# Connect to Qdrant
-qdrant_url = Config.QDRANT_URL
-client = QdrantClient(url=qdrant_url)
-
-# Load the SentenceTransformer model once
-embedding_model = SentenceTransformer('all-mpnet-base-v2')
+from quiz.transcripts import chunk_segments, read_segments
+from quiz.llm_cache import content_hash, set_content_hash
+from observability.metrics import CHUNKS_EMBEDDED, track_dependency
+from observability.tracing import span
+
+if TYPE_CHECKING:
+    from qdrant_client import QdrantClient
+    from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+# The client and the model are created on first use, not at import time: the web process
+# imports this module through the pipeline but never embeds anything itself.
+def get_qdrant_client(url: str = None) -> "QdrantClient":
+    """
+    Returns the process-wide Qdrant client for a URL (defaults to Config.QDRANT_URL).
+    With Config.QDRANT_PATH set, or the URL ":memory:", Qdrant runs embedded in the process.
+    """
+    if Config.QDRANT_PATH:
+        return _qdrant_client(None, Config.QDRANT_PATH)
+    return _qdrant_client(url or Config.QDRANT_URL, None)
+
+@functools.lru_cache(maxsize=None)
+def _qdrant_client(url: str, path: str) -> "QdrantClient":
+    from qdrant_client import QdrantClient
+    if path:
+        return QdrantClient(path=path)
+    if url == ":memory:":
+        return QdrantClient(location=":memory:")
+    return QdrantClient(url=url)
+
+@functools.lru_cache(maxsize=1)
+def get_embedding_model() -> "SentenceTransformer":
+    """
+    Loads the embedding model once per process and shares it between all callers
+    (a HashingEmbedder with Config.EMBEDDING_BACKEND=hashing).
+    """
+    if Config.EMBEDDING_BACKEND == "hashing":
+        from quiz.local_backends import HashingEmbedder
+        return HashingEmbedder(Config.EMBEDDING_DIMENSION)
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(Config.EMBEDDING_MODEL)
 
 def get_text_embedding(text: str):
     """Converts text into an embedding using sentence-transformers."""
-    embedding = embedding_model.encode(text)
+    with track_dependency("sentence_transformers", "encode"):
+        embedding = get_embedding_model().encode(text)
     return embedding.tolist()
 
-def store_transcript_in_qdrant(lecture_id: str, transcript_path: str):
-    """Stores transcript text embeddings in a Qdrant collection for a specific lecture."""
+def chunk_point_id(lecture_id: str, chunk_index: int) -> str:
+    """Stable point id of a transcript chunk (the same in every process, unlike hash())."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"lecture/{lecture_id}/chunk/{chunk_index}"))
+
+# Named sparse vector of transcript chunks (see quiz/sparse.py). The dense vector stays unnamed.
+SPARSE_VECTOR_NAME = "bm25"
+
+def sparse_vectors_config():
+    """Sparse vector config of transcript chunk collections: Qdrant applies the IDF itself."""
+    from qdrant_client import models
+    return {SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)}
+
+_sparse_collections: Dict[str, bool] = {}
+
+def has_sparse_vectors(client, collection_name: str) -> bool:
+    """Whether the collection stores the bm25 vector (collections created before it don't)."""
+    if collection_name not in _sparse_collections:
+        params = client.get_collection(collection_name).config.params
+        _sparse_collections[collection_name] = SPARSE_VECTOR_NAME in (params.sparse_vectors or {})
+    return _sparse_collections[collection_name]
+
+def chunk_vector(embedding: List[float], text: str, with_sparse: bool):
+    """Vector(s) of a chunk point: the dense embedding, plus the bm25 vector if the collection has one."""
+    if not with_sparse:
+        return embedding
+    from qdrant_client import models
+    indices, values = sparse.document_vector(text)
+    return {"": embedding, SPARSE_VECTOR_NAME: models.SparseVector(indices=indices, values=values)}
+
+def dense_vector(point) -> List[float]:
+    """The dense vector of a point read with with_vectors=True, whether or not it also has a sparse one."""
+    return point.vector.get("") if isinstance(point.vector, dict) else point.vector
+
+def hybrid_query(client, collection_name: str, query_text: str, query_vector: List[float], limit: int,
+                 query_filter=None, with_payload=True):
+    """
+    Searches transcript chunks with both the dense and the bm25 vector and fuses the two rankings
+    with Reciprocal Rank Fusion (scores are then RRF scores, not similarities). Exact terms that
+    the embedding misses still rank. Dense-only on collections without the sparse vector, when
+    the query has no indexable term, or with HYBRID_SEARCH_ENABLED=false.
+
+    :return: The scored points, best first.
+    """
+    from qdrant_client import models
+    indices, values = sparse.query_vector(query_text) if Config.HYBRID_SEARCH_ENABLED else ([], [])
+    if indices and has_sparse_vectors(client, collection_name):
+        prefetch_limit = max(limit, Config.HYBRID_PREFETCH_LIMIT)
+        with track_dependency("qdrant", "hybrid_query"):
+            return client.query_points(
+                collection_name=collection_name,
+                prefetch=[
+                    models.Prefetch(query=query_vector, filter=query_filter, limit=prefetch_limit),
+                    models.Prefetch(query=models.SparseVector(indices=indices, values=values),
+                                    using=SPARSE_VECTOR_NAME, filter=query_filter, limit=prefetch_limit),
+                ],
+                query=models.FusionQuery(fusion=models.Fusion.RRF),
+                limit=limit,
+                with_payload=with_payload,
+            ).points
+    with track_dependency("qdrant", "query"):
+        return client.query_points(
+            collection_name=collection_name,
+            query=query_vector,
+            query_filter=query_filter,
+            limit=limit,
+            with_payload=with_payload,
+        ).points
+
+_ensured_collections = set()
+
+def ensure_transcript_chunks_collection(client) -> None:
+    """Creates the shared transcript chunk collection and its payload indexes (once per process)."""
+    from qdrant_client import models
+    name = Config.TRANSCRIPT_CHUNKS_COLLECTION
+    if name in _ensured_collections:
+        return
+    if not client.collection_exists(name):
+        client.create_collection(
+            collection_name=name,
+            vectors_config=models.VectorParams(size=Config.EMBEDDING_DIMENSION, distance=models.Distance.COSINE),
+            sparse_vectors_config=sparse_vectors_config(),
+        )
+        # Searches are always filtered by course (and sometimes lecture).
+        for field in ("course_id", "lecture_id"):
+            client.create_payload_index(collection_name=name, field_name=field,
+                                        field_schema=models.PayloadSchemaType.KEYWORD)
+    _ensured_collections.add(name)
+
+def transcript_chunks(transcript_path: str) -> List[Dict[str, Any]]:
+    """
+    Chunks of a transcript as {"text", "start", "end"}: along segment boundaries, with their time
+    range, for segment files (.jsonl); every 512 characters, without times, for plain text files.
+    """
+    if transcript_path.endswith(".jsonl"):
+        return chunk_segments(read_segments(transcript_path))
+    # Plain text transcripts (written before segments were kept)
+    with open(transcript_path, "r", encoding="utf-8") as f:
+        transcript = f.read()
+    return [{"text": transcript[i:i+512], "start": None, "end": None} for i in range(0, len(transcript), 512)]
+
+def store_transcript_in_qdrant(lecture_id: str, transcript_path: str, course_id: str = None):
+    """
+    Stores transcript text embeddings in a Qdrant collection for a specific lecture, and in the
+    shared transcript chunk collection (searched by course) when course_id is given.
+    Chunk payloads carry the chunk's time range in the video (start/end, seconds) when known.
+    """
+    from qdrant_client import models
+    client = get_qdrant_client()
     collection_name = f"lecture_{lecture_id}"
 
     # Ensure collection exists
-    existing = client.get_collections().collections
-    if collection_name not in [col.name for col in existing]:
+    existed = client.collection_exists(collection_name)
+    if not existed:
         client.recreate_collection(
             collection_name=collection_name,
-            vectors_config=models.VectorParams(size=768, distance=models.Distance.COSINE),
+            vectors_config=models.VectorParams(size=Config.EMBEDDING_DIMENSION, distance=models.Distance.COSINE),
+            sparse_vectors_config=sparse_vectors_config(),
         )
 
-    # Read transcript text
-    with open(transcript_path, "r", encoding="utf-8") as f:
-        transcript = f.read()
-
-    # Chunk transcript (simple approach: 512 chars each)
-    chunks = [transcript[i:i+512] for i in range(0, len(transcript), 512)]
-    points = []
-
-    for idx, chunk in enumerate(chunks):
-        embedding = get_text_embedding(chunk)
-        point_id = abs(hash(lecture_id) % 1000000) * 1000 + idx
-
-        points.append(
-            models.PointStruct(
-                id=point_id,
-                vector=embedding,
-                payload={
-                    "text": chunk,
-                    "lecture_id": lecture_id
-                }
-            )
-        )
+    chunks = transcript_chunks(transcript_path)
+    if not chunks:
+        logger.warning(f"Empty transcript for lecture {lecture_id}, nothing to store")
+        return
+
+    # One batched encode instead of one model call per chunk.
+    with track_dependency("sentence_transformers", "encode"):
+        embeddings = get_embedding_model().encode([chunk["text"] for chunk in chunks], batch_size=32).tolist()
+
+    payloads = [
+        {"text": chunk["text"], "lecture_id": lecture_id, "chunk_index": idx, "start": chunk["start"], "end": chunk["end"]}
+        for idx, chunk in enumerate(chunks)
+    ]
+
+    def points_for(collection: str, extra_payload: Dict[str, Any] = None):
+        with_sparse = has_sparse_vectors(client, collection)
+        return [
+            models.PointStruct(id=chunk_point_id(lecture_id, idx),
+                               vector=chunk_vector(embedding, payload["text"], with_sparse),
+                               payload={**payload, **(extra_payload or {})})
+            for idx, (embedding, payload) in enumerate(zip(embeddings, payloads))
+        ]
+
+    points = points_for(collection_name)
+
+    if existed:
+        # A re-embedded lecture may have fewer chunks than before (or older, differently keyed
+        # points): the collection only holds this lecture, so all of its points are replaced.
+        with track_dependency("qdrant", "delete"):
+            client.delete(collection_name=collection_name,
+                          points_selector=models.FilterSelector(filter=models.Filter()))
 
     # Upsert points
-    client.upsert(collection_name=collection_name, points=points)
-    logging.info(f"Stored transcript for lecture {lecture_id} in Qdrant collection {collection_name}.")
+    with track_dependency("qdrant", "upsert"):
+        client.upsert(collection_name=collection_name, points=points)
+    # Generated quizzes are cached under this hash (see MCQGenerator.quiz_cache_key).
+    set_content_hash(collection_name, content_hash([chunk["text"] for chunk in chunks]))
+
+    if course_id:
+        ensure_transcript_chunks_collection(client)
+        shared = Config.TRANSCRIPT_CHUNKS_COLLECTION
+        lecture_filter = models.Filter(must=[
+            models.FieldCondition(key="lecture_id", match=models.MatchValue(value=lecture_id))
+        ])
+        # A re-transcribed lecture may have fewer chunks than before.
+        with track_dependency("qdrant", "delete"):
+            client.delete(collection_name=shared, points_selector=models.FilterSelector(filter=lecture_filter))
+        with track_dependency("qdrant", "upsert"):
+            client.upsert(collection_name=shared, points=points_for(shared, {"course_id": course_id}))
+
+    CHUNKS_EMBEDDED.inc(len(points))
+    logger.info(f"Stored transcript for lecture {lecture_id} in Qdrant collection {collection_name}.")
+
+@functools.lru_cache(maxsize=Config.SEARCH_QUERY_CACHE_SIZE)
+def get_query_embedding(query: str) -> Tuple[float, ...]:
+    """Embedding of a search query, cached per process (repeated queries skip the model)."""
+    with track_dependency("sentence_transformers", "encode"):
+        return tuple(get_embedding_model().encode(query).tolist())
+
+def search_course_transcripts(course_id: str, query: str, limit: int = 10,
+                              lecture_id: str = None) -> List[Dict[str, Any]]:
+    """
+    Semantic search over the transcripts of all lectures of a course: one vector query on the
+    shared chunk collection, filtered on the indexed course_id (and lecture_id) payload.
+
+    :return: [{"lecture_id", "chunk_index", "text", "score", "start", "end"}] best first;
+             start/end are the chunk's time range in seconds when known. With hybrid
+             retrieval the score is the RRF score of the fused dense and bm25 rankings.
+    """
+    from qdrant_client import models
+    conditions = [models.FieldCondition(key="course_id", match=models.MatchValue(value=course_id))]
+    if lecture_id:
+        conditions.append(models.FieldCondition(key="lecture_id", match=models.MatchValue(value=lecture_id)))
+
+    with span("search.embed"):
+        query_vector = list(get_query_embedding(" ".join(query.split()).lower()))
+    with span("search.query"):
+        points = hybrid_query(
+            get_qdrant_client(),
+            Config.TRANSCRIPT_CHUNKS_COLLECTION,
+            query,
+            query_vector,
+            limit,
+            query_filter=models.Filter(must=conditions),
+            with_payload=["text", "lecture_id", "chunk_index", "start", "end"],
+        )
+    return [
+        {
+            "lecture_id": point.payload.get("lecture_id"),
+            "chunk_index": point.payload.get("chunk_index"),
+            "text": point.payload.get("text"),
+            "score": round(point.score, 4),
+            "start": point.payload.get("start"),
+            "end": point.payload.get("end"),
+        }
+        for point in points
+    ]
 
 def search_transcript_in_qdrant(lecture_id: str, query: str, top_k: int = 3):
     """Searches for relevant transcript chunks in Qdrant."""
     query_embedding = get_text_embedding(query)
+    client = get_qdrant_client()
     collection_name = f"lecture_{lecture_id}"
 
     existing = client.get_collections().collections
     if collection_name not in [col.name for col in existing]:
         return {"error": f"Collection {collection_name} not found"}
 
-    results = client.search(
-        collection_name=collection_name,
-        query_vector=query_embedding,
-        limit=top_k
-    )
+    with track_dependency("qdrant", "search"):
+        results = client.search(
+            collection_name=collection_name,
+            query_vector=query_embedding,
+            limit=top_k
+        )
     return [hit.payload["text"] for hit in results]
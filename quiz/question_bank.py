@@ -0,0 +1,115 @@
+# quiz/question_bank.py
+import uuid
+import logging
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Tuple
+
+import numpy as np
+
+from quiz.config import Config
+
+if TYPE_CHECKING:
+    from qdrant_client import QdrantClient
+
+logger = logging.getLogger(__name__)
+
+
+class QuestionBank:
+    """
+    Embeddings of every question generated for a course, stored in one Qdrant collection
+    (filtered by course_id), used to reject candidates that repeat earlier questions.
+    """
+
+    def __init__(self, qdrant_client: "QdrantClient", embedding_model=None, collection: str = None) -> None:
+        """
+        :param qdrant_client: Qdrant client to use.
+        :param embedding_model: Model with a SentenceTransformer-compatible encode(); not needed
+                                to add questions whose embeddings are already known.
+        :param collection: Collection name; defaults to Config.QUESTION_BANK_COLLECTION.
+        """
+        self.client = qdrant_client
+        self.embedding_model = embedding_model
+        self.collection = collection or Config.QUESTION_BANK_COLLECTION
+        self._ensure_collection()
+
+    def _ensure_collection(self) -> None:
+        from qdrant_client import models
+        existing = self.client.get_collections().collections
+        if self.collection in [col.name for col in existing]:
+            return
+        dimension = (self.embedding_model.get_sentence_embedding_dimension() if self.embedding_model
+                     else Config.EMBEDDING_DIMENSION)
+        self.client.create_collection(
+            collection_name=self.collection,
+            vectors_config=models.VectorParams(size=dimension, distance=models.Distance.COSINE),
+        )
+        # Every search is filtered by course.
+        self.client.create_payload_index(self.collection, "course_id", models.PayloadSchemaType.KEYWORD)
+
+    def embed(self, questions: List[Dict[str, Any]]) -> np.ndarray:
+        """Embeds question text + answer, normalised for cosine similarity."""
+        texts = [f"{q['question']} {q.get('answer', '')}" for q in questions]
+        return np.asarray(self.embedding_model.encode(texts, batch_size=64, normalize_embeddings=True))
+
+    def filter_fresh(self, course_id: str, questions: List[Dict[str, Any]],
+                     threshold: float = None) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """
+        Keeps the candidates whose cosine similarity to every question already in the course's
+        bank (and to the candidates kept before them) is at most threshold. Earlier quizzes of
+        the same lecture count too, so a regenerated quiz can't repeat the previous one.
+        The bank is queried with one batched query for all candidates.
+
+        :return: (fresh questions, their embeddings).
+        """
+        if not questions:
+            return [], np.empty((0, 0))
+        from qdrant_client import models
+        threshold = Config.QUESTION_BANK_THRESHOLD if threshold is None else threshold
+        embeddings = self.embed(questions)
+
+        course_filter = models.Filter(
+            must=[models.FieldCondition(key="course_id", match=models.MatchValue(value=course_id))]
+        )
+        results = self.client.query_batch_points(
+            collection_name=self.collection,
+            requests=[
+                models.QueryRequest(query=embedding.tolist(), filter=course_filter, limit=1,
+                                    score_threshold=threshold, with_payload=False)
+                for embedding in embeddings
+            ]
+        )
+
+        kept: List[int] = []
+        for i, response in enumerate(results):
+            if response.points:
+                continue
+            if kept and float((embeddings[kept] @ embeddings[i]).max()) > threshold:
+                continue
+            kept.append(i)
+        logger.info(f"Question bank for course {course_id}: kept {len(kept)} of {len(questions)} candidates")
+        return [questions[i] for i in kept], embeddings[kept]
+
+    def add(self, course_id: str, lecture_id: str, questions: List[Dict[str, Any]], embeddings: np.ndarray) -> None:
+        """
+        Stores the questions of a lecture's persisted quiz in the bank, next to its earlier ones
+        (ids derived from the text, so re-adding is idempotent).
+        """
+        if not questions:
+            return
+        from qdrant_client import models
+        created_at = datetime.now().isoformat()
+        points = [
+            models.PointStruct(
+                id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"{course_id}:{question['question']}")),
+                vector=embedding.tolist(),
+                payload={
+                    "course_id": course_id,
+                    "lecture_id": lecture_id,
+                    "question": question["question"],
+                    "answer": question.get("answer", ""),
+                    "created_at": created_at
+                }
+            )
+            for question, embedding in zip(questions, embeddings)
+        ]
+        self.client.upsert(collection_name=self.collection, points=points)
@@ -0,0 +1,64 @@
+# quiz/question_store.py
+import logging
+from typing import Any, Dict, Optional
+
+from recommendation.models import Assessment, AssessmentQuestion
+
+logger = logging.getLogger(__name__)
+
+# As written by the quiz parser (capitalized).
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+
+
+def fetch_questions(course_id: Optional[str] = None, lecture_id: Optional[str] = None,
+                    difficulty: Optional[str] = None, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+    """
+    Reads one page of questions from 'assessment_questions', in lecture / quiz order.
+    Only the requested rows are loaded; one extra row is fetched to know whether another page exists.
+
+    :param course_id: Only questions of this course.
+    :param lecture_id: Only questions of this lecture.
+    :param difficulty: Only questions of this difficulty (Easy / Medium / Hard).
+    :param limit: Page size.
+    :param offset: Number of questions to skip.
+    :return: {"questions": [...], "limit", "offset", "next_offset" (None on the last page)}
+    """
+    query = AssessmentQuestion.query
+    if course_id:
+        query = query.filter(AssessmentQuestion.course_id == course_id)
+    if lecture_id:
+        query = query.filter(AssessmentQuestion.lecture_id == lecture_id)
+    if difficulty:
+        query = query.filter(AssessmentQuestion.difficulty == difficulty)
+
+    rows = (
+        query.order_by(AssessmentQuestion.lecture_id, AssessmentQuestion.position)
+        .offset(offset)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(rows) > limit
+    return {
+        "questions": [row.to_dict() for row in rows[:limit]],
+        "limit": limit,
+        "offset": offset,
+        "next_offset": offset + limit if has_more else None,
+    }
+
+
+def fetch_assessment(lecture_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Loads the quiz of a lecture with its version (used to build the ETag).
+
+    :return: {"assessment_id", "course_id", "lecture_id", "version", "quiz"} or None if there is no quiz.
+    """
+    assessment = Assessment.query.filter_by(lecture_id=lecture_id).first()
+    if assessment is None:
+        return None
+    return {
+        "assessment_id": str(assessment.id),
+        "course_id": str(assessment.course_id) if assessment.course_id else None,
+        "lecture_id": str(assessment.lecture_id),
+        "version": assessment.version or 1,
+        "quiz": assessment.assessment_data,
+    }
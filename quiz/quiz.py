@@ -1,117 +1,236 @@
 # quiz/quiz.py
 import re
+import json
+import math
 import logging
 from datetime import datetime
-from typing import Any, Dict, List, Union
-from groq import Groq
-import qdrant_client
-from qdrant_client.models import PointStruct, Filter, FieldCondition, MatchValue
-from sentence_transformers import SentenceTransformer
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Union
+import numpy as np
+from quiz.config import Config
+from quiz.llm_cache import get_cached_completion, get_content_hash, make_cache_key, set_cached_completion
+from quiz.llm_gateway import get_gateway
+from quiz.qdrant_ops import dense_vector, get_embedding_model, get_qdrant_client, hybrid_query
+from observability.metrics import LLM_CACHE_HITS, track_dependency
+
+if TYPE_CHECKING:
+    from qdrant_client import QdrantClient
+
+# Retrieval query used to build a quiz covering a whole lecture.
+LECTURE_QUIZ_QUERY = "Generate a comprehensive quiz covering the lecture content."
+
+# Part of the cache key of generated quizzes: bump it when the prompts or the parsing change.
+QUIZ_PROMPT_VERSION = 1
+
+# Line patterns, compiled once. Labels are matched case-insensitively without lowercasing lines.
+_QUESTION_RE = re.compile(r'^question\s*\d*\s*:\s*(.*)$', re.IGNORECASE)
+_FIELD_INITIALS = frozenset("cCeEdD")
+_FIELD_RE = re.compile(r'^(correct\s+answer|explanation|difficulty)\s*:\s*(.*)$', re.IGNORECASE)
+_ANSWER_LETTER_RE = re.compile(r'\(([A-D])\)', re.IGNORECASE)
+_DIFFICULTY_RE = re.compile(r'(easy|medium|hard)', re.IGNORECASE)
+
+# Parser states while walking the lines of one question block.
+_AWAIT_QUESTION, _AWAIT_QUESTION_TEXT, _BODY = range(3)
 
 class QuizParser:
     """Parses raw quiz text into structured JSON format."""
-    
+
     def parse(self, quiz_text: str) -> List[Dict[str, Any]]:
+        """Parses a full completion whose questions are separated by '---' lines."""
         questions: List[Dict[str, Any]] = []
-        raw_questions = [q.strip() for q in quiz_text.split('---') if q.strip()]
-        
-        for q in raw_questions:
-            lines = [line.strip() for line in q.splitlines() if line.strip()]
-            if len(lines) < 3:
+        for block in quiz_text.split('---'):
+            question = self.parse_block(block)
+            if question:
+                questions.append(question)
+        return questions
+
+    def parse_block(self, block: str) -> Union[Dict[str, Any], None]:
+        """
+        Parses one question block in a single pass over its lines.
+
+        :param block: Text between two '---' delimiters.
+        :return: {"question", "options", "answer", "explanation", "difficulty"} or None if the block is not a question.
+        """
+        state = _AWAIT_QUESTION
+        question_text = ""
+        options: Dict[str, str] = {}
+        correct_letter = ""
+        explanation = ""
+        difficulty = ""
+        answer_seen = explanation_seen = difficulty_seen = False
+        line_count = 0
+
+        for raw_line in block.splitlines():
+            line = raw_line.strip()
+            if not line:
                 continue
-            
-            question_text = ""
-            options: Dict[str, str] = {}
-            correct_answer = ""
-            explanation = ""
-            
-            question_index = -1
-            for i, line in enumerate(lines):
-                if line.lower().startswith("question:"):
-                    question_index = i
-                    break
-                    
-            if question_index != -1:
-                question_text = re.sub(r'(?i)^question\s*\d*\s*:\s*', '', lines[question_index]).strip()
-                if not question_text and question_index + 1 < len(lines):
-                    question_text = lines[question_index + 1]
-            else:
+            line_count += 1
+
+            if state == _AWAIT_QUESTION_TEXT:
+                question_text = line
+                state = _BODY
                 continue
-            
-            seen_options = set()
-            for i, line in enumerate(lines):
-                if i > question_index and line.startswith("(") and ")" in line:
-                    option_letter = line[1:line.index(")")].strip().upper()
-                    option_text = line[line.index(")") + 1:].strip()
-                    if option_letter in seen_options:
-                        continue
-                    seen_options.add(option_letter)
-                    options[option_letter] = option_text
-            
-            correct_letter = ""
-            for line in lines:
-                if line.lower().startswith("correct answer:"):
-                    answer_match = re.search(r'\(([A-D])\)', line, re.IGNORECASE)
-                    if answer_match:
-                        correct_letter = answer_match.group(1).upper()
-                        correct_answer = f"({correct_letter})"
-                    break
-                    
-            for line in lines:
-                if line.lower().startswith("explanation:"):
-                    explanation = line.replace("Explanation:", "").strip()
-                    break
-            
-            for letter in "ABCD":
-                if letter not in options:
-                    options[letter] = ""
-            
-            if question_text:
-                # Generate the internal data structure as before
-                question_dict_internal = {
-                    "question": question_text,
-                    "options": options,
-                    "correct_answer": correct_answer,
-                    "explanation": explanation
-                }
-                
-                # But now transform to the desired output format
-                options_list = []
-                for letter in "ABCD":
-                    if letter in options and options[letter]:
-                        options_list.append(options[letter])
-                
-                answer_text = ""
-                if correct_letter and correct_letter in options:
-                    answer_text = options[correct_letter]
-                
-                question_dict = {
-                    "question": question_text,
-                    "options": options_list,
-                    "answer": answer_text
-                }
-                
-                questions.append(question_dict)
-                
+
+            # Dispatch on the first character so each line is matched against at most one pattern.
+            first = line[0]
+            if first == '(':
+                if state == _BODY:
+                    close = line.find(')')
+                    if close != -1:
+                        # The first option with a given letter wins.
+                        options.setdefault(line[1:close].strip().upper(), line[close + 1:].strip())
+            elif first in _FIELD_INITIALS:
+                field = _FIELD_RE.match(line)
+                if field:
+                    label = field.group(1)[0].lower()
+                    value = field.group(2).strip()
+                    # Only the first occurrence of each field counts.
+                    if label == 'c' and not answer_seen:
+                        answer_seen = True
+                        answer_match = _ANSWER_LETTER_RE.search(value)
+                        if answer_match:
+                            correct_letter = answer_match.group(1).upper()
+                    elif label == 'e' and not explanation_seen:
+                        explanation_seen = True
+                        explanation = value
+                    elif label == 'd' and not difficulty_seen:
+                        difficulty_seen = True
+                        difficulty_match = _DIFFICULTY_RE.search(value)
+                        difficulty = difficulty_match.group(1).capitalize() if difficulty_match else value
+            elif state == _AWAIT_QUESTION and (first == 'q' or first == 'Q'):
+                question = _QUESTION_RE.match(line)
+                if question:
+                    question_text = question.group(1).strip()
+                    state = _BODY if question_text else _AWAIT_QUESTION_TEXT
+
+        if line_count < 3 or not question_text:
+            return None
+
+        return {
+            "question": question_text,
+            "options": [options[letter] for letter in "ABCD" if options.get(letter)],
+            "answer": options.get(correct_letter, ""),
+            "explanation": explanation,
+            "difficulty": difficulty
+        }
+
+    def parse_json(self, quiz_json: str) -> List[Dict[str, Any]]:
+        """
+        Converts a structured-output (JSON mode) completion into the same format as parse().
+
+        :param quiz_json: JSON object of the form {"questions": [{"question", "options": {"A": ...},
+                          "correct_answer": "A", "explanation", "difficulty"}]}.
+        """
+        data = json.loads(quiz_json)
+        items = data.get("questions", []) if isinstance(data, dict) else data
+        questions: List[Dict[str, Any]] = []
+        for item in items:
+            question_text = str(item.get("question", "")).strip()
+            raw_options = item.get("options") or {}
+            if isinstance(raw_options, list):
+                raw_options = dict(zip("ABCD", raw_options))
+            options = {str(letter).strip("() ").upper(): str(text).strip() for letter, text in raw_options.items()}
+            if not question_text or not options:
+                continue
+            correct_letter = str(item.get("correct_answer", "")).strip("() ").upper()[:1]
+            difficulty_match = _DIFFICULTY_RE.search(str(item.get("difficulty", "")))
+            questions.append({
+                "question": question_text,
+                "options": [options[letter] for letter in "ABCD" if options.get(letter)],
+                "answer": options.get(correct_letter, ""),
+                "explanation": str(item.get("explanation", "")).strip(),
+                "difficulty": difficulty_match.group(1).capitalize() if difficulty_match else ""
+            })
         return questions
 
+class IncrementalQuizParser:
+    """
+    Parses a quiz while it is being streamed: each question is emitted as soon as the
+    '---' delimiter that closes it arrives. The unfinished tail is kept in a buffer.
+    """
+
+    def __init__(self, parser: QuizParser = None) -> None:
+        self.parser = parser or QuizParser()
+        self._buffer = ""
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """Adds streamed text and returns the questions completed by it."""
+        self._buffer += text
+        blocks = self._buffer.split('---')
+        # The last block is still open (it may even end with part of a delimiter).
+        self._buffer = blocks.pop()
+        questions: List[Dict[str, Any]] = []
+        for block in blocks:
+            questions.extend(self.parser.parse(block))
+        return questions
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Parses whatever is left once the stream has ended."""
+        remaining, self._buffer = self._buffer, ""
+        return self.parser.parse(remaining)
+
+
 class MCQGenerator:
     def __init__(self, api_key: str, qdrant_url: str, qdrant_collection: str, logger: logging.Logger = None) -> None:
         """
         Initializes the MCQGenerator for lecture-wise quiz generation.
 
-        :param api_key: The API key for Groq.
+        :param api_key: The API key for Groq (calls go through the shared, rate-limited LLM gateway).
         :param qdrant_url: URL for the Qdrant service.
         :param qdrant_collection: Name of the Qdrant collection (e.g., "lecture_<lecture_id>").
         :param logger: Optional logger instance.
         """
         self.logger = logger or logging.getLogger(__name__)
-        self.groq_client = Groq(api_key=api_key)
-        self.qdrant_client = qdrant_client.QdrantClient(qdrant_url)
+        self.llm = get_gateway(api_key)
+        self.qdrant_url = qdrant_url
         self.qdrant_collection = qdrant_collection
-        self.embedding_model = SentenceTransformer("all-mpnet-base-v2")
         self.quiz_parser = QuizParser()
-    
+
+    # Loaded on first use: a quiz served from the cache needs neither.
+    @property
+    def qdrant_client(self) -> "QdrantClient":
+        return get_qdrant_client(self.qdrant_url)
+
+    @property
+    def embedding_model(self):
+        return get_embedding_model()
+
+    def quiz_cache_key(self, query: str, num_questions: int, retrieval: str, structured: bool) -> Optional[str]:
+        """
+        Cache key of a generated quiz, built only from inputs known before any retrieval: the
+        lecture collection and the hash of its indexed content, the generation settings, the
+        model and QUIZ_PROMPT_VERSION. None if the content hash of the lecture is unknown.
+        """
+        if not Config.LLM_CACHE_ENABLED:
+            return None
+        lecture_hash = get_content_hash(self.qdrant_collection)
+        if not lecture_hash:
+            return None
+        params = {
+            "collection": self.qdrant_collection,
+            "num_questions": num_questions,
+            "retrieval": retrieval,
+            "structured": structured,
+            "context_tokens": Config.QUIZ_CONTEXT_TOKENS,
+            "prompt_version": QUIZ_PROMPT_VERSION,
+            "query": query if retrieval == "query" else None,
+        }
+        return make_cache_key(Config.GROQ_MODEL, f"quiz:{lecture_hash}", params)
+
+    def cached_quiz(self, cache_key: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        """The quiz cached under cache_key, or None."""
+        if not cache_key:
+            return None
+        cached = get_cached_completion(cache_key)
+        if cached is None:
+            return None
+        LLM_CACHE_HITS.inc()
+        self.logger.info(f"Serving the quiz of {self.qdrant_collection} from the cache")
+        return json.loads(cached)
+
+    def cache_quiz(self, cache_key: Optional[str], quiz: List[Dict[str, Any]]) -> None:
+        if cache_key and quiz:
+            set_cached_completion(cache_key, json.dumps(quiz))
+
     def search_transcript_in_qdrant(self, query: str, top_k: int = 3) -> str:
         """
         Searches Qdrant for transcript chunks matching the query.
@@ -121,15 +240,110 @@ class MCQGenerator:
         :return: Combined transcript content as a single string.
         """
         query_embedding = self.embedding_model.encode(query).tolist()
-        search_results = self.qdrant_client.search(
-            collection_name=self.qdrant_collection,
-            query_vector=query_embedding,
-            limit=top_k
-        )
-        
+        # Dense + bm25 fused with RRF, so exact technical terms of the query are found too.
+        search_results = hybrid_query(self.qdrant_client, self.qdrant_collection, query, query_embedding, top_k)
+
         retrieved_texts = [hit.payload["text"] for hit in search_results]
         return " ".join(retrieved_texts)
     
+    def fetch_lecture_chunks(self) -> List[Dict[str, Any]]:
+        """
+        Scrolls every chunk of the lecture collection together with its stored vector.
+
+        :return: Chunks in lecture order as {"text", "vector", "order"} dicts.
+        """
+        chunks: List[Dict[str, Any]] = []
+        offset = None
+        while True:
+            with track_dependency("qdrant", "scroll"):
+                points, offset = self.qdrant_client.scroll(
+                    collection_name=self.qdrant_collection,
+                    limit=256,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=True
+                )
+            for point in points:
+                # Older points have no chunk_index; their ids end in the chunk index.
+                order = point.payload.get("chunk_index", point.id)
+                chunks.append({"text": point.payload["text"], "vector": dense_vector(point), "order": order})
+            if offset is None:
+                break
+        chunks.sort(key=lambda chunk: chunk["order"])
+        return chunks
+
+    @staticmethod
+    def select_representative_chunks(vectors: np.ndarray, lengths: List[int], token_budget: int,
+                                     diversity: float = 0.5) -> List[int]:
+        """
+        Picks a diverse, representative subset of chunks with maximal marginal relevance (MMR).
+        Relevance is the similarity to the lecture centroid; the penalty is the similarity to
+        the closest chunk already selected. Chunks are added until the token budget is spent.
+
+        :param vectors: (n_chunks, dim) chunk embeddings.
+        :param lengths: Estimated token count of each chunk.
+        :param token_budget: Maximum total tokens of the selected chunks.
+        :param diversity: 0 = only representativeness, 1 = only diversity.
+        :return: Indices of the selected chunks, in lecture order.
+        """
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        centroid = vectors.mean(axis=0)
+        relevance = vectors @ (centroid / max(np.linalg.norm(centroid), 1e-12))
+        lengths = np.asarray(lengths)
+
+        selected: List[int] = []
+        available = np.ones(len(vectors), dtype=bool)
+        max_similarity = np.zeros(len(vectors))
+        remaining = token_budget
+        while True:
+            available &= lengths <= remaining
+            if not available.any():
+                break
+            scores = (1 - diversity) * relevance - diversity * max_similarity
+            scores[~available] = -np.inf
+            best = int(np.argmax(scores))
+            selected.append(best)
+            available[best] = False
+            remaining -= lengths[best]
+            max_similarity = np.maximum(max_similarity, vectors @ vectors[best])
+        return sorted(selected)
+
+    def coverage_transcript_content(self, token_budget: int = None) -> str:
+        """
+        Retrieves a diverse, representative set of chunks spanning the whole lecture, within a
+        token budget, so a single prompt covers the lecture instead of the top_k closest chunks.
+
+        :param token_budget: Token budget for the lecture content; defaults to Config.QUIZ_CONTEXT_TOKENS.
+        :return: Selected transcript content in lecture order.
+        """
+        token_budget = token_budget or Config.QUIZ_CONTEXT_TOKENS
+        chunks = self.fetch_lecture_chunks()
+        if not chunks:
+            return ""
+        # ~4 characters per token, as for the gateway's rate-limit estimate.
+        lengths = [max(1, len(chunk["text"]) // 4) for chunk in chunks]
+        if sum(lengths) <= token_budget:
+            selected = range(len(chunks))
+        else:
+            vectors = np.asarray([chunk["vector"] for chunk in chunks], dtype=np.float32)
+            selected = self.select_representative_chunks(vectors, lengths, token_budget, Config.QUIZ_MMR_DIVERSITY)
+        self.logger.info(f"Selected {len(selected)} of {len(chunks)} chunks for coverage retrieval")
+        return " ".join(chunks[i]["text"] for i in selected)
+
+    def retrieve_content(self, query: str, retrieval: str = None) -> str:
+        """
+        Retrieves the lecture content used in the prompt.
+
+        :param query: Query text (used by the "query" mode only).
+        :param retrieval: "query" for the top_k chunks closest to the query, "coverage" for a
+                          representative selection of the whole lecture. Defaults to Config.QUIZ_RETRIEVAL_MODE.
+        """
+        retrieval = retrieval or Config.QUIZ_RETRIEVAL_MODE
+        # Map-reduce cannot be used for a single prompt (e.g. streaming): fall back to coverage.
+        if retrieval in ("coverage", "map_reduce"):
+            return self.coverage_transcript_content()
+        return self.search_transcript_in_qdrant(query, top_k=Config.QUIZ_QUERY_TOP_K)
+
     def build_prompt(self, content: str, num_questions: int = 5) -> str:
         """
         Builds a prompt for Groq to generate lecture MCQs based on the lecture transcript content.
@@ -165,37 +379,90 @@ Difficulty: [Easy/Medium/Hard]
 Separate each question with a line containing exactly '---'
         """
     
-    def generate_mcqs(self, query: str, num_questions: int = 5) -> Dict[str, Union[str, List[Dict[str, Any]]]]:
+    def build_json_prompt(self, content: str, num_questions: int = 5) -> str:
+        """
+        Builds a prompt asking for the quiz as a JSON object (structured-output / JSON mode),
+        so the completion can be loaded directly instead of being parsed as text.
+
+        :param content: Aggregated transcript content from the lecture.
+        :param num_questions: The exact number of questions to generate.
+        :return: The prompt string.
+        """
+        self.logger.info("Building JSON-mode MCQ prompt for lecture content")
+        return f"""
+Generate {num_questions} multiple-choice questions (MCQs) strictly based on the following lecture content. Each question should be directly answerable solely from the information provided and should not incorporate any external or inferred details.
+
+Lecture Content:
+{content}
+
+Ensure each question:
+- Is derived exclusively from the provided lecture transcript.
+- Covers different aspects of the lecture.
+- Varies in difficulty (Easy, Medium, Hard).
+- Tests factual recall or understanding of details present in the content.
+
+Respond with a single JSON object and nothing else, in this exact shape:
+{{"questions": [{{"question": "...", "options": {{"A": "...", "B": "...", "C": "...", "D": "..."}}, "correct_answer": "A", "explanation": "...", "difficulty": "Easy"}}]}}
+        """
+
+    def generate_mcqs(self, query: str, num_questions: int = 5, use_cache: bool = True, structured: bool = None,
+                      retrieval: str = None) -> Dict[str, Union[str, List[Dict[str, Any]]]]:
         """
         Generates lecture MCQs by:
-         1) Retrieving relevant transcript content from Qdrant for the lecture.
+         1) Retrieving relevant (or, in coverage mode, representative) transcript content from Qdrant.
          2) Building a prompt with that content.
-         3) Calling Groq via groq_client.chat() to generate quiz text.
-         4) Parsing the generated text into structured JSON.
+         3) Calling Groq through the LLM gateway (rate-limited, with retries) to generate quiz text.
+         4) Parsing the generated text into structured JSON (or loading it directly in JSON mode).
          5) Returning quiz metadata and questions.
 
         :param query: The query/topic to retrieve relevant transcript content (e.g., lecture focus area).
         :param num_questions: The exact number of MCQs to generate.
+        :param use_cache: If False, bypasses the LLM response cache and asks Groq again.
+        :param structured: Use the JSON-mode path; defaults to Config.QUIZ_STRUCTURED_OUTPUT.
+        :param retrieval: "query" or "coverage" (see retrieve_content), or "map_reduce" (see generate_mcqs_map_reduce).
         :return: A dictionary with status and quiz JSON on success.
         """
-        relevant_content = self.search_transcript_in_qdrant(query)
+        if structured is None:
+            structured = Config.QUIZ_STRUCTURED_OUTPUT
+        retrieval = retrieval or Config.QUIZ_RETRIEVAL_MODE
+        # Looked up before any retrieval: a cached quiz costs one Redis read.
+        cache_key = self.quiz_cache_key(query, num_questions, retrieval, structured)
+        quiz = self.cached_quiz(cache_key) if use_cache else None
+        if quiz is not None:
+            metadata = {"generated_at": datetime.now().isoformat(), "num_questions": num_questions, "cached": True}
+            return {"status": "success", "quiz": quiz, "metadata": metadata}
+
+        if retrieval == "map_reduce":
+            result = self.generate_mcqs_map_reduce(num_questions, use_cache, structured)
+        else:
+            result = self._generate_mcqs(query, num_questions, use_cache, structured, retrieval)
+        if result.get("status") == "success":
+            self.cache_quiz(cache_key, result["quiz"])
+        return result
+
+    def _generate_mcqs(self, query: str, num_questions: int, use_cache: bool, structured: bool,
+                       retrieval: str) -> Dict[str, Union[str, List[Dict[str, Any]]]]:
+        """Single-prompt generation (query or coverage retrieval), see generate_mcqs."""
+        relevant_content = self.retrieve_content(query, retrieval)
         if not relevant_content.strip():
             self.logger.error("No relevant transcript content found for quiz generation.")
             return {"status": "error", "message": "No relevant transcript content found for quiz generation."}
         
-        prompt = self.build_prompt(relevant_content, num_questions)
         try:
-            # Generate quiz using groq_client.chat() directly.
-            response = self.groq_client.chat.completions.create(
-                model="mixtral-8x7b-32768",
-                messages=[{"role": "user", "content": prompt}]
-            )
-            if not response or not response.choices:
+            if structured:
+                prompt = self.build_json_prompt(relevant_content, num_questions)
+                quiz_text = self.llm.complete(prompt, use_cache=use_cache, response_format={"type": "json_object"})
+            else:
+                prompt = self.build_prompt(relevant_content, num_questions)
+                quiz_text = self.llm.complete(prompt, use_cache=use_cache)
+            if not quiz_text:
                 self.logger.error("Failed to generate MCQs.")
                 return {"status": "error", "message": "Failed to generate MCQs."}
             
-            quiz_text = response.choices[0].message.content
-            quiz_structured = self.quiz_parser.parse(quiz_text)
+            if structured:
+                quiz_structured = self.quiz_parser.parse_json(quiz_text)
+            else:
+                quiz_structured = self.quiz_parser.parse(quiz_text)
             metadata = {
                 "generated_at": datetime.now().isoformat(),
                 "num_questions": num_questions
@@ -203,4 +470,164 @@ Separate each question with a line containing exactly '---'
             return {"status": "success", "quiz": quiz_structured, "metadata": metadata}
         except Exception as e:
             self.logger.error(f"Quiz generation failed: {str(e)}")
-            return {"status": "error", "message": f"Quiz generation failed: {str(e)}"}
\ No newline at end of file
+            return {"status": "error", "message": f"Quiz generation failed: {str(e)}"}
+
+    def split_into_sections(self, chunks: List[Dict[str, Any]], section_tokens: int) -> List[str]:
+        """
+        Groups consecutive chunks into sections of at most section_tokens (~4 characters per token).
+
+        :param chunks: Chunks in lecture order.
+        :return: Section texts in lecture order.
+        """
+        sections: List[str] = []
+        current: List[str] = []
+        current_tokens = 0
+        for chunk in chunks:
+            tokens = max(1, len(chunk["text"]) // 4)
+            if current and current_tokens + tokens > section_tokens:
+                sections.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(chunk["text"])
+            current_tokens += tokens
+        if current:
+            sections.append(" ".join(current))
+        return sections
+
+    def deduplicate_questions(self, questions: List[Dict[str, Any]], threshold: float) -> List[Dict[str, Any]]:
+        """
+        Drops questions whose embedding (question + answer) has a cosine similarity above
+        threshold with a question kept earlier.
+        """
+        if not questions:
+            return []
+        texts = [f"{q['question']} {q.get('answer', '')}" for q in questions]
+        embeddings = np.asarray(self.embedding_model.encode(texts, batch_size=64, normalize_embeddings=True))
+        similarity = embeddings @ embeddings.T
+        kept: List[int] = []
+        for i in range(len(questions)):
+            if not kept or similarity[i, kept].max() <= threshold:
+                kept.append(i)
+        return [questions[i] for i in kept]
+
+    @staticmethod
+    def select_balanced(questions: List[Dict[str, Any]], num_questions: int) -> List[Dict[str, Any]]:
+        """
+        Selects num_questions round-robin across sections; within a section the question whose
+        difficulty is least represented so far is taken first.
+
+        :param questions: Candidates with a "section" key.
+        """
+        by_section: Dict[int, List[Dict[str, Any]]] = {}
+        for question in questions:
+            by_section.setdefault(question["section"], []).append(question)
+
+        selected: List[Dict[str, Any]] = []
+        difficulty_counts: Dict[str, int] = {}
+        while len(selected) < num_questions and any(by_section.values()):
+            for section in sorted(by_section):
+                candidates = by_section[section]
+                if not candidates or len(selected) >= num_questions:
+                    continue
+                best = min(candidates, key=lambda q: difficulty_counts.get(q.get("difficulty", ""), 0))
+                candidates.remove(best)
+                difficulty_counts[best.get("difficulty", "")] = difficulty_counts.get(best.get("difficulty", ""), 0) + 1
+                selected.append(best)
+        return selected
+
+    def generate_mcqs_map_reduce(self, num_questions: int = 5, use_cache: bool = True,
+                                 structured: bool = False) -> Dict[str, Union[str, List[Dict[str, Any]]]]:
+        """
+        Generates MCQs for a lecture too long for one prompt:
+         1) Map: splits the whole transcript into sections and asks for candidate questions
+            for every section concurrently (through the rate-limited LLM gateway).
+         2) Reduce: removes near-duplicate candidates by embedding similarity and selects
+            num_questions balanced across sections and difficulty.
+
+        :param num_questions: The exact number of MCQs to return.
+        :param use_cache: If False, bypasses the LLM response cache and asks Groq again.
+        :param structured: Use JSON-mode prompts for the sections.
+        :return: A dictionary with status and quiz JSON on success.
+        """
+        chunks = self.fetch_lecture_chunks()
+        if not chunks:
+            self.logger.error("No transcript content found for quiz generation.")
+            return {"status": "error", "message": "No transcript content found for quiz generation."}
+
+        sections = self.split_into_sections(chunks, Config.QUIZ_CONTEXT_TOKENS)
+        # Over-generate so the reduce step has room to drop duplicates and balance difficulty.
+        per_section = max(2, math.ceil(num_questions * Config.QUIZ_MAP_OVERGENERATION / len(sections)))
+        if structured:
+            prompts = [self.build_json_prompt(section, per_section) for section in sections]
+            completions = self.llm.complete_many(prompts, use_cache=use_cache, response_format={"type": "json_object"})
+        else:
+            prompts = [self.build_prompt(section, per_section) for section in sections]
+            completions = self.llm.complete_many(prompts, use_cache=use_cache)
+
+        candidates: List[Dict[str, Any]] = []
+        for section_index, completion in enumerate(completions):
+            if isinstance(completion, Exception) or not completion:
+                self.logger.error(f"Question generation failed for section {section_index}: {completion}")
+                continue
+            try:
+                parsed = self.quiz_parser.parse_json(completion) if structured else self.quiz_parser.parse(completion)
+            except ValueError as e:
+                self.logger.error(f"Could not parse questions for section {section_index}: {e}")
+                continue
+            for question in parsed:
+                question["section"] = section_index
+                candidates.append(question)
+
+        if not candidates:
+            return {"status": "error", "message": "Quiz generation failed for every section."}
+
+        unique = self.deduplicate_questions(candidates, Config.QUIZ_DEDUP_THRESHOLD)
+        quiz_structured = self.select_balanced(unique, num_questions)
+        for question in quiz_structured:
+            question.pop("section", None)
+        self.logger.info(
+            f"Map-reduce quiz: {len(sections)} sections, {len(candidates)} candidates, "
+            f"{len(unique)} unique, {len(quiz_structured)} selected"
+        )
+        metadata = {
+            "generated_at": datetime.now().isoformat(),
+            "num_questions": num_questions,
+            "strategy": "map_reduce",
+            "sections": len(sections)
+        }
+        return {"status": "success", "quiz": quiz_structured, "metadata": metadata}
+
+    def stream_mcqs(self, query: str, num_questions: int = 5, use_cache: bool = True,
+                    retrieval: str = None) -> Iterator[Dict[str, Any]]:
+        """
+        Same as generate_mcqs, but streams the completion and yields each question as soon
+        as it is complete instead of waiting for the whole response.
+
+        :param query: The query/topic to retrieve relevant transcript content.
+        :param num_questions: The exact number of MCQs to generate.
+        :param use_cache: If False, bypasses the LLM response cache and asks Groq again.
+        :param retrieval: "query" or "coverage" (see retrieve_content).
+        :raises ValueError: If no transcript content is found for the lecture.
+        """
+        retrieval = retrieval or Config.QUIZ_RETRIEVAL_MODE
+        # Map-reduce cannot be streamed: coverage is used instead (see retrieve_content).
+        cache_key = self.quiz_cache_key(query, num_questions, "coverage" if retrieval == "map_reduce" else retrieval, False)
+        quiz = self.cached_quiz(cache_key) if use_cache else None
+        if quiz is not None:
+            yield from quiz
+            return
+
+        relevant_content = self.retrieve_content(query, retrieval)
+        if not relevant_content.strip():
+            raise ValueError("No relevant transcript content found for quiz generation.")
+
+        prompt = self.build_prompt(relevant_content, num_questions)
+        incremental_parser = IncrementalQuizParser(self.quiz_parser)
+        quiz = []
+        for delta in self.llm.stream(prompt, use_cache=use_cache):
+            for question in incremental_parser.feed(delta):
+                quiz.append(question)
+                yield question
+        for question in incremental_parser.close():
+            quiz.append(question)
+            yield question
+        self.cache_quiz(cache_key, quiz)
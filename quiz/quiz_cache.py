@@ -0,0 +1,131 @@
+# quiz/quiz_cache.py
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from quiz.config import Config
+from quiz.redis_ops import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Current assessment version of a lecture, and the serialised quiz for a given version.
+QUIZ_VERSION_KEY = "quiz:quiz_version:{}"
+QUIZ_BODY_KEY = "quiz:quiz_body:{}:{}"
+
+# Versions only move forward: a reader that loaded a row just before an upsert
+# committed can't overwrite the newer version published by the writer.
+_SET_IF_NEWER_SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if tonumber(ARGV[1]) >= current then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# (etag, JSON body) of a quiz version.
+CachedQuiz = Tuple[str, str]
+
+
+class _LRUCache:
+    """Small thread-safe LRU for the serialised quizzes of this process."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._items: "OrderedDict[Any, CachedQuiz]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[CachedQuiz]:
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Any, value: CachedQuiz) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+
+_local = _LRUCache(Config.QUIZ_CACHE_LRU_SIZE)
+
+
+def make_etag(assessment_id: str, version: int) -> str:
+    """Unquoted strong ETag of an assessment version."""
+    return f"{assessment_id}.{version}"
+
+
+def current_version(lecture_id: str) -> Optional[int]:
+    """Version of the lecture's quiz known to Redis, or None (unknown, or Redis unavailable)."""
+    try:
+        version = get_redis().get(QUIZ_VERSION_KEY.format(lecture_id))
+    except Exception as e:
+        logger.warning(f"Quiz cache lookup failed: {e}")
+        return None
+    return int(version) if version is not None else None
+
+
+def _set_version(pipe, lecture_id: str, version: int) -> None:
+    pipe.eval(_SET_IF_NEWER_SCRIPT, 1, QUIZ_VERSION_KEY.format(lecture_id), version, Config.QUIZ_CACHE_TTL)
+
+
+def get_quiz(lecture_id: str, load: Callable[[str], Optional[Dict[str, Any]]]) -> Optional[CachedQuiz]:
+    """
+    Returns (etag, JSON body) of the lecture's quiz: from this process's LRU, then Redis,
+    and only if both miss from `load` (PostgreSQL), whose result is written back to both.
+
+    :param lecture_id: UUID of the lecture.
+    :param load: Returns {"assessment_id", "course_id", "lecture_id", "version", "quiz"} or None.
+    :return: None if the lecture has no quiz.
+    """
+    version = current_version(lecture_id)
+    if version is not None:
+        cached = _local.get((lecture_id, version))
+        if cached is not None:
+            return cached
+        try:
+            stored = get_redis().get(QUIZ_BODY_KEY.format(lecture_id, version))
+        except Exception as e:
+            logger.warning(f"Quiz cache lookup failed: {e}")
+            stored = None
+        if stored is not None:
+            etag, body = stored.split("\n", 1)
+            _local.put((lecture_id, version), (etag, body))
+            return etag, body
+
+    record = load(lecture_id)
+    if record is None:
+        return None
+    etag = make_etag(record["assessment_id"], record["version"])
+    body = json.dumps(record, separators=(",", ":"))
+    _local.put((lecture_id, record["version"]), (etag, body))
+    try:
+        pipe = get_redis().pipeline()
+        pipe.set(QUIZ_BODY_KEY.format(lecture_id, record["version"]), f"{etag}\n{body}", ex=Config.QUIZ_CACHE_TTL)
+        _set_version(pipe, lecture_id, record["version"])
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Quiz cache write failed: {e}")
+    return etag, body
+
+
+def publish_versions(versions: Dict[str, int]) -> None:
+    """
+    Invalidates cached quizzes after an upsert has committed: readers in every process see
+    the new version number and miss their cached copies of the old one.
+
+    :param versions: {lecture_id: new assessment version}
+    """
+    try:
+        pipe = get_redis().pipeline()
+        for lecture_id, version in versions.items():
+            _set_version(pipe, lecture_id, version)
+        pipe.execute()
+    except Exception as e:
+        # Stale entries then expire after QUIZ_CACHE_TTL.
+        logger.error(f"Quiz cache invalidation failed for {len(versions)} lectures: {e}")
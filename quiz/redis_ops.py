@@ -0,0 +1,72 @@
+# quiz/redis_ops.py
+import time
+import logging
+from typing import Optional
+
+import redis
+
+from quiz.config import Config
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[redis.Redis] = None
+
+
+def get_redis() -> redis.Redis:
+    """Returns the process-wide Redis client (connections are pooled by redis-py)."""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(Config.REDIS_URL, decode_responses=True)
+    return _client
+
+
+# Members are leases with a timestamp score, so a worker that dies while holding a slot
+# only blocks it until the lease expires.
+_ACQUIRE_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local ttl = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local member = ARGV[4]
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - ttl)
+if redis.call('ZSCORE', key, member) then
+    return 1
+end
+if redis.call('ZCARD', key) < limit then
+    redis.call('ZADD', key, now, member)
+    redis.call('EXPIRE', key, ttl)
+    return 1
+end
+return 0
+"""
+
+
+class Semaphore:
+    """A counting semaphore shared by all workers, stored in a Redis sorted set."""
+
+    def __init__(self, name: str, limit: int, ttl: int) -> None:
+        """
+        :param name: Redis key of the semaphore.
+        :param limit: Maximum number of concurrent holders.
+        :param ttl: Seconds after which an unreleased lease expires.
+        """
+        self.name = name
+        self.limit = limit
+        self.ttl = ttl
+        self._acquire = get_redis().register_script(_ACQUIRE_SCRIPT)
+
+    def acquire(self, holder: str) -> bool:
+        """Takes a slot for holder. Returns False when all slots are taken."""
+        acquired = self._acquire(keys=[self.name], args=[time.time(), self.ttl, self.limit, holder])
+        return bool(acquired)
+
+    def renew(self, holder: str) -> bool:
+        """Extends holder's lease by ttl seconds. Returns False if the lease had already expired."""
+        redis_client = get_redis()
+        renewed = redis_client.zadd(self.name, {holder: time.time()}, xx=True, ch=True)
+        redis_client.expire(self.name, self.ttl)
+        return bool(renewed)
+
+    def release(self, holder: str) -> None:
+        """Frees the slot held by holder (no-op if it already expired)."""
+        get_redis().zrem(self.name, holder)
@@ -272,9 +272,20 @@
 
 
 import uuid
-from flask import Blueprint, jsonify, request
+import json
+import logging
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from flasgger import swag_from
-from quiz.task import generate_quiz_task  # Import the background task
+from quiz.config import Config
+from quiz.jobs import get_job
+from quiz.quiz import MCQGenerator, LECTURE_QUIZ_QUERY
+from quiz.qdrant_ops import search_course_transcripts
+from quiz.question_store import DIFFICULTIES, fetch_assessment, fetch_questions
+from quiz import quiz_cache
+from quiz.sql_ops import SqlOps
+from quiz.dispatch import submit_lecture_job, submit_course_job  # Enqueue the background pipelines by task name
+
+logger = logging.getLogger(__name__)
 
 quiz_blueprint = Blueprint('quiz', __name__)
 
@@ -291,7 +302,11 @@ quiz_blueprint = Blueprint('quiz', __name__)
                 'properties': {
                     'course_id': {'type': 'string', 'format': 'uuid'},
                     'lecture_id': {'type': 'string', 'format': 'uuid'},
-                    'video_path': {'type': 'string'}
+                    'video_path': {'type': 'string'},
+                    'use_cache': {
+                        'type': 'boolean',
+                        'description': 'Set to false to regenerate with Groq instead of reusing a cached completion'
+                    }
                 },
                 'required': ['course_id', 'lecture_id', 'video_path']
             }
@@ -299,11 +314,13 @@ quiz_blueprint = Blueprint('quiz', __name__)
     ],
     'responses': {
         200: {
-            'description': 'Quiz generation job created successfully',
+            'description': 'Quiz generation job created successfully (or the job already in flight for the lecture)',
             'examples': {
                 'application/json': {
                     'status': 'success',
-                    'message': 'Quiz generation job created successfully'
+                    'message': 'Quiz generation job created successfully',
+                    'job_id': 'uuid-string',
+                    'deduplicated': False
                 }
             }
         },
@@ -324,20 +341,437 @@ def generate_quiz_for_lecture():
     4) Generating MCQs for the lecture using Groq + Qdrant retrieval.
     5) Storing the quiz JSON in PostgreSQL.
 
-    Returns HTTP 200 immediately upon successful job creation.
+    Returns HTTP 200 immediately upon successful job creation, with the job_id to poll
+    at /quiz/jobs/<job_id>. If a job for the same lecture is still in flight, that job
+    is returned instead of starting a new one.
     """
     data = request.get_json()
     course_id = data.get("course_id")
     lecture_id = data.get("lecture_id")
     video_path = data.get("video_path")
+    use_cache = data.get("use_cache", True) is not False
 
     if not course_id or not lecture_id or not video_path:
         return jsonify({"status": "error", "message": "Missing required fields"}), 400
 
-    # Enqueue the background job.
-    generate_quiz_task.delay(course_id, lecture_id, video_path)
+    # Enqueue the background pipeline (one task per stage, each on its own queue).
+    job_id, deduplicated = submit_lecture_job(course_id, lecture_id, video_path, use_cache)
+
+    if deduplicated:
+        message = f"A quiz generation job for lecture {lecture_id} is already in progress."
+    else:
+        message = f"Quiz generation job created for lecture {lecture_id}. It will be processed in the background."
+    return jsonify({
+        "status": "success",
+        "message": message,
+        "job_id": job_id,
+        "deduplicated": deduplicated
+    }), 200
+
+
+@quiz_blueprint.route('/generate_quiz_for_course/<uuid:course_id>', methods=['POST'])
+@swag_from({
+    'tags': ['Quiz Generation'],
+    'parameters': [
+        {
+            'name': 'course_id',
+            'in': 'path',
+            'type': 'string',
+            'format': 'uuid',
+            'required': True,
+            'description': 'UUID of the course'
+        },
+        {
+            'name': 'body',
+            'in': 'body',
+            'required': False,
+            'schema': {
+                'type': 'object',
+                'properties': {
+                    'max_concurrency': {
+                        'type': 'integer',
+                        'description': 'Maximum number of lectures processed at the same time (0 = unlimited)'
+                    },
+                    'use_cache': {
+                        'type': 'boolean',
+                        'description': 'Set to false to regenerate with Groq instead of reusing cached completions'
+                    }
+                }
+            }
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Course quiz generation jobs created successfully',
+            'examples': {
+                'application/json': {
+                    'status': 'success',
+                    'message': 'Quiz generation jobs created for 12 lectures of course <course_id>.',
+                    'lecture_count': 12,
+                    'job_id': 'uuid-string'
+                }
+            }
+        },
+        400: {
+            'description': 'Bad Request'
+        },
+        500: {
+            'description': 'Internal Server Error'
+        }
+    }
+})
+def generate_quiz_for_course(course_id):
+    """
+    Enqueues one quiz generation pipeline per lecture of the course.
+    The lectures run in parallel (bounded by max_concurrency) and their
+    results are aggregated once the last one finishes.
+
+    Returns HTTP 200 immediately upon successful job creation, with a course job_id
+    whose status lists every lecture job.
+    """
+    str_course_id = str(course_id)
+    data = request.get_json(silent=True) or {}
+    max_concurrency = data.get("max_concurrency")
+    use_cache = data.get("use_cache", True) is not False
+    if max_concurrency is not None and (not isinstance(max_concurrency, int) or max_concurrency < 0):
+        return jsonify({"status": "error", "message": "max_concurrency must be a non-negative integer"}), 400
+
+    with SqlOps() as sql_ops:
+        lecture_rows = sql_ops.fetch_lecture_paths_for_course(str_course_id)
+
+    if not lecture_rows:
+        return jsonify({
+            "status": "error",
+            "message": f"No lectures found for course {course_id}"
+        }), 400
+
+    course_job = submit_course_job(str_course_id, lecture_rows, max_concurrency, use_cache)
 
     return jsonify({
         "status": "success",
-        "message": f"Quiz generation job created for lecture {lecture_id}. It will be processed in the background."
+        "message": f"Quiz generation jobs created for {len(lecture_rows)} lectures of course {course_id}.",
+        "lecture_count": len(lecture_rows),
+        "job_id": course_job["job_id"]
     }), 200
+
+
+@quiz_blueprint.route('/jobs/<job_id>', methods=['GET'])
+@swag_from({
+    'tags': ['Quiz Generation'],
+    'parameters': [
+        {
+            'name': 'job_id',
+            'in': 'path',
+            'type': 'string',
+            'required': True,
+            'description': 'Job id returned when the quiz generation was requested'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Current status of the job',
+            'examples': {
+                'application/json': {
+                    'job_id': 'uuid-string',
+                    'kind': 'lecture',
+                    'status': 'running',
+                    'current_stage': 'transcribe',
+                    'progress': {'completed_stages': 1, 'total_stages': 5},
+                    'stages': {
+                        'download': {'status': 'success', 'started_at': '2025-03-05T10:00:00', 'duration': 4.2}
+                    },
+                    'error': None
+                }
+            }
+        },
+        404: {
+            'description': 'Unknown or expired job'
+        }
+    }
+})
+def get_job_status(job_id):
+    """
+    Returns the status of a lecture or course quiz generation job:
+    overall status, current stage, per-stage timings and errors.
+    Course jobs include the status of each of their lecture jobs.
+    """
+    job = get_job(job_id)
+    if job is None:
+        return jsonify({"status": "error", "message": f"Job {job_id} not found"}), 404
+    return jsonify(job), 200
+
+
+@quiz_blueprint.route('/questions', methods=['GET'])
+@swag_from({
+    'tags': ['Quiz Generation'],
+    'parameters': [
+        {'name': 'course_id', 'in': 'query', 'type': 'string', 'format': 'uuid', 'required': False,
+         'description': 'Only questions of this course (course_id or lecture_id is required)'},
+        {'name': 'lecture_id', 'in': 'query', 'type': 'string', 'format': 'uuid', 'required': False,
+         'description': 'Only questions of this lecture'},
+        {'name': 'difficulty', 'in': 'query', 'type': 'string', 'enum': ['Easy', 'Medium', 'Hard'], 'required': False,
+         'description': 'Only questions of this difficulty (case-insensitive)'},
+        {'name': 'limit', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Page size'},
+        {'name': 'offset', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Questions to skip'}
+    ],
+    'responses': {
+        200: {
+            'description': 'One page of generated questions',
+            'examples': {
+                'application/json': {
+                    'questions': [{
+                        'id': 'uuid-string',
+                        'lecture_id': 'uuid-string',
+                        'position': 0,
+                        'question': 'What is ...?',
+                        'options': ['...', '...', '...', '...'],
+                        'answer': 'text of the correct option',
+                        'explanation': '...',
+                        'difficulty': 'Medium'
+                    }],
+                    'limit': 20,
+                    'offset': 0,
+                    'next_offset': 20
+                }
+            }
+        },
+        400: {
+            'description': 'Missing filter or invalid pagination parameters'
+        }
+    }
+})
+def list_questions():
+    """
+    Returns generated questions filtered by course, lecture and difficulty, one page at a time.
+    Reads the normalised assessment_questions table, so only the requested questions are loaded.
+    """
+    course_id = request.args.get("course_id")
+    lecture_id = request.args.get("lecture_id")
+    difficulty = request.args.get("difficulty")
+    if difficulty:
+        difficulty = difficulty.capitalize()
+    if not course_id and not lecture_id:
+        return jsonify({"status": "error", "message": "course_id or lecture_id is required"}), 400
+    for name, value in (("course_id", course_id), ("lecture_id", lecture_id)):
+        if value:
+            try:
+                uuid.UUID(value)
+            except ValueError:
+                return jsonify({"status": "error", "message": f"Invalid {name}"}), 400
+    if difficulty and difficulty not in DIFFICULTIES:
+        return jsonify({"status": "error", "message": f"difficulty must be one of {', '.join(DIFFICULTIES)}"}), 400
+
+    limit = request.args.get("limit", Config.QUESTIONS_PAGE_SIZE, type=int)
+    offset = request.args.get("offset", 0, type=int)
+    if limit < 1 or offset < 0:
+        return jsonify({"status": "error", "message": "limit must be positive and offset non-negative"}), 400
+    limit = min(limit, Config.QUESTIONS_MAX_PAGE_SIZE)
+
+    page = fetch_questions(course_id=course_id, lecture_id=lecture_id, difficulty=difficulty,
+                           limit=limit, offset=offset)
+    return jsonify(page), 200
+
+
+@quiz_blueprint.route('/search', methods=['GET'])
+@swag_from({
+    'tags': ['Quiz Generation'],
+    'parameters': [
+        {'name': 'course_id', 'in': 'query', 'type': 'string', 'format': 'uuid', 'required': True,
+         'description': 'Search the transcripts of this course'},
+        {'name': 'q', 'in': 'query', 'type': 'string', 'required': True, 'description': 'Search text'},
+        {'name': 'lecture_id', 'in': 'query', 'type': 'string', 'format': 'uuid', 'required': False,
+         'description': 'Only this lecture of the course'},
+        {'name': 'limit', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Number of snippets'}
+    ],
+    'responses': {
+        200: {
+            'description': 'Transcript snippets ranked by semantic similarity to the query',
+            'examples': {
+                'application/json': {
+                    'course_id': 'uuid-string',
+                    'query': 'gradient descent',
+                    'results': [{
+                        'lecture_id': 'uuid-string',
+                        'chunk_index': 4,
+                        'text': '...',
+                        'score': 0.71,
+                        'start': 122.4,
+                        'end': 151.0
+                    }]
+                }
+            }
+        },
+        400: {
+            'description': 'Missing or invalid parameters'
+        },
+        503: {
+            'description': 'The vector search is unavailable'
+        }
+    }
+})
+def search_transcripts():
+    """
+    Semantic search across the transcripts of every lecture of a course, in one filtered vector query.
+    start/end (seconds) locate the snippet in the lecture video when the transcript has timings.
+    """
+    course_id = request.args.get("course_id")
+    lecture_id = request.args.get("lecture_id")
+    query = (request.args.get("q") or "").strip()
+    if not course_id or not query:
+        return jsonify({"status": "error", "message": "course_id and q are required"}), 400
+    for name, value in (("course_id", course_id), ("lecture_id", lecture_id)):
+        if value:
+            try:
+                uuid.UUID(value)
+            except ValueError:
+                return jsonify({"status": "error", "message": f"Invalid {name}"}), 400
+    if len(query) > Config.SEARCH_MAX_QUERY_LENGTH:
+        return jsonify({"status": "error",
+                        "message": f"q is limited to {Config.SEARCH_MAX_QUERY_LENGTH} characters"}), 400
+    limit = request.args.get("limit", Config.SEARCH_PAGE_SIZE, type=int)
+    if limit < 1:
+        return jsonify({"status": "error", "message": "limit must be positive"}), 400
+    limit = min(limit, Config.SEARCH_MAX_PAGE_SIZE)
+
+    try:
+        results = search_course_transcripts(course_id, query, limit=limit, lecture_id=lecture_id)
+    except Exception as e:
+        logger.error(f"Transcript search failed for course {course_id}: {e}")
+        return jsonify({"status": "error", "message": "Search is unavailable"}), 503
+    return jsonify({"course_id": course_id, "query": query, "results": results}), 200
+
+
+@quiz_blueprint.route('/lectures/<uuid:lecture_id>/quiz', methods=['GET'])
+@swag_from({
+    'tags': ['Quiz Generation'],
+    'parameters': [
+        {'name': 'lecture_id', 'in': 'path', 'type': 'string', 'format': 'uuid', 'required': True,
+         'description': 'UUID of the lecture'},
+        {'name': 'If-None-Match', 'in': 'header', 'type': 'string', 'required': False,
+         'description': 'ETag of a previously fetched copy'}
+    ],
+    'responses': {
+        200: {
+            'description': 'The generated quiz of the lecture (with an ETag header)',
+            'examples': {
+                'application/json': {
+                    'assessment_id': 'uuid-string',
+                    'course_id': 'uuid-string',
+                    'lecture_id': 'uuid-string',
+                    'version': 3,
+                    'quiz': [{'question': 'What is ...?', 'options': ['...', '...'], 'answer': '...'}]
+                }
+            }
+        },
+        304: {
+            'description': 'The copy identified by If-None-Match is still current'
+        },
+        404: {
+            'description': 'No quiz has been generated for the lecture'
+        }
+    }
+})
+def get_lecture_quiz(lecture_id):
+    """
+    Returns the generated quiz of a lecture.
+    Served from the in-process and Redis caches; PostgreSQL is only read after the quiz
+    changed or expired from the cache. Clients revalidate with If-None-Match.
+    """
+    cached = quiz_cache.get_quiz(str(lecture_id), fetch_assessment)
+    if cached is None:
+        return jsonify({"status": "error", "message": f"No quiz found for lecture {lecture_id}"}), 404
+    etag, body = cached
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(body, status=200, mimetype='application/json')
+    response.set_etag(etag)
+    # Cacheable, but always revalidated so a regenerated quiz is picked up immediately.
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _sse_event(event, data):
+    """Formats one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@quiz_blueprint.route('/lectures/<uuid:lecture_id>/quiz/stream', methods=['GET'])
+@swag_from({
+    'tags': ['Quiz Generation'],
+    'produces': ['text/event-stream'],
+    'parameters': [
+        {
+            'name': 'lecture_id',
+            'in': 'path',
+            'type': 'string',
+            'format': 'uuid',
+            'required': True,
+            'description': 'UUID of the lecture (its transcript must already be indexed in Qdrant)'
+        },
+        {
+            'name': 'num_questions',
+            'in': 'query',
+            'type': 'integer',
+            'required': False,
+            'default': 5,
+            'description': 'Number of questions to generate (at most QUIZ_MAX_QUESTIONS, default 20)'
+        },
+        {
+            'name': 'use_cache',
+            'in': 'query',
+            'type': 'boolean',
+            'required': False,
+            'default': True,
+            'description': 'Set to false to regenerate with Groq instead of reusing a cached completion'
+        }
+    ],
+    'responses': {
+        200: {
+            'description': 'Stream of "question" events, then a "done" event (or an "error" event)'
+        },
+        400: {
+            'description': 'Bad Request'
+        },
+        404: {
+            'description': 'lecture_id is not a UUID'
+        }
+    }
+})
+def stream_quiz_for_lecture(lecture_id):
+    """
+    Generates a quiz for an already indexed lecture and streams it as Server-Sent Events.
+    Each question is sent as soon as the model has finished writing it, so the first
+    question arrives long before the full completion.
+    """
+    num_questions = request.args.get('num_questions', 5, type=int)
+    if not num_questions or num_questions < 1:
+        return jsonify({"status": "error", "message": "num_questions must be a positive integer"}), 400
+    # Bounds the time the SSE connection and the LLM quota are held by one request.
+    num_questions = min(num_questions, Config.QUIZ_MAX_QUESTIONS)
+    use_cache = request.args.get('use_cache', 'true').lower() != 'false'
+
+    mcq_gen = MCQGenerator(
+        api_key=Config.GROQ_API_KEY,
+        qdrant_url=Config.QDRANT_URL,
+        qdrant_collection=f"lecture_{lecture_id}"
+    )
+
+    def generate_events():
+        count = 0
+        try:
+            for question in mcq_gen.stream_mcqs(LECTURE_QUIZ_QUERY, num_questions, use_cache):
+                count += 1
+                yield _sse_event("question", question)
+        except Exception as e:
+            yield _sse_event("error", {"message": f"Quiz generation failed: {e}"})
+            return
+        yield _sse_event("done", {"num_questions": count})
+
+    return Response(
+        stream_with_context(generate_events()),
+        mimetype='text/event-stream',
+        # Disable proxy buffering so events reach the client as they are produced.
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -0,0 +1,67 @@
+# quiz/sparse.py
+"""
+BM25-style sparse vectors for transcript chunks, computed locally (no model).
+
+Terms are hashed into a fixed index space. A document vector holds the BM25 term-frequency
+component of each term; Qdrant multiplies it by the inverse document frequency it keeps for
+the collection (sparse vector "bm25" with the IDF modifier), so together they score like BM25.
+Query vectors weigh every distinct term 1. Terms are not stemmed: exact technical terms and
+formula names ("softmax", "l2-norm", "x^2") must match as written.
+"""
+import re
+import zlib
+from collections import Counter
+from typing import List, Tuple
+
+from quiz.config import Config
+
+# Words joined by _ . + - ^ stay one term ("x^2", "c++", "k-means", "f1_score").
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[_.+\-^][a-z0-9]+)*\+*")
+
+# Only the most frequent function words: everything else can be a technical term.
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have i if in into is it its of on or so that the their
+then there these this to was we were what when which will with you your
+""".split())
+
+INDEX_SPACE = 2 ** 31 - 1
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased terms of the text, without stopwords."""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def term_index(term: str) -> int:
+    """Stable index of a term (the same in every process and release)."""
+    return zlib.crc32(term.encode("utf-8")) % INDEX_SPACE
+
+
+def _to_sparse(weights: Counter) -> Tuple[List[int], List[float]]:
+    # Distinct terms can collide on an index: their weights add up.
+    merged: Counter = Counter()
+    for term, weight in weights.items():
+        merged[term_index(term)] += weight
+    indices = sorted(merged)
+    return indices, [float(merged[index]) for index in indices]
+
+
+def document_vector(text: str) -> Tuple[List[int], List[float]]:
+    """
+    (indices, values) of a chunk: tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length)).
+
+    The average length is a configured constant rather than a corpus statistic, so vectors
+    never need recomputing when other chunks are added.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return [], []
+    k1, b = Config.BM25_K1, Config.BM25_B
+    length_norm = k1 * (1 - b + b * len(tokens) / Config.BM25_AVG_CHUNK_TOKENS)
+    weights = Counter({term: tf * (k1 + 1) / (tf + length_norm) for term, tf in Counter(tokens).items()})
+    return _to_sparse(weights)
+
+
+def query_vector(text: str) -> Tuple[List[int], List[float]]:
+    """(indices, values) of a query: weight 1 per distinct term."""
+    return _to_sparse(Counter(dict.fromkeys(tokenize(text), 1.0)))
@@ -99,37 +99,155 @@
 #             logging.error(f"Error closing database connection: {e}")
 
 
+import os
+import time
 import logging
+import threading
+import contextlib
 import psycopg2
+import psycopg2.pool
+import psycopg2.extras
 import json
-from typing import List, Tuple
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from quiz.config import Config
+from quiz import quiz_cache
+from observability.metrics import track_dependency
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None
+_pool_pid: Optional[int] = None
+_pool_slots: Optional[threading.BoundedSemaphore] = None
+_pool_lock = threading.Lock()
+# id(connection) -> time it was returned to the pool.
+_last_used: Dict[int, float] = {}
+
+
+def get_pool() -> psycopg2.pool.ThreadedConnectionPool:
+    """
+    Returns the process-wide connection pool, creating it on first use.
+    A forked child (Celery prefork worker) gets its own pool: connections can't be shared across processes.
+    """
+    global _pool, _pool_pid, _pool_slots
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = psycopg2.pool.ThreadedConnectionPool(
+                Config.DB_POOL_MIN,
+                Config.DB_POOL_MAX,
+                database=Config.DB_NAME,
+                user=Config.DB_USER,
+                password=Config.DB_PASSWORD,
+                host=Config.DB_HOST,
+                port=Config.DB_PORT
+            )
+            _pool_pid = os.getpid()
+            # ThreadedConnectionPool raises when exhausted; make callers wait for a free connection instead.
+            _pool_slots = threading.BoundedSemaphore(Config.DB_POOL_MAX)
+            _last_used.clear()
+        return _pool
+
+
+def _is_healthy(conn) -> bool:
+    """Pings connections that sat idle for a while; the server or a proxy may have dropped them."""
+    if conn.closed:
+        return False
+    last_used = _last_used.get(id(conn))
+    # Connections that were never returned before have just been opened.
+    if last_used is None or time.monotonic() - last_used < Config.DB_POOL_HEALTHCHECK_IDLE:
+        return True
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
+@contextlib.contextmanager
+def pooled_connection() -> Iterator["psycopg2.extensions.connection"]:
+    """
+    Checks a connection out of the pool and returns it afterwards.
+    Commits if the block succeeds, rolls back if it raises.
+    """
+    pool = get_pool()
+    slots = _pool_slots
+    slots.acquire()
+    conn = None
+    try:
+        conn = pool.getconn()
+        if not _is_healthy(conn):
+            logger.warning("Discarding a broken pooled database connection")
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
+        yield conn
+        conn.commit()
+    except Exception:
+        if conn is not None and not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        if conn is not None:
+            _last_used[id(conn)] = time.monotonic()
+            pool.putconn(conn, close=bool(conn.closed))
+        slots.release()
 
-logging.basicConfig(
-    filename="sql_ops.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
 
 class SqlOps:
+    """
+    Database operations for the quiz service, on connections from the process-wide pool.
+
+    Use it as a context manager to run several operations on one checked-out connection:
+
+        with SqlOps() as sql_ops:
+            rows = sql_ops.fetch_lecture_paths_for_course(course_id)
+
+    Outside a with block every call checks out (and returns) its own connection.
+    Cached quizzes of upserted lectures are invalidated once the transaction has committed.
+    """
+
     def __init__(self):
-        self.db_host = Config.DB_HOST
-        self.db_port = Config.DB_PORT
-        self.db_user = Config.DB_USER
-        self.db_password = Config.DB_PASSWORD
-        self.db_name = Config.DB_NAME
+        self.conn = None
+        self._checkout = None
+        # lecture_id -> assessment version written by the current transaction.
+        self._written_versions: Dict[str, int] = {}
+
+    def __enter__(self) -> "SqlOps":
+        self._checkout = pooled_connection()
+        self.conn = self._checkout.__enter__()
+        return self
 
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        checkout, self._checkout, self.conn = self._checkout, None, None
+        if checkout is None:
+            return False
         try:
-            self.conn = psycopg2.connect(
-                database=self.db_name,
-                user=self.db_user,
-                password=self.db_password,
-                host=self.db_host,
-                port=self.db_port
-            )
-            self.cursor = self.conn.cursor()
-        except Exception as e:
-            logging.error(f"Error connecting to database: {e}")
+            suppressed = checkout.__exit__(exc_type, exc_value, traceback)
+        except Exception:
+            self._written_versions.clear()
+            raise
+        if exc_type is None:
+            self._publish_written_versions()
+        else:
+            self._written_versions.clear()
+        return suppressed
+
+    def _publish_written_versions(self) -> None:
+        written, self._written_versions = self._written_versions, {}
+        if written:
+            quiz_cache.publish_versions(written)
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator["psycopg2.extensions.connection"]:
+        """Yields the connection held by the with block, or checks one out for this call only."""
+        if self.conn is not None:
+            yield self.conn
+        else:
+            with pooled_connection() as conn:
+                yield conn
+            # Committed: the transaction was this call's alone.
+            self._publish_written_versions()
 
     def fetch_lecture_paths_for_course(self, course_id: str) -> List[Tuple[str, str]]:
         """
@@ -143,64 +261,160 @@ class SqlOps:
                WHERE lectures.course_id = %s
                AND lectures.video_path IS NOT NULL;
             """
-            self.cursor.execute(query, (course_id,))
-            rows = self.cursor.fetchall()
-            logging.info(f"Fetched {len(rows)} lecture paths for course {course_id}")
+            with self.connection() as conn, conn.cursor() as cursor:
+                cursor.execute(query, (course_id,))
+                rows = cursor.fetchall()
+            logger.info(f"Fetched {len(rows)} lecture paths for course {course_id}")
             return rows
         except Exception as e:
-            logging.error(f"Error fetching lecture paths: {e}")
+            logger.error(f"Error fetching lecture paths: {e}")
             return []
 
-    def insert_quiz(self, course_id: str, lecture_id: str, file_path: str):
+    def fetch_courses_for_embedding(self, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Fetches the courses whose embedding is stale: the course was created or updated, one of
+        its lectures was added, or the quiz (and so the transcript) of one of its lectures changed
+        after `since`. All courses if since is None.
+
+        :return: [{"course_id", "title", "description", "category_id", "lecture_ids", "lecture_titles",
+                   "changed_at"}], changed_at being the latest of those timestamps (GREATEST skips the
+                   NULL ones, e.g. a course never updated and without quizzes).
         """
-        Reads a JSON file from file_path and inserts its content into the 'assessments' table.
+        query = """
+            SELECT * FROM (
+                SELECT courses.id, courses.title, courses.description, courses.category_id,
+                       COALESCE(array_agg(lectures.id::text ORDER BY lectures.created_at)
+                                FILTER (WHERE lectures.id IS NOT NULL), '{}'),
+                       string_agg(lectures.title, '. ' ORDER BY lectures.created_at),
+                       GREATEST(courses.created_at, courses.updated_at,
+                                max(lectures.created_at), max(assessments.updated_at)) AS changed_at
+                FROM courses
+                LEFT JOIN lectures ON lectures.course_id = courses.id
+                LEFT JOIN assessments ON assessments.lecture_id = lectures.id
+                GROUP BY courses.id
+            ) AS course_rows
+            WHERE %(since)s::timestamp IS NULL OR changed_at > %(since)s::timestamp;
+        """
+        with self.connection() as conn, conn.cursor() as cursor:
+            cursor.execute(query, {"since": since})
+            rows = cursor.fetchall()
+        logger.info(f"Fetched {len(rows)} courses to embed (changed since {since})")
+        return [
+            {
+                "course_id": str(course_id),
+                "title": title or "",
+                "description": description or "",
+                "category_id": str(category_id) if category_id else None,
+                "lecture_ids": list(lecture_ids),
+                "lecture_titles": lecture_titles or "",
+                "changed_at": changed_at,
+            }
+            for course_id, title, description, category_id, lecture_ids, lecture_titles, changed_at in rows
+        ]
+
+    def insert_quiz(self, course_id: str, lecture_id: str, quiz_data: Any) -> Optional[str]:
+        """
+        Inserts (or replaces) the quiz of one lecture in the 'assessments' table.
         Fields: course_id, lecture_id, assessment_data (JSON)
+
+        :return: The assessment id.
+        """
+        ids = self.insert_quizzes_bulk([(course_id, lecture_id, quiz_data)])
+        return ids.get(str(lecture_id))
+
+    def insert_quizzes_bulk(self, quizzes: Iterable[Tuple[str, str, Any]]) -> Dict[str, str]:
+        """
+        Upserts many quizzes with a single INSERT ... ON CONFLICT statement and rewrites
+        their rows in 'assessment_questions', all in the same transaction.
+
+        :param quizzes: (course_id, lecture_id, quiz_data) tuples; quiz_data is the in-memory quiz.
+        :return: {lecture_id: assessment_id} for the rows written.
+        """
+        # ON CONFLICT can't touch the same row twice in one statement: keep the last quiz per lecture.
+        quizzes_by_lecture = {str(lecture_id): (course_id, quiz_data) for course_id, lecture_id, quiz_data in quizzes}
+        rows_by_lecture = {
+            lecture_id: (course_id, lecture_id, json.dumps(quiz_data, separators=(",", ":")))
+            for lecture_id, (course_id, quiz_data) in quizzes_by_lecture.items()
+        }
+        if not rows_by_lecture:
+            return {}
+        # Make sure you have a UNIQUE constraint or PRIMARY KEY on (lecture_id)
+        # or a unique index for ON CONFLICT to work properly with lecture_id.
+        query = """
+            INSERT INTO assessments (course_id, lecture_id, assessment_data)
+            VALUES %s
+            ON CONFLICT (lecture_id)
+            DO UPDATE 
+                SET assessment_data = EXCLUDED.assessment_data,
+                    version = assessments.version + 1,
+                    updated_at = now()
+            RETURNING lecture_id, id, version;
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                # Make sure you have a UNIQUE constraint or PRIMARY KEY on (lecture_id)
-                # or a unique index for ON CONFLICT to work properly with lecture_id.
-                query = """
-                    INSERT INTO assessments (course_id, lecture_id, assessment_data)
-                    VALUES (%s, %s, %s)
-                    ON CONFLICT (lecture_id)
-                    DO UPDATE 
-                        SET assessment_data = EXCLUDED.assessment_data
-                    RETURNING id;
-                """
-                self.cursor.execute(query, (course_id, lecture_id, json.dumps(data)))
-                result = self.cursor.fetchone()
-
-                # result should be a tuple containing the returned 'id'
-                if result:
-                    new_id = result[0]
-                    logging.info(
-                        f"Inserted/updated quiz for course_id={course_id}, lecture_id={lecture_id}, assessment_id={new_id}"
-                    )
-                else:
-                    # If nothing is returned (unlikely if the table is set up properly),
-                    # handle it accordingly:
-                    new_id = None
-                    logging.warning(
-                        f"No row returned after insert/update for course_id={course_id}, lecture_id={lecture_id}"
-                    )
-
-                self.conn.commit()
+            with track_dependency("postgres", "upsert_quizzes"), self.connection() as conn, conn.cursor() as cursor:
+                results = psycopg2.extras.execute_values(
+                    cursor, query, list(rows_by_lecture.values()),
+                    template="(%s, %s, %s::json)", page_size=len(rows_by_lecture), fetch=True
+                )
+                ids = {str(lecture_id): str(assessment_id) for lecture_id, assessment_id, _ in results}
+                self._written_versions.update({str(lecture_id): version for lecture_id, _, version in results})
+                question_count = self._replace_questions(cursor, ids, quizzes_by_lecture)
+            logger.info(f"Inserted/updated {len(ids)} quizzes ({question_count} questions)")
+            missing = set(rows_by_lecture) - set(ids)
+            if missing:
+                logger.warning(f"No row returned after insert/update for lecture_ids={sorted(missing)}")
+            return ids
         except Exception as e:
-            logging.error(f"Error inserting quiz: {e}")
+            logger.error(f"Error inserting quizzes: {e}")
             raise
 
+    @staticmethod
+    def _replace_questions(cursor, ids: Dict[str, str], quizzes_by_lecture: Dict[str, Tuple[str, Any]]) -> int:
+        """
+        Replaces the 'assessment_questions' rows of the given assessments with the questions
+        of their new quiz (one DELETE and one multi-row INSERT).
+
+        :param ids: {lecture_id: assessment_id}
+        :param quizzes_by_lecture: {lecture_id: (course_id, quiz_data)}
+        :return: Number of question rows written.
+        """
+        if not ids:
+            return 0
+        cursor.execute(
+            "DELETE FROM assessment_questions WHERE assessment_id = ANY(%s::uuid[]);",
+            (list(ids.values()),)
+        )
+        rows = []
+        for lecture_id, assessment_id in ids.items():
+            course_id, quiz_data = quizzes_by_lecture[lecture_id]
+            for position, question in enumerate(quiz_data or []):
+                if not isinstance(question, dict) or not question.get("question"):
+                    continue
+                rows.append((
+                    assessment_id, course_id, lecture_id, position, question["question"],
+                    json.dumps(question.get("options") or []), question.get("answer", ""),
+                    question.get("explanation", ""), question.get("difficulty", "")
+                ))
+        if rows:
+            psycopg2.extras.execute_values(
+                cursor,
+                """
+                INSERT INTO assessment_questions
+                    (assessment_id, course_id, lecture_id, position, question, options, answer, explanation, difficulty)
+                VALUES %s;
+                """,
+                rows,
+                template="(%s, %s, %s, %s, %s, %s::jsonb, %s, %s, %s)",
+                page_size=len(rows)
+            )
+        return len(rows)
 
     def close(self):
         """
-        Closes the database cursor and connection.
+        Returns a connection still held by a with block to the pool.
+        Kept for callers written before pooling; safe to call more than once.
         """
         try:
-            if self.cursor:
-                self.cursor.close()
-            if self.conn:
-                self.conn.close()
-            logging.info("Database connection closed")
+            self.__exit__(None, None, None)
         except Exception as e:
-            logging.error(f"Error closing database connection: {e}")
+            logger.error(f"Error returning database connection to the pool: {e}")
@@ -67,92 +67,192 @@
 #     return True
 
 
-import os
-import uuid
-import json
-from celery import Celery
+import logging
 from quiz.config import Config
-from quiz.video_download import download_video_from_url
-from quiz.transcription import transcribe_video
-from quiz.qdrant_ops import store_transcript_in_qdrant
-from quiz.quiz import MCQGenerator
-from quiz.sql_ops import SqlOps
+from quiz import pipeline
+from quiz.course_embeddings import refresh_course_embeddings
+# `celery -A quiz.task worker` finds the app here.
+from quiz.celery_app import celery_app
+from quiz.jobs import (
+    clear_course_results, get_course_results, get_job, release_lecture, save_job, save_course_job,
+    stash_course_result,
+)
+from quiz.redis_ops import Semaphore
 
-from dotenv import load_dotenv
-load_dotenv()
-# Configure Celery using your broker URL.
-celery_app = Celery('quiz_tasks', broker='redis://localhost:6379/0')
+logger = logging.getLogger(__name__)
 
-@celery_app.task
-def generate_quiz_task(course_id, lecture_id, video_path):
-    local_dir = os.getenv("OUTPUT_DIRECTORY")  # Adjust based on your environment
-    os.makedirs(local_dir, exist_ok=True)
-    local_video_path = video_path
-
-    # 1. Download the video if the path is a remote URL.
-    if video_path.startswith("http"):
-        local_video_path = download_video_from_url(video_path, local_dir)
-        if not local_video_path:
-            # Log error or notify failure as needed.
-            return False
-
-    # 2. Transcription:
-    # Name transcript file based on lecture_id.
-    transcript_filename = f"transcript_{lecture_id}.txt"
-    transcript_path = os.path.join(local_dir, transcript_filename)
-    if not os.path.exists(transcript_path):
-        # Only transcribe if transcript file doesn't exist.
-        if not transcribe_video(local_video_path, transcript_path):
-            return False
-
-    # 3. Qdrant embeddings:
-    # Use a marker file to indicate that the transcript (and embeddings) have been stored.
-    qdrant_marker = os.path.join(local_dir, f"qdrant_{lecture_id}.done")
-    if not os.path.exists(qdrant_marker):
-        store_transcript_in_qdrant(lecture_id=lecture_id, transcript_path=transcript_path)
-        # Create marker file.
-        with open(qdrant_marker, "w") as marker:
-            marker.write("done")
-
-    # 4. Generate MCQs using the MCQGenerator.
-    mcq_gen = MCQGenerator(
-        api_key=Config.GROQ_API_KEY,
-        qdrant_url=Config.QDRANT_URL,
-        qdrant_collection=f"lecture_{lecture_id}"
-    )
-    prompt_topic = "Generate a comprehensive quiz covering the lecture content."
-    generation_result = mcq_gen.generate_mcqs(prompt_topic, num_questions=5)
-    if generation_result.get("status") == "error":
-        return False
 
-    quiz_json = generation_result.get("quiz")
+def _run_stage(run_stage, job):
+    """Runs a stage and publishes the job status before and after it."""
+    if job.get("status") != "error":
+        job["current_stage"] = run_stage.stage_name
+        save_job(job)
+        # The course slot is a lease: every stage extends it.
+        _renew_slot(job)
+    job = run_stage(job)
+    save_job(job)
+    return job
 
-    # 5. Save the quiz JSON to a file.
-    local_dir = os.getenv("OUTPUT_DIRECTORY")
-    quiz_filename = f"quiz_{lecture_id}_{uuid.uuid4()}.json"
-    quiz_path = os.path.join(local_dir, quiz_filename)
-    with open(quiz_path, "w", encoding="utf-8") as quiz_file:
-        quiz_file.write(json.dumps(quiz_json, indent=2))
 
+def _course_slots(job):
+    slot = job.get("slot")
+    return Semaphore(slot["name"], slot["limit"], Config.COURSE_SLOT_TTL)
 
-    # 6. Insert the quiz record into PostgreSQL.
+
+# The slot calls never raise: a Redis error must not break the lecture's chain (and with
+# it the course chord). A slot that couldn't be taken is retried; one that couldn't be
+# renewed or released expires with its lease.
+def _acquire_slot(job):
     try:
-        sql_ops = SqlOps()
-        sql_ops.insert_quiz(
-            course_id=course_id,
-            lecture_id=lecture_id,
-            file_path=quiz_path
-        )
-        sql_ops.close()
+        return _course_slots(job).acquire(job["lecture_id"])
     except Exception as e:
+        logger.error(f"Could not take a course slot for lecture {job['lecture_id']}: {e}")
         return False
 
-    # 7. Cleanup: delete all files in local_dir except the quiz JSON file.
-    for filename in os.listdir(local_dir):
-        file_path = os.path.join(local_dir, filename)
-        # Keep the quiz JSON file; delete all others.
-        if file_path != quiz_path and os.path.isfile(file_path):
-            os.remove(file_path)
 
-    return True
+def _renew_slot(job):
+    if not job.get("slot"):
+        return
+    try:
+        _course_slots(job).renew(job["lecture_id"])
+    except Exception as e:
+        logger.error(f"Could not renew the course slot of lecture {job['lecture_id']}: {e}")
+
+
+def _release_slot(job):
+    if not job.get("slot"):
+        return
+    try:
+        _course_slots(job).release(job["lecture_id"])
+    except Exception as e:
+        logger.error(f"Could not release the course slot of lecture {job['lecture_id']}: {e}")
+
+
+@celery_app.task(bind=True, max_retries=Config.COURSE_SLOT_MAX_WAIT // Config.COURSE_SLOT_RETRY_SECONDS)
+def download_task(self, job):
+    # Lectures of a course fan-out wait here until one of the course's slots is free.
+    if job.get("slot") and job.get("status") != "error" and not _acquire_slot(job):
+        if self.request.retries >= self.max_retries:
+            # The job travels down the chain as failed, so the lecture is still released.
+            pipeline.fail(job, "download", f"No course slot became free within {Config.COURSE_SLOT_MAX_WAIT} seconds")
+            save_job(job)
+            return job
+        raise self.retry(countdown=Config.COURSE_SLOT_RETRY_SECONDS)
+    return _run_stage(pipeline.download_stage, job)
+
+
+@celery_app.task
+def transcribe_task(job):
+    return _run_stage(pipeline.transcribe_stage, job)
+
+
+@celery_app.task
+def embed_task(job):
+    return _run_stage(pipeline.embed_stage, job)
+
+
+@celery_app.task
+def generate_task(job):
+    return _run_stage(pipeline.generate_stage, job)
+
+
+@celery_app.task
+def persist_task(job):
+    try:
+        job = _run_stage(pipeline.persist_stage, job)
+        if job.get("status") == "persisting":
+            stash_course_result(job)
+        return job
+    finally:
+        # Failed jobs also reach this task, so the course slot is always handed back (the
+        # course's other lectures may be waiting for it). A fan-out lecture keeps its in-flight
+        # marker until its quiz is committed by the course callback or error handler.
+        if not job.get("defer_persist"):
+            release_lecture(job["lecture_id"], job["job_id"])
+        _release_slot(job)
+
+
+@celery_app.task
+def collect_course_results(jobs, course_job):
+    """
+    Bulk-persists the course's quizzes, releases the lectures, summarises the per-lecture
+    outcomes of the fan-out and closes the course job.
+    """
+    pending = [job for job in jobs if job.get("status") == "persisting"]
+    pipeline.persist_jobs(jobs)
+    for job in pending:
+        save_job(job)
+    for job in jobs:
+        release_lecture(job["lecture_id"], job["job_id"])
+    clear_course_results(course_job["job_id"])
+    failed = [
+        {"lecture_id": job["lecture_id"], "error": job.get("error")}
+        for job in jobs if job.get("status") != "success"
+    ]
+    summary = {
+        "total": len(jobs),
+        "succeeded": len(jobs) - len(failed),
+        "failed": failed,
+    }
+    course_job["summary"] = summary
+    if not failed:
+        course_job["status"] = "success"
+    elif summary["succeeded"]:
+        course_job["status"] = "partial"
+    else:
+        course_job["status"] = "error"
+    save_course_job(course_job)
+    logger.info(f"Course {course_job['course_id']} quiz generation finished: {summary['succeeded']}/{summary['total']} lectures")
+    return summary
+
+
+@celery_app.task
+def fail_course_job(request, exc, traceback, course_job):
+    """
+    Error handler of a course fan-out whose callback won't run because a lecture's chain
+    raised: persists the lectures that did finish (stashed by persist_task), releases the
+    course's lectures and marks the course job failed.
+    """
+    logger.error(f"Course {course_job['course_id']} fan-out failed: {exc}")
+    try:
+        finished = get_course_results(course_job["job_id"])
+    except Exception as e:
+        logger.error(f"Could not read the finished lectures of course job {course_job['job_id']}: {e}")
+        finished = []
+    pipeline.persist_jobs(finished)
+    for job in finished:
+        save_job(job)
+    started = course_job.get("started_jobs", [])
+    for job_id, lecture_id in started:
+        release_lecture(lecture_id, job_id)
+    clear_course_results(course_job["job_id"])
+
+    succeeded = {job["job_id"] for job in finished if job.get("status") == "success"}
+    failed = []
+    for job_id, lecture_id in started:
+        if job_id in succeeded:
+            continue
+        record = get_job(job_id) or {}
+        error = record.get("error") or {"stage": record.get("current_stage"), "message": str(exc)}
+        failed.append({"lecture_id": lecture_id, "error": error})
+    course_job["summary"] = {"total": len(started), "succeeded": len(succeeded), "failed": failed}
+    course_job["status"] = "error"
+    course_job["error"] = str(exc)
+    save_course_job(course_job)
+    return course_job["summary"]
+
 
+@celery_app.task
+def refresh_course_embeddings_task(full=False):
+    """Re-embeds the courses changed since the last refresh (scheduled by Celery beat)."""
+    return refresh_course_embeddings(full=full)
+
+
+@celery_app.task
+def generate_quiz_task(course_id, lecture_id, video_path):
+    """
+    Runs the whole pipeline inside a single worker slot.
+    Kept so messages enqueued before the stage split still execute; new jobs use quiz.dispatch.
+    """
+    job = pipeline.run_pipeline(pipeline.new_job(course_id, lecture_id, video_path))
+    return job["status"] == "success"
@@ -1,39 +1,57 @@
 import os
 import logging
-import whisper
+import functools
 
-logging.basicConfig(
-    filename='transcription.log',
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s: %(message)s'
-)
+from quiz.config import Config
+from quiz.local_backends import fixture_segments
+from quiz.transcripts import write_segments
+from observability.metrics import AUDIO_SECONDS
+
+logger = logging.getLogger(__name__)
+
+@functools.lru_cache(maxsize=1)
+def _load_model():
+    """Loads the Whisper model once per worker process instead of once per video."""
+    # Imported here so only the transcription workers pay for torch/Whisper.
+    import whisper
+    return whisper.load_model(Config.WHISPER_MODEL, device=Config.WHISPER_DEVICE)
 
 def transcribe_video(file_path: str, output_path: str) -> bool:
     """
-    Transcribes a video file using Whisper and saves the transcript as a .txt file.
-    If the transcript already exists, it returns the existing file path.
-
-    :param video_path: Path to the video file.
-    :return: Path to the transcript text file.
+    Transcribes a video file using Whisper and saves its segments (start, end, text) as JSON
+    lines (see quiz/transcripts.py). If the transcript already exists, it is kept.
+    With Config.TRANSCRIPTION_BACKEND=fixture, the segments are read from the video's fixture
+    file instead (quiz/local_backends.py).
+
+    :param file_path: Path to the video file.
+    :param output_path: Path of the segment file to write.
+    :return: True if the transcript exists afterwards.
     """
 
     if os.path.exists(output_path):
-        logging.info(f"Transcript already exists: {output_path}")
+        logger.info(f"Transcript already exists: {output_path}")
         return True
     
     try:
-        # Load the video file using Whisper
-        model = whisper.load_model("base", device="cuda")
-        result = model.transcribe(file_path)
-        text  = result.get("text","")
-
-        with open(output_path,"w", encoding="utf-8") as f:
-            f.write(text)
-
-        logging.info(f"Transcribed file: {output_path}")
+        if Config.TRANSCRIPTION_BACKEND == "fixture":
+            result = {"segments": fixture_segments(file_path)}
+        else:
+            # Load the video file using Whisper
+            model = _load_model()
+            result = model.transcribe(file_path)
+        segments = result.get("segments") or []
+        if segments:
+            AUDIO_SECONDS.inc(segments[-1]["end"])
+        elif result.get("text", "").strip():
+            # No timings: keep the text as one segment.
+            segments = [{"start": 0.0, "end": 0.0, "text": result["text"]}]
+
+        write_segments(output_path, segments)
+
+        logger.info(f"Transcribed file: {output_path}")
         return True
     except Exception as e:
-        logging.error(f"Error transcribing file: {e}")
+        logger.error(f"Error transcribing file: {e}")
         return False
     
 
@@ -0,0 +1,99 @@
+# quiz/transcripts.py
+"""
+Transcript storage: Whisper segments as JSON lines ({"start", "end", "text"}, seconds), one file
+per lecture in Config.TRANSCRIPT_DIRECTORY, and chunking that follows segment boundaries so every
+chunk knows the time range it covers.
+"""
+import os
+import json
+import logging
+from typing import Any, Dict, Iterable, List
+
+from quiz.config import Config
+
+logger = logging.getLogger(__name__)
+
+Segment = Dict[str, Any]
+
+
+def segments_path(lecture_id: str) -> str:
+    """Path of the lecture's segment file."""
+    return os.path.join(Config.TRANSCRIPT_DIRECTORY, f"{lecture_id}.jsonl")
+
+
+def write_segments(path: str, segments: Iterable[Segment]) -> int:
+    """
+    Writes segments as JSON lines, atomically (a crash never leaves a truncated transcript behind).
+    Only start/end (rounded to 10 ms) and the stripped text of each segment are kept.
+
+    :return: Number of segments written.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    count = 0
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for segment in segments:
+            text = (segment.get("text") or "").strip()
+            if not text:
+                continue
+            record = {"start": round(float(segment["start"]), 2), "end": round(float(segment["end"]), 2), "text": text}
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def read_segments(path: str) -> List[Segment]:
+    """Reads a segment file written by write_segments."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def segments_text(segments: Iterable[Segment]) -> str:
+    """The plain transcript text."""
+    return " ".join(segment["text"] for segment in segments)
+
+
+def chunk_segments(segments: List[Segment], max_chars: int = None) -> List[Segment]:
+    """
+    Groups consecutive segments into chunks of at most max_chars characters, cutting only between
+    segments. A segment longer than max_chars alone is split into pieces whose times are
+    interpolated over the segment.
+
+    :return: Chunks as {"text", "start", "end"} dicts, in transcript order.
+    """
+    max_chars = max_chars or Config.TRANSCRIPT_CHUNK_CHARS
+    chunks: List[Segment] = []
+    texts: List[str] = []
+    start = end = None
+    length = 0
+
+    def flush():
+        nonlocal texts, start, length
+        if texts:
+            chunks.append({"text": " ".join(texts), "start": start, "end": end})
+        texts, start, length = [], None, 0
+
+    for segment in segments:
+        text = segment["text"]
+        if len(text) > max_chars:
+            flush()
+            duration = segment["end"] - segment["start"]
+            for offset in range(0, len(text), max_chars):
+                piece = text[offset:offset + max_chars]
+                chunks.append({
+                    "text": piece,
+                    "start": round(segment["start"] + duration * offset / len(text), 2),
+                    "end": round(segment["start"] + duration * (offset + len(piece)) / len(text), 2),
+                })
+            continue
+        # +1 for the space joining the segments.
+        if texts and length + 1 + len(text) > max_chars:
+            flush()
+        if start is None:
+            start = segment["start"]
+        texts.append(text)
+        length += len(text) + (1 if length else 0)
+        end = segment["end"]
+    flush()
+    return chunks
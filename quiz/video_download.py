@@ -4,11 +4,9 @@ import os
 import requests
 import logging
 
-logging.basicConfig(
-    filename="video_download.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+from observability.metrics import DOWNLOADED_BYTES
+
+logger = logging.getLogger(__name__)
 
 def download_video_from_url(video_url: str, local_dir: str) -> str:
     """
@@ -23,7 +21,7 @@ def download_video_from_url(video_url: str, local_dir: str) -> str:
 
     # Check if file already exists
     if os.path.exists(local_path):
-        logging.info(f"File already exists at {local_path}. Skipping download.")
+        logger.info(f"File already exists at {local_path}. Skipping download.")
         return local_path
 
     try:
@@ -32,8 +30,9 @@ def download_video_from_url(video_url: str, local_dir: str) -> str:
         with open(local_path, 'wb') as f:
             for chunk in r.iter_content(chunk_size=8192):
                 f.write(chunk)
-        logging.info(f"Downloaded video from {video_url} to {local_path}")
+                DOWNLOADED_BYTES.inc(len(chunk))
+        logger.info(f"Downloaded video from {video_url} to {local_path}")
         return local_path
     except Exception as e:
-        logging.error(f"Error downloading video: {e}")
+        logger.error(f"Error downloading video: {e}")
         return ""
@@ -0,0 +1,87 @@
+# recommendation/async_app.py
+"""
+ASGI (Quart) variant of the recommendation API.
+
+Enrollments are read with asyncpg, so a worker keeps serving other requests while a query
+is waiting on PostgreSQL; the pandas/scikit-learn computation runs in a thread.
+Served next to the Flask app by asgi.py (paths under ASYNC_PREFIX).
+"""
+import asyncio
+import logging
+
+import asyncpg
+from quart import Quart, jsonify, request
+
+from recommendation.config import Config
+from recommendation.ranking_cache import rankings
+from recommendation.services import enrollment_record, paginate, pagination_args, rank_courses, ranking_key
+
+logger = logging.getLogger(__name__)
+
+ASYNC_PREFIX = '/recommendation/async'
+
+ENROLLMENTS_QUERY = """
+    SELECT user_id, course_id, progress, course_rating, student_score
+    FROM enrollments;
+"""
+
+
+async def load_enrollments_async(pool):
+    """Async counterpart of services.load_enrollments."""
+    async with pool.acquire() as conn:
+        rows = await conn.fetch(ENROLLMENTS_QUERY)
+    return [enrollment_record(*row) for row in rows]
+
+
+def create_async_app():
+    """Create the Quart application serving the async recommendation endpoints."""
+    app = Quart(__name__)
+    pool_lock = asyncio.Lock()
+    app.db_pool = None
+
+    async def get_pool():
+        # Created on first use (not at startup) so the server comes up even if the database doesn't.
+        if app.db_pool is None:
+            async with pool_lock:
+                if app.db_pool is None:
+                    app.db_pool = await asyncpg.create_pool(
+                        dsn=Config.ASYNC_DATABASE_DSN,
+                        min_size=Config.ASYNC_DB_POOL_MIN,
+                        max_size=Config.ASYNC_DB_POOL_MAX,
+                        command_timeout=Config.ASYNC_DB_COMMAND_TIMEOUT
+                    )
+        return app.db_pool
+
+    @app.after_serving
+    async def close_pool():
+        if app.db_pool is not None:
+            await app.db_pool.close()
+
+    @app.route(f'{ASYNC_PREFIX}/recommendations', methods=['GET'])
+    async def get_recommendations():
+        """
+        Get course recommendations for a specific user (same response as
+        GET /recommendation/recommendations).
+        """
+        user_id = request.args.get('user_id')
+
+        if not user_id:
+            return jsonify({'error': 'user_id is required'}), 400
+        limit, offset, error = pagination_args(request.args)
+        if error:
+            return jsonify({'error': error}), 400
+
+        key = ranking_key(user_id)
+        ranking = rankings.get(key)
+        if ranking is None:
+            data = await load_enrollments_async(await get_pool())
+            ranking = await asyncio.to_thread(rank_courses, data, user_id, Config.RECOMMENDATION_MAX_RESULTS)
+            rankings.put(key, ranking)
+        page = paginate(ranking, limit, offset)
+        return jsonify({
+            'user_id': user_id,
+            'recommendations': [item['course_id'] for item in page['items']],
+            **page
+        })
+
+    return app
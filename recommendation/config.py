@@ -12,4 +12,22 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
     #SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Async recommendation endpoint (asyncpg pool, one per ASGI worker process)
+    ASYNC_DATABASE_DSN = os.getenv("ASYNC_DATABASE_DSN", SQLALCHEMY_DATABASE_URI)
+    ASYNC_DB_POOL_MIN = int(os.getenv("ASYNC_DB_POOL_MIN", "1"))
+    ASYNC_DB_POOL_MAX = int(os.getenv("ASYNC_DB_POOL_MAX", "20"))
+    ASYNC_DB_COMMAND_TIMEOUT = float(os.getenv("ASYNC_DB_COMMAND_TIMEOUT", "30"))
     #SECRET_KEY = "some-secret-key"  # Replace with a real secret in production
+
+    # Ranked recommendations: the best RECOMMENDATION_MAX_RESULTS courses of a user are computed once
+    # and kept for RECOMMENDATION_CACHE_TTL seconds, so further pages don't recompute them.
+    RECOMMENDATION_NEIGHBOURS = int(os.getenv("RECOMMENDATION_NEIGHBOURS", "5"))
+    RECOMMENDATION_MAX_RESULTS = int(os.getenv("RECOMMENDATION_MAX_RESULTS", "100"))
+    RECOMMENDATION_MAX_PAGE_SIZE = int(os.getenv("RECOMMENDATION_MAX_PAGE_SIZE", "50"))
+    RECOMMENDATION_CACHE_TTL = float(os.getenv("RECOMMENDATION_CACHE_TTL", "300"))
+    RECOMMENDATION_CACHE_SIZE = int(os.getenv("RECOMMENDATION_CACHE_SIZE", "10000"))
+
+    # Hybrid recommendations: weight of the collaborative score; the content-based (course
+    # embedding) score gets the rest.
+    HYBRID_CF_WEIGHT = float(os.getenv("HYBRID_CF_WEIGHT", "0.6"))
@@ -0,0 +1,120 @@
+# recommendation/content.py
+"""
+Content-based recommendations from the course embeddings that the quiz workers keep in Qdrant
+(quiz/course_embeddings.py): courses similar to a course, and courses close to a user's profile
+(the rating-weighted mean of the vectors of the courses they are enrolled in).
+Only vector lookups and searches happen here; no model is loaded by the web process.
+"""
+import logging
+
+from quiz.config import Config as QuizConfig
+from quiz.qdrant_ops import get_qdrant_client
+from observability.metrics import track_dependency
+from observability.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+def _exclude_ids(course_ids):
+    from qdrant_client import models
+
+    return models.Filter(must_not=[models.HasIdCondition(has_id=list(course_ids))]) if course_ids else None
+
+
+def _items(points):
+    return [{'course_id': str(point.id), 'score': round(float(point.score), 4)} for point in points]
+
+
+def similar_courses(course_id, limit=10):
+    """
+    Courses whose embedding is closest to the course's.
+
+    :return: [{"course_id", "score" (cosine similarity)}], or None if the course has no embedding yet.
+    """
+    client = get_qdrant_client()
+    course_id = str(course_id)
+    with span("recommendations.content", kind="similar"):
+        with track_dependency("qdrant", "retrieve"):
+            found = client.retrieve(QuizConfig.COURSE_EMBEDDINGS_COLLECTION, ids=[course_id])
+        if not found:
+            return None
+        with track_dependency("qdrant", "query"):
+            response = client.query_points(
+                collection_name=QuizConfig.COURSE_EMBEDDINGS_COLLECTION,
+                query=course_id,
+                query_filter=_exclude_ids([course_id]),
+                limit=limit
+            )
+    return _items(response.points)
+
+
+def profile_ranking(user_enrollments, max_results=100):
+    """
+    Courses closest to the user's profile: the mean of the embeddings of their courses, each
+    weighted by the user's final rating of it (see services.rank_courses). Courses the user
+    already has are excluded.
+
+    :param user_enrollments: The user's enrollment records (services.enrollment_record).
+    :return: [{"course_id", "score"}] best first; empty if none of the courses is embedded.
+    """
+    import numpy as np
+
+    weights = {}
+    for record in user_enrollments:
+        rating = (0.5 * record['course_rating'] + 0.3 * record['student_score'] / 50.0 +
+                  0.2 * record['progress'] / 100.0)
+        # Enrolled without any rating yet still says something about the user's interests.
+        weights[record['course_id']] = max(weights.get(record['course_id'], 0.0), rating, 0.1)
+    if not weights:
+        return []
+
+    client = get_qdrant_client()
+    with span("recommendations.content", kind="profile", courses=len(weights)):
+        with track_dependency("qdrant", "retrieve"):
+            points = client.retrieve(QuizConfig.COURSE_EMBEDDINGS_COLLECTION, ids=list(weights),
+                                     with_vectors=True)
+        if not points:
+            return []
+        vectors = np.asarray([point.vector for point in points], dtype=np.float32)
+        point_weights = np.asarray([weights[str(point.id)] for point in points], dtype=np.float32)
+        profile = point_weights @ vectors / point_weights.sum()
+        with track_dependency("qdrant", "query"):
+            response = client.query_points(
+                collection_name=QuizConfig.COURSE_EMBEDDINGS_COLLECTION,
+                query=profile.tolist(),
+                query_filter=_exclude_ids(weights),
+                limit=max_results
+            )
+    return _items(response.points)
+
+
+def blend_rankings(cf_ranking, content_items, cf_weight):
+    """
+    Blends a rank_courses result with content-based items. Each list's scores are scaled to
+    [0, 1] by its best score, then combined as cf_weight * cf + (1 - cf_weight) * content;
+    a course missing from one list scores 0 there.
+
+    :return: {"strategy", "items": [{"course_id", "score", "cf_score", "content_score"}]} best first.
+    """
+    if not content_items:
+        return cf_ranking
+
+    def scaled(items):
+        best = max((item['score'] for item in items), default=0.0)
+        return {item['course_id']: item['score'] / best for item in items} if best > 0 else {}
+
+    cf_scores = scaled(cf_ranking['items'])
+    content_scores = scaled(content_items)
+    items = [
+        {
+            'course_id': course_id,
+            'score': round(cf_weight * cf_scores.get(course_id, 0.0) +
+                           (1 - cf_weight) * content_scores.get(course_id, 0.0), 4),
+            'cf_score': round(cf_scores.get(course_id, 0.0), 4),
+            'content_score': round(content_scores.get(course_id, 0.0), 4),
+        }
+        for course_id in cf_scores.keys() | content_scores.keys()
+    ]
+    items.sort(key=lambda item: (-item['score'], item['course_id']))
+    strategy = 'hybrid' if cf_ranking['strategy'] == 'collaborative' else f"{cf_ranking['strategy']}+content"
+    return {'strategy': strategy, 'items': items}
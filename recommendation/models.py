@@ -1,7 +1,7 @@
 # recommendation/models.py
 
 import uuid
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from recommendation.database import db
 
 class User(db.Model):
@@ -59,8 +59,54 @@ class Assessment(db.Model):
     __tablename__ = 'assessments'
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     course_id = db.Column(UUID(as_uuid=True), db.ForeignKey('courses.id'))
+    lecture_id = db.Column(UUID(as_uuid=True), db.ForeignKey('lectures.id'), unique=True)
     assessment_data = db.Column(db.JSON)
+    version = db.Column(db.Integer, nullable=False, default=1)   # bumped on every quiz upsert
     created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+
+    questions = db.relationship('AssessmentQuestion', backref='assessment', lazy='dynamic',
+                                order_by='AssessmentQuestion.position')
+
+
+class AssessmentQuestion(db.Model):
+    """
+    One row per question of an assessment, written alongside assessment_data
+    so question-level reads don't have to load and parse whole quizzes.
+    course_id/lecture_id are copied from the assessment to filter without a join.
+    """
+    __tablename__ = 'assessment_questions'
+    id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    assessment_id = db.Column(UUID(as_uuid=True), db.ForeignKey('assessments.id', ondelete='CASCADE'), nullable=False)
+    course_id = db.Column(UUID(as_uuid=True), db.ForeignKey('courses.id'))
+    lecture_id = db.Column(UUID(as_uuid=True), db.ForeignKey('lectures.id'))
+    position = db.Column(db.Integer, nullable=False)    # order within the quiz, from 0
+    question = db.Column(db.Text, nullable=False)
+    options = db.Column(JSONB)                           # ["...", "...", ...] in A-D order
+    answer = db.Column(db.String)                        # text of the correct option
+    explanation = db.Column(db.Text)
+    difficulty = db.Column(db.String)                    # Easy / Medium / Hard, may be empty
+    created_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.UniqueConstraint('assessment_id', 'position', name='uq_assessment_questions_position'),
+        db.Index('ix_assessment_questions_lecture', 'lecture_id', 'position'),
+        db.Index('ix_assessment_questions_course_difficulty', 'course_id', 'difficulty'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': str(self.id),
+            'assessment_id': str(self.assessment_id),
+            'course_id': str(self.course_id) if self.course_id else None,
+            'lecture_id': str(self.lecture_id) if self.lecture_id else None,
+            'position': self.position,
+            'question': self.question,
+            'options': self.options,
+            'answer': self.answer,
+            'explanation': self.explanation,
+            'difficulty': self.difficulty,
+        }
 
 
 class Lecture(db.Model):
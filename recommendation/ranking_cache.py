@@ -0,0 +1,45 @@
+# recommendation/ranking_cache.py
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from recommendation.config import Config
+
+
+class _TTLCache:
+    """Thread-safe LRU whose entries also expire `ttl` seconds after they were stored."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items: "OrderedDict[Any, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Any, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+# Ranked courses per services.ranking_key (user, rating threshold, hybrid), per process. Rankings are not invalidated
+# when enrollments change: they are at most RECOMMENDATION_CACHE_TTL seconds old.
+rankings = _TTLCache(Config.RECOMMENDATION_CACHE_SIZE, Config.RECOMMENDATION_CACHE_TTL)
@@ -1,6 +1,11 @@
+import logging
 from flask import Blueprint, jsonify, request
 from flasgger.utils import swag_from
-from recommendation.services import get_recommendations_for_user
+from recommendation.config import Config
+from recommendation.content import similar_courses
+from recommendation.services import get_recommendations_page, pagination_args
+
+logger = logging.getLogger(__name__)
 
 recommendation_blueprint = Blueprint('recommendation', __name__)
 
@@ -8,13 +13,24 @@ recommendation_blueprint = Blueprint('recommendation', __name__)
 @swag_from({
     'responses': {
         200: {
-            'description': 'Return recommended course IDs for the user',
+            'description': 'Return recommended course IDs for the user, best first, with their scores',
             'examples': {
                 'application/json': {
                     'user_id': 'uuid-string',
-                    'recommendations': ['course-uuid-1', 'course-uuid-2']
+                    'recommendations': ['course-uuid-1', 'course-uuid-2'],
+                    'items': [
+                        {'course_id': 'course-uuid-1', 'score': 3.125},
+                        {'course_id': 'course-uuid-2', 'score': 1.8}
+                    ],
+                    'strategy': 'collaborative',
+                    'limit': 5,
+                    'offset': 0,
+                    'next_offset': 5
                 }
             }
+        },
+        400: {
+            'description': 'Missing user_id or invalid pagination parameters'
         }
     },
     'parameters': [
@@ -25,7 +41,9 @@ recommendation_blueprint = Blueprint('recommendation', __name__)
             'format': 'uuid',
             'required': True,
             'description': 'UUID of the user'
-        }
+        },
+        {'name': 'limit', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Page size (default 5)'},
+        {'name': 'offset', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Courses to skip'}
     ],
     'tags': ['Recommendations']
 })
@@ -34,7 +52,8 @@ def get_recommendations():
     Get course recommendations for a specific user.
 
     This endpoint returns a list of course UUIDs that are recommended
-    for the given user based on collaborative filtering.
+    for the given user based on collaborative filtering, ranked by score.
+    The ranking is cached for a few minutes, so next pages (offset) are not recomputed.
 
     ---
     produces:
@@ -51,9 +70,116 @@ def get_recommendations():
 
     if not user_id:
         return jsonify({'error': 'user_id is required'}), 400
+    limit, offset, error = pagination_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
+
+    page = get_recommendations_page(user_id, limit=limit, offset=offset)
+    return jsonify({
+        'user_id': user_id,
+        'recommendations': [item['course_id'] for item in page['items']],
+        **page
+    })
+
+
+@recommendation_blueprint.route('/hybrid_recommendations', methods=['GET'])
+@swag_from({
+    'responses': {
+        200: {
+            'description': 'Recommended courses blending collaborative and content-based (course embedding) scores',
+            'examples': {
+                'application/json': {
+                    'user_id': 'uuid-string',
+                    'recommendations': ['course-uuid-1', 'course-uuid-2'],
+                    'items': [
+                        {'course_id': 'course-uuid-1', 'score': 0.92, 'cf_score': 1.0, 'content_score': 0.8},
+                        {'course_id': 'course-uuid-2', 'score': 0.4, 'cf_score': 0.0, 'content_score': 1.0}
+                    ],
+                    'strategy': 'hybrid',
+                    'limit': 5,
+                    'offset': 0,
+                    'next_offset': 5
+                }
+            }
+        },
+        400: {
+            'description': 'Missing user_id or invalid pagination parameters'
+        }
+    },
+    'parameters': [
+        {'name': 'user_id', 'in': 'query', 'type': 'string', 'format': 'uuid', 'required': True,
+         'description': 'UUID of the user'},
+        {'name': 'limit', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Page size (default 5)'},
+        {'name': 'offset', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Courses to skip'}
+    ],
+    'tags': ['Recommendations']
+})
+def get_hybrid_recommendations():
+    """
+    Get course recommendations for a user, blending collaborative filtering with the
+    similarity of course contents to the courses the user is enrolled in.
+    Courses nobody has rated yet can be recommended from their content alone.
+    Falls back to the collaborative ranking if the vector search is unavailable.
+    """
+    user_id = request.args.get('user_id')
+
+    if not user_id:
+        return jsonify({'error': 'user_id is required'}), 400
+    limit, offset, error = pagination_args(request.args)
+    if error:
+        return jsonify({'error': error}), 400
 
-    recommendations = get_recommendations_for_user(user_id)
+    page = get_recommendations_page(user_id, limit=limit, offset=offset, hybrid=True)
     return jsonify({
         'user_id': user_id,
-        'recommendations': recommendations
+        'recommendations': [item['course_id'] for item in page['items']],
+        **page
+    })
+
+
+@recommendation_blueprint.route('/courses/<uuid:course_id>/similar', methods=['GET'])
+@swag_from({
+    'responses': {
+        200: {
+            'description': 'Courses with the most similar content (title, description, lectures, transcripts)',
+            'examples': {
+                'application/json': {
+                    'course_id': 'uuid-string',
+                    'similar': [{'course_id': 'course-uuid-1', 'score': 0.83}]
+                }
+            }
+        },
+        404: {
+            'description': 'The course has not been embedded yet'
+        },
+        503: {
+            'description': 'The vector search is unavailable'
+        }
+    },
+    'parameters': [
+        {'name': 'course_id', 'in': 'path', 'type': 'string', 'format': 'uuid', 'required': True,
+         'description': 'UUID of the course'},
+        {'name': 'limit', 'in': 'query', 'type': 'integer', 'required': False, 'description': 'Number of courses (default 10)'}
+    ],
+    'tags': ['Recommendations']
+})
+def get_similar_courses(course_id):
+    """
+    Get the courses most similar to a course, by nearest-neighbour search over the course embeddings.
+    """
+    limit = request.args.get('limit', 10, type=int)
+    if limit is None or limit < 1:
+        return jsonify({'error': 'limit must be positive'}), 400
+    limit = min(limit, Config.RECOMMENDATION_MAX_PAGE_SIZE)
+
+    try:
+        similar = similar_courses(course_id, limit=limit)
+    except Exception as e:
+        logger.error(f"Similar courses lookup failed for {course_id}: {e}")
+        return jsonify({'error': 'Vector search unavailable'}), 503
+    if similar is None:
+        return jsonify({'error': 'Course not found in the course embeddings'}), 404
+    return jsonify({
+        'course_id': str(course_id),
+        'similar': similar
     })
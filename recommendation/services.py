@@ -1,94 +1,236 @@
-import pandas as pd
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+import logging
+
+from recommendation.config import Config
+from recommendation.content import blend_rankings, profile_ranking
 from recommendation.database import db
 from recommendation.models import Enrollment
+from recommendation.ranking_cache import rankings
+from observability.tracing import span
+
+logger = logging.getLogger(__name__)
+
+
+def enrollment_record(user_id, course_id, progress, course_rating, student_score):
+    """One enrollment as used by the recommender (ids as strings, missing values as 0)."""
+    return {
+        'user_id': str(user_id),
+        'course_id': str(course_id),
+        'progress': progress if progress else 0.0,
+        'course_rating': course_rating if course_rating else 0.0,
+        'student_score': student_score if student_score else 0.0
+    }
+
+
+def load_enrollments():
+    """Loads the enrollment columns the recommender needs (blocking, through the ORM)."""
+    rows = db.session.query(
+        Enrollment.user_id,
+        Enrollment.course_id,
+        Enrollment.progress,
+        Enrollment.course_rating,
+        Enrollment.student_score
+    ).all()
+    return [enrollment_record(*row) for row in rows]
+
 
 def get_recommendations_for_user(user_id, top_n=5, rating_threshold=1.0):
     """
     Build a user-based CF system to recommend courses for a given user_id.
     If the user is new (cold start problem), fallback to popular courses.
+    Returns the ids of the top_n courses, best first.
     """
+    page = get_recommendations_page(user_id, limit=top_n, offset=0, rating_threshold=rating_threshold)
+    return [item['course_id'] for item in page['items']]
 
-    # 1. Query all enrollments
-    enrollments = Enrollment.query.all()
-    if not enrollments:
-        return []
 
-    # 2. Convert to DataFrame
-    data = []
-    for e in enrollments:
-        data.append({
-            'user_id': str(e.user_id),
-            'course_id': str(e.course_id),
-            'progress': e.progress if e.progress else 0.0,
-            'course_rating': e.course_rating if e.course_rating else 0.0,
-            'student_score': e.student_score if e.student_score else 0.0
-        })
-    df = pd.DataFrame(data)
+def ranking_key(user_id, rating_threshold=1.0, hybrid=False):
+    """
+    Key of a user's ranking in the ranking cache. The sync and async endpoints both build
+    it here, so they serve each other's cached rankings.
+    """
+    return (str(user_id), rating_threshold, hybrid)
 
-    # If the user_id does not exist in df, apply cold start strategy
-    if str(user_id) not in df['user_id'].unique():
-        return get_popular_courses(df, top_n)
-
-    # 3. Preprocessing (normalize & compute final_rating)
-    df['normalized_student_score'] = df['student_score'] / 50.0
-    df['normalized_progress'] = df['progress'] / 100.0
-
-    # Weighted formula: e.g. final_rating = 0.5 * course_rating + 0.3 * quiz_score + 0.2 * progress
-    df['final_rating'] = (0.5 * df['course_rating'] +
-                          0.3 * df['normalized_student_score'] +
-                          0.2 * df['normalized_progress'])
-
-    # 4. Create user-course matrix
-    user_course_matrix = df.pivot_table(
-        index='user_id',
-        columns='course_id',
-        values='final_rating',
-        aggfunc='mean'
-    ).fillna(0)
-
-    # 5. Compute cosine similarity between users
-    user_matrix = user_course_matrix.values
-    user_similarity = cosine_similarity(user_matrix)
-    user_similarity_df = pd.DataFrame(
-        user_similarity,
-        index=user_course_matrix.index,
-        columns=user_course_matrix.index
-    )
 
-    # 6. Find top similar users
-    target_user = str(user_id)
-    sim_scores = user_similarity_df.loc[target_user].drop(target_user).sort_values(ascending=False)
-    top_sim_users = sim_scores.head(5).index  # Top 3 similar users
+def get_recommendations_page(user_id, limit=5, offset=0, rating_threshold=1.0, hybrid=False):
+    """
+    One page of the user's ranked recommendations. The ranking (up to
+    Config.RECOMMENDATION_MAX_RESULTS courses) is computed on the first request and cached,
+    so later pages are slices of it.
+
+    :param hybrid: Blend the collaborative scores with content-based ones (course embeddings
+                   close to the user's courses, see recommendation/content.py).
+    :return: {"strategy", "items": [{"course_id", "score"}], "limit", "offset", "next_offset"}
+    """
+    key = ranking_key(user_id, rating_threshold, hybrid)
+    ranking = rankings.get(key)
+    if ranking is None:
+        # 1. Query all enrollments
+        with span("recommendations.load") as load_span:
+            data = load_enrollments()
+            load_span.set_attribute("rows", len(data))
+        ranking = rank_courses(data, user_id, Config.RECOMMENDATION_MAX_RESULTS, rating_threshold)
+        cacheable = True
+        if hybrid:
+            ranking, cacheable = hybrid_ranking(data, user_id, ranking)
+        if cacheable:
+            rankings.put(key, ranking)
+    return paginate(ranking, limit, offset)
+
+
+def hybrid_ranking(data, user_id, cf_ranking):
+    """
+    Blends cf_ranking with the content-based ranking of the user's profile.
+
+    :return: (ranking, cacheable): if the vector search fails the collaborative ranking is
+             returned as is, and shouldn't be cached in place of the hybrid one.
+    """
+    user_enrollments = [record for record in data if record['user_id'] == str(user_id)]
+    try:
+        content_items = profile_ranking(user_enrollments, Config.RECOMMENDATION_MAX_RESULTS)
+    except Exception as e:
+        logger.warning(f"Content-based recommendations unavailable, serving collaborative ones: {e}")
+        return cf_ranking, False
+    return blend_rankings(cf_ranking, content_items, Config.HYBRID_CF_WEIGHT), True
+
+
+def paginate(ranking, limit, offset):
+    """Slices a ranking returned by rank_courses."""
+    items = ranking['items'][offset:offset + limit]
+    return {
+        'strategy': ranking['strategy'],
+        'items': items,
+        'limit': limit,
+        'offset': offset,
+        'next_offset': offset + limit if offset + limit < len(ranking['items']) else None
+    }
+
+
+def pagination_args(args):
+    """
+    Reads limit/offset from request arguments.
+
+    :return: (limit, offset, error message or None); limit is capped at RECOMMENDATION_MAX_PAGE_SIZE.
+    """
+    limit = args.get('limit', 5, type=int)
+    offset = args.get('offset', 0, type=int)
+    if limit is None or offset is None or limit < 1 or offset < 0:
+        return None, None, 'limit must be positive and offset non-negative'
+    return min(limit, Config.RECOMMENDATION_MAX_PAGE_SIZE), offset, None
+
+
+def _top_indices(values, k):
+    """Indices of the k largest values, largest first: argpartition is O(n), only the k winners are sorted."""
+    import numpy as np
 
-    # 7. Check which courses target user has
-    target_user_ratings = user_course_matrix.loc[target_user]
+    if k < len(values):
+        candidates = np.argpartition(-values, k - 1)[:k]
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.argsort(-values[candidates], kind='stable')]
 
-    # 8. Collect recommended courses from similar users
-    recommended_courses = []
-    for sim_user in top_sim_users:
-        sim_user_ratings = user_course_matrix.loc[sim_user]
-        high_rated = sim_user_ratings[(sim_user_ratings > rating_threshold) & (target_user_ratings == 0)]
-        recommended_courses.extend(high_rated.index.tolist())
 
-    # Remove duplicates, limit to top_n
-    final_recommendations = list(set(recommended_courses))[:top_n]
+def rank_courses(data, user_id, max_results=100, rating_threshold=1.0, neighbours=None):
+    """
+    Ranks the courses to recommend to user_id, on already loaded enrollments.
+
+    A course's score is the similarity-weighted rating the user's nearest neighbours gave it
+    (ratings at or below rating_threshold count as 0), normalised by the neighbours' total
+    similarity. Courses the user already has are excluded. Unknown users, and users whose
+    neighbours suggest nothing, get the popular courses ranked by popularity score.
+
+    :return: {"strategy": "collaborative" | "popular", "items": [{"course_id", "score"}]}, best first.
+    """
+    # pandas/scikit-learn are imported on first use so they don't slow down app startup.
+    import numpy as np
+    import pandas as pd
+    from sklearn.metrics.pairwise import cosine_similarity
+
+    if not data:
+        return {'strategy': 'popular', 'items': []}
+    neighbours = neighbours or Config.RECOMMENDATION_NEIGHBOURS
+
+    # 2. Convert to DataFrame
+    with span("recommendations.dataframe", rows=len(data)):
+        df = pd.DataFrame(data)
+
+    # If the user_id does not exist in df, apply cold start strategy
+    target_user = str(user_id)
+    if target_user not in df['user_id'].unique():
+        with span("recommendations.fallback", reason="cold_start"):
+            return popular_ranking(df, max_results)
+
+    with span("recommendations.pivot") as pivot_span:
+        # 3. Preprocessing (normalize & compute final_rating)
+        df['normalized_student_score'] = df['student_score'] / 50.0
+        df['normalized_progress'] = df['progress'] / 100.0
+
+        # Weighted formula: e.g. final_rating = 0.5 * course_rating + 0.3 * quiz_score + 0.2 * progress
+        df['final_rating'] = (0.5 * df['course_rating'] +
+                              0.3 * df['normalized_student_score'] +
+                              0.2 * df['normalized_progress'])
+
+        # 4. Create user-course matrix
+        user_course_matrix = df.pivot_table(
+            index='user_id',
+            columns='course_id',
+            values='final_rating',
+            aggfunc='mean'
+        ).fillna(0)
+        pivot_span.set_attribute("users", user_course_matrix.shape[0])
+        pivot_span.set_attribute("courses", user_course_matrix.shape[1])
+
+    # 5. Cosine similarity between the target user and every user (one row, not the full users x users matrix)
+    with span("recommendations.similarity"):
+        ratings = user_course_matrix.to_numpy(dtype=np.float64)
+        target_index = user_course_matrix.index.get_loc(target_user)
+        similarities = cosine_similarity(ratings[target_index:target_index + 1], ratings)[0]
+        similarities[target_index] = -np.inf  # never its own neighbour
+
+    with span("recommendations.candidates") as candidates_span:
+        # 6. Nearest neighbours; only positive similarities carry weight
+        neighbour_indices = _top_indices(similarities, min(neighbours, len(similarities) - 1))
+        weights = np.clip(similarities[neighbour_indices], 0.0, None)
+
+        # 7. Similarity-weighted score of each course among the neighbours' high ratings
+        neighbour_ratings = ratings[neighbour_indices]
+        liked = np.where(neighbour_ratings > rating_threshold, neighbour_ratings, 0.0)
+        total_weight = weights.sum()
+        scores = weights @ liked / total_weight if total_weight > 0 else np.zeros(ratings.shape[1])
+
+        # 8. Drop the courses the user already has, keep the best max_results
+        scores[ratings[target_index] != 0] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        best = candidates[_top_indices(scores[candidates], min(max_results, len(candidates)))]
+        course_ids = user_course_matrix.columns
+        items = [{'course_id': course_ids[i], 'score': round(float(scores[i]), 4)} for i in best]
+        candidates_span.set_attribute("candidates", len(candidates))
 
     # If no recommendations found, fallback to popular courses
-    if not final_recommendations:
-        return get_popular_courses(df, top_n)
+    if not items:
+        with span("recommendations.fallback", reason="no_candidates"):
+            return popular_ranking(df, max_results)
 
-    return final_recommendations
+    return {'strategy': 'collaborative', 'items': items}
 
 
-def get_popular_courses(df, top_n=5):
+def _popularity(df):
+    """Courses sorted by popularity score (70% average rating, 30% enrollment count), best first."""
     course_popularity = df.groupby('course_id').agg(
         enrollments=('user_id', 'count'),
         avg_rating=('course_rating', 'mean')
     )
     course_popularity['popularity_score'] = (0.7 * course_popularity['avg_rating']) + (0.3 * course_popularity['enrollments'])
-    popular_courses = course_popularity.sort_values(by='popularity_score', ascending=False).index.tolist()
+    return course_popularity['popularity_score'].sort_values(ascending=False, kind='stable')
+
 
-    return popular_courses[:max(top_n, len(popular_courses))]  # Ensure at least `top_n` courses
+def popular_ranking(df, max_results=100):
+    """rank_courses result for the popular-courses fallback."""
+    scores = _popularity(df).head(max_results)
+    return {
+        'strategy': 'popular',
+        'items': [{'course_id': course_id, 'score': round(float(score), 4)} for course_id, score in scores.items()]
+    }
 
+
+def get_popular_courses(df, top_n=5):
+    return _popularity(df).index[:top_n].tolist()
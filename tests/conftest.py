@@ -0,0 +1,20 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def redis_client(monkeypatch):
+    """A fresh in-process Redis (fakeredis, with Lua scripting) behind quiz.redis_ops.get_redis()."""
+    import fakeredis
+    from quiz import redis_ops
+
+    client = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(redis_ops, "_client", client)
+    return client
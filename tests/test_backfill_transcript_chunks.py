@@ -0,0 +1,51 @@
+# tests/test_backfill_transcript_chunks.py
+import pytest
+from qdrant_client import QdrantClient, models
+
+from quiz import qdrant_ops
+from quiz.backfill_transcript_chunks import backfill_lecture
+from quiz.config import Config
+from quiz.qdrant_ops import chunk_point_id, ensure_transcript_chunks_collection
+
+LECTURE = "lecture-1"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(qdrant_ops, "_ensured_collections", set())
+    monkeypatch.setattr(qdrant_ops, "_sparse_collections", {})
+    client = QdrantClient(location=":memory:")
+    ensure_transcript_chunks_collection(client)
+    client.create_collection(f"lecture_{LECTURE}", vectors_config=models.VectorParams(
+        size=Config.EMBEDDING_DIMENSION, distance=models.Distance.COSINE))
+    return client
+
+
+def vector(i):
+    return [1.0 if j == i else 0.0 for j in range(Config.EMBEDDING_DIMENSION)]
+
+
+def test_legacy_chunks_get_distinct_indexes_across_pages(client):
+    # Older points: integer ids in lecture order, no chunk_index; more than one scroll page.
+    count = 300
+    client.upsert(f"lecture_{LECTURE}", points=[
+        models.PointStruct(id=i, vector=vector(i), payload={"text": f"chunk {i}"}) for i in range(count)
+    ])
+    assert backfill_lecture(client, "course-1", LECTURE) == count
+    assert client.count(Config.TRANSCRIPT_CHUNKS_COLLECTION).count == count
+
+    copied = client.retrieve(Config.TRANSCRIPT_CHUNKS_COLLECTION, ids=[chunk_point_id(LECTURE, 7)])
+    assert copied[0].payload["text"] == "chunk 7"
+    assert copied[0].payload["chunk_index"] == 7
+    assert copied[0].payload["course_id"] == "course-1"
+
+
+def test_existing_chunk_indexes_are_kept(client):
+    client.upsert(f"lecture_{LECTURE}", points=[
+        models.PointStruct(id=chunk_point_id(LECTURE, i), vector=vector(i),
+                           payload={"text": f"chunk {i}", "chunk_index": i})
+        for i in (3, 5)
+    ])
+    assert backfill_lecture(client, "course-1", LECTURE) == 2
+    copied = client.retrieve(Config.TRANSCRIPT_CHUNKS_COLLECTION, ids=[chunk_point_id(LECTURE, 5)])
+    assert copied[0].payload["text"] == "chunk 5"
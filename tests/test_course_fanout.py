@@ -0,0 +1,125 @@
+# tests/test_course_fanout.py
+"""Course fan-out bookkeeping: lecture markers, course slots and the chord's error handler."""
+import pytest
+import redis
+
+from quiz import dispatch, jobs, task
+from quiz.config import Config
+from quiz.celery_app import FAIL_COURSE_JOB_TASK
+from quiz.jobs import LECTURE_JOB_KEY
+from quiz.local_backends import MemoryQuizStore
+
+QUIZ = [{"question": "What defines a function?", "options": ["def", "func"], "answer": "def",
+         "explanation": "", "difficulty": "Easy"}]
+
+
+class FakeChord:
+    submitted = []
+
+    def __init__(self, header, body):
+        self.header, self.body = header, body
+
+    def apply_async(self):
+        FakeChord.submitted.append(self)
+
+
+@pytest.fixture
+def course(redis_client, monkeypatch):
+    """Submits a two-lecture course; returns (course_job, lecture jobs, chord callback)."""
+    monkeypatch.setattr(dispatch, "chord", FakeChord)
+    monkeypatch.setattr(Config, "QUIZ_STORE_BACKEND", "memory")
+    monkeypatch.setattr(Config, "QUESTION_BANK_ENABLED", False)
+    FakeChord.submitted = []
+    course_job = dispatch.submit_course_job("course-1", [("lecture-1", "a.mp4"), ("lecture-2", "b.mp4")],
+                                            max_concurrency=1)
+    submitted = FakeChord.submitted[0]
+    lecture_jobs = [lecture_chain.tasks[0].args[0] for lecture_chain in submitted.header.tasks]
+    return course_job, lecture_jobs, submitted.body
+
+
+def generated(job):
+    """The job as the generate stage hands it to persist_task."""
+    job = dict(job, status="running", quiz=QUIZ)
+    job.setdefault("stages", {})
+    return job
+
+
+def test_callback_has_error_handler(course):
+    course_job, _, callback = course
+    errbacks = callback.options["link_error"]
+    assert [errback["task"] for errback in errbacks] == [FAIL_COURSE_JOB_TASK]
+    assert errbacks[0]["args"][0]["job_id"] == course_job["job_id"]
+
+
+def test_marker_is_kept_until_the_course_commits(course, redis_client):
+    course_job, lecture_jobs, _ = course
+    finished = [task.persist_task(generated(job)) for job in lecture_jobs]
+    assert all(job["status"] == "persisting" for job in finished)
+    assert redis_client.get(LECTURE_JOB_KEY.format("lecture-1")) == lecture_jobs[0]["job_id"]
+    # The slot is handed back at once: the course's other lectures may be waiting for it.
+    assert redis_client.zcard(lecture_jobs[0]["slot"]["name"]) == 0
+
+    summary = task.collect_course_results(finished, course_job)
+    assert summary["succeeded"] == 2
+    assert redis_client.get(LECTURE_JOB_KEY.format("lecture-1")) is None
+    assert set(MemoryQuizStore.quizzes) >= {"lecture-1", "lecture-2"}
+
+
+def test_error_handler_persists_finished_lectures(course, redis_client):
+    course_job, lecture_jobs, _ = course
+    MemoryQuizStore.quizzes.pop("lecture-1", None)
+    task.persist_task(generated(lecture_jobs[0]))
+    # lecture-2's chain raised before reaching persist_task.
+
+    summary = task.fail_course_job(None, RuntimeError("worker lost"), None, course_job)
+    assert summary["succeeded"] == 1
+    assert [failure["lecture_id"] for failure in summary["failed"]] == ["lecture-2"]
+    assert "lecture-1" in MemoryQuizStore.quizzes
+    assert jobs.get_job(course_job["job_id"])["status"] == "error"
+    assert redis_client.get(LECTURE_JOB_KEY.format("lecture-1")) is None
+    assert redis_client.get(LECTURE_JOB_KEY.format("lecture-2")) is None
+
+
+def test_redis_errors_around_slots_do_not_break_the_chain(course, monkeypatch):
+    _, lecture_jobs, _ = course
+
+    def unavailable(*args, **kwargs):
+        raise redis.ConnectionError("connection refused")
+
+    monkeypatch.setattr(task.Semaphore, "renew", unavailable)
+    monkeypatch.setattr(task.Semaphore, "release", unavailable)
+    job = task.persist_task(generated(lecture_jobs[0]))
+    assert job["status"] == "persisting"
+
+
+def test_resubmitted_course_runs_until_attached_lectures_finish(course, redis_client):
+    _, lecture_jobs, _ = course
+    FakeChord.submitted = []
+    resubmitted = dispatch.submit_course_job("course-1", [("lecture-1", "a.mp4"), ("lecture-2", "b.mp4")])
+    # Both lectures are attached to the jobs in flight; no chord is started.
+    assert FakeChord.submitted == []
+    assert resubmitted["lecture_jobs"] == [job["job_id"] for job in lecture_jobs]
+    assert jobs.get_job(resubmitted["job_id"])["status"] == "running"
+
+    jobs.save_job(dict(lecture_jobs[0], status="success"))
+    assert jobs.get_job(resubmitted["job_id"])["status"] == "running"
+    jobs.save_job(dict(lecture_jobs[1], status="error", error={"stage": "download", "message": "404"}))
+    course_job = jobs.get_job(resubmitted["job_id"])
+    assert course_job["status"] == "partial"
+    assert course_job["summary"]["total"] == 2
+    assert [failure["lecture_id"] for failure in course_job["summary"]["failed"]] == ["lecture-2"]
+
+
+def test_summary_counts_attached_lectures(course, redis_client):
+    course_job, lecture_jobs, _ = course
+    FakeChord.submitted = []
+    mixed = dispatch.submit_course_job("course-1", [("lecture-1", "a.mp4"), ("lecture-3", "c.mp4")])
+    new_job = FakeChord.submitted[0].header.tasks[0].tasks[0].args[0]
+    finished = task.persist_task(generated(new_job))
+    task.collect_course_results([finished], mixed)
+    # lecture-1 belongs to the first submission and is still in flight.
+    assert jobs.get_job(mixed["job_id"])["status"] == "running"
+
+    jobs.save_job(dict(lecture_jobs[0], status="success"))
+    summary = jobs.get_job(mixed["job_id"])["summary"]
+    assert summary["total"] == 2 and summary["succeeded"] == 2
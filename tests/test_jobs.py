@@ -0,0 +1,61 @@
+# tests/test_jobs.py
+import json
+
+from quiz import jobs
+from quiz.jobs import JOB_KEY, LECTURE_JOB_KEY, claim_lecture, release_lecture
+
+
+def store_job(redis_client, job_id, status):
+    redis_client.set(JOB_KEY.format(job_id), json.dumps({"job_id": job_id, "kind": "lecture", "status": status}))
+
+
+def test_first_claim_succeeds(redis_client):
+    assert claim_lecture("lecture-1", "job-a") is None
+    assert redis_client.get(LECTURE_JOB_KEY.format("lecture-1")) == "job-a"
+
+
+def test_claim_returns_job_in_flight(redis_client):
+    store_job(redis_client, "job-a", "running")
+    assert claim_lecture("lecture-1", "job-a") is None
+    assert claim_lecture("lecture-1", "job-b") == "job-a"
+
+
+def test_claim_takes_over_finished_job(redis_client):
+    store_job(redis_client, "job-a", "success")
+    claim_lecture("lecture-1", "job-a")
+    assert claim_lecture("lecture-1", "job-b") is None
+    assert redis_client.get(LECTURE_JOB_KEY.format("lecture-1")) == "job-b"
+
+
+def test_claim_takes_over_expired_job_record(redis_client):
+    # Marker left behind by a crashed worker whose job record expired.
+    redis_client.set(LECTURE_JOB_KEY.format("lecture-1"), "job-a")
+    assert claim_lecture("lecture-1", "job-b") is None
+    assert redis_client.get(LECTURE_JOB_KEY.format("lecture-1")) == "job-b"
+
+
+def test_concurrent_takeover_runs_lecture_once(redis_client, monkeypatch):
+    store_job(redis_client, "job-a", "error")
+    redis_client.set(LECTURE_JOB_KEY.format("lecture-1"), "job-a")
+    get_job = jobs.get_job
+    raced = []
+
+    def racing_get_job(job_id):
+        # Another submitter takes over the stale marker between our read and our write.
+        if not raced:
+            raced.append(True)
+            store_job(redis_client, "job-c", "queued")
+            redis_client.set(LECTURE_JOB_KEY.format("lecture-1"), "job-c")
+        return get_job(job_id)
+
+    monkeypatch.setattr(jobs, "get_job", racing_get_job)
+    assert claim_lecture("lecture-1", "job-b") == "job-c"
+    assert redis_client.get(LECTURE_JOB_KEY.format("lecture-1")) == "job-c"
+
+
+def test_release_only_clears_own_marker(redis_client):
+    claim_lecture("lecture-1", "job-a")
+    release_lecture("lecture-1", "job-b")
+    assert redis_client.get(LECTURE_JOB_KEY.format("lecture-1")) == "job-a"
+    release_lecture("lecture-1", "job-a")
+    assert redis_client.get(LECTURE_JOB_KEY.format("lecture-1")) is None
@@ -0,0 +1,157 @@
+# tests/test_llm_gateway.py
+"""LLMGateway against the real Groq client, with HTTP answered by an httpx mock transport."""
+import json
+import time
+import asyncio
+import functools
+
+import groq
+import httpx
+import pytest
+
+from quiz.config import Config
+from quiz.llm_gateway import LLMGateway, TokenBucket
+
+USAGE = {"prompt_tokens": 60, "completion_tokens": 40, "total_tokens": 100}
+
+
+def completion_body(content="Question: ...", usage=USAGE):
+    return {
+        "id": "chatcmpl-1", "object": "chat.completion", "created": 0, "model": "test-model",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": usage,
+    }
+
+
+def stream_body(parts, usage=USAGE):
+    events = []
+    for i, part in enumerate(parts):
+        chunk = {
+            "id": "chatcmpl-1", "object": "chat.completion.chunk", "created": 0, "model": "test-model",
+            "choices": [{"index": 0, "delta": {"content": part}, "finish_reason": None}],
+        }
+        if i == len(parts) - 1:
+            chunk["x_groq"] = {"id": "req-1", "usage": usage}
+        events.append(f"data: {json.dumps(chunk)}\n\n")
+    events.append("data: [DONE]\n\n")
+    return "".join(events).encode()
+
+
+class FakeGroq:
+    """Serves the queued responses in order and counts the requests."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(json.loads(request.content))
+        return self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+
+@pytest.fixture(autouse=True)
+def fast_config(monkeypatch):
+    monkeypatch.setattr(Config, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "LLM_RECORD_FILE", None)
+    monkeypatch.setattr(Config, "GROQ_BACKOFF_BASE", 0.01)
+    monkeypatch.setattr(Config, "GROQ_BACKOFF_MAX", 0.05)
+
+
+@pytest.fixture
+def fake_groq(monkeypatch):
+    def install(*responses):
+        fake = FakeGroq(responses)
+        http_client = httpx.AsyncClient(transport=httpx.MockTransport(fake))
+        monkeypatch.setattr(groq, "AsyncGroq", functools.partial(groq.AsyncGroq, http_client=http_client))
+        return fake
+    return install
+
+
+def make_gateway(**kwargs):
+    kwargs.setdefault("requests_per_minute", 6000)
+    kwargs.setdefault("tokens_per_minute", 600000)
+    return LLMGateway("test-key", model="test-model", **kwargs)
+
+
+def test_bucket_limits_rate():
+    async def run():
+        bucket = TokenBucket(per_minute=600, capacity=2)  # 10 tokens/s
+        start = time.monotonic()
+        for _ in range(4):
+            await bucket.acquire(1)
+        return time.monotonic() - start
+
+    # Two tokens are available at once, the next two take 0.1 s each.
+    assert 0.15 <= asyncio.run(run()) < 1.0
+
+
+def test_waiting_caller_does_not_block_one_that_fits():
+    async def run():
+        bucket = TokenBucket(per_minute=600, capacity=10)
+        bucket.tokens = 5
+        large = asyncio.create_task(bucket.acquire(10))  # waits ~0.5 s for refill
+        await asyncio.sleep(0.01)
+        start = time.monotonic()
+        await bucket.acquire(2)
+        small_wait = time.monotonic() - start
+        await asyncio.wait_for(large, timeout=2)
+        return small_wait
+
+    assert asyncio.run(run()) < 0.05
+
+
+def test_reservation_larger_than_capacity_is_capped():
+    async def run():
+        bucket = TokenBucket(per_minute=600, capacity=10)
+        return await asyncio.wait_for(bucket.acquire(50), timeout=1)
+
+    assert asyncio.run(run()) == 10
+
+
+def test_complete_returns_text_and_refunds_unused_tokens(fake_groq):
+    fake_groq(httpx.Response(200, json=completion_body("hello")))
+    gateway = make_gateway(tokens_per_minute=60000)
+    assert gateway.complete("prompt", max_tokens=1000) == "hello"
+    # Only the reported usage stays taken (plus a little refill while the test ran).
+    assert 60000 - 100 <= gateway._token_bucket.tokens <= 60000 - 100 + 50
+
+
+def test_retries_rate_limit_then_succeeds(fake_groq):
+    rate_limited = httpx.Response(429, headers={"retry-after": "0"}, json={"error": {"message": "slow down"}})
+    fake = fake_groq(rate_limited, rate_limited, httpx.Response(200, json=completion_body("ok")))
+    gateway = make_gateway(max_retries=3)
+    assert gateway.complete("prompt") == "ok"
+    assert len(fake.requests) == 3
+
+
+def test_gives_up_after_max_retries_and_refunds(fake_groq):
+    fake = fake_groq(httpx.Response(503, json={"error": {"message": "unavailable"}}))
+    gateway = make_gateway(max_retries=2, tokens_per_minute=60000)
+    with pytest.raises(groq.InternalServerError):
+        gateway.complete("prompt", max_tokens=1000)
+    assert len(fake.requests) == 3
+    assert gateway._token_bucket.tokens >= 60000 - 1
+
+
+def test_client_errors_are_not_retried(fake_groq):
+    fake = fake_groq(httpx.Response(400, json={"error": {"message": "bad request"}}))
+    gateway = make_gateway(max_retries=3)
+    with pytest.raises(groq.BadRequestError):
+        gateway.complete("prompt")
+    assert len(fake.requests) == 1
+
+
+def test_backoff_respects_retry_after():
+    from quiz.llm_gateway import _backoff_delay
+
+    error = groq.RateLimitError("slow down", response=httpx.Response(
+        429, headers={"retry-after": "7"}, request=httpx.Request("POST", "https://api.groq.com")), body=None)
+    assert _backoff_delay(error, attempt=0) == 7
+
+
+def test_stream_refunds_by_reported_usage(fake_groq):
+    fake_groq(httpx.Response(200, content=stream_body(["Ques", "tion"]),
+                             headers={"content-type": "text/event-stream"}))
+    gateway = make_gateway(tokens_per_minute=60000)
+    assert "".join(gateway.stream("prompt", max_tokens=1000)) == "Question"
+    assert 60000 - 100 <= gateway._token_bucket.tokens <= 60000 - 100 + 50
@@ -0,0 +1,56 @@
+# tests/test_pipeline_smoke.py
+"""
+End-to-end smoke test of the quiz pipeline on the local backends (quiz/local_backends.py):
+embedded Qdrant, hashing embedder, replayed completions, fixture transcripts and the
+in-memory quiz store, the same setup as benchmarks/bench_pipeline.py.
+"""
+import os
+
+import pytest
+
+from benchmarks.bench_pipeline import DEFAULT_REPLAY, corpus_sentences, write_fixtures
+from quiz import pipeline, qdrant_ops
+from quiz.config import Config
+from quiz.local_backends import MemoryQuizStore, get_replay_llm
+
+
+@pytest.fixture
+def local_backends(redis_client, tmp_path, monkeypatch):
+    for name, value in {
+        "QDRANT_URL": ":memory:",
+        "QDRANT_PATH": None,
+        "EMBEDDING_BACKEND": "hashing",
+        "LLM_BACKEND": "replay",
+        "LLM_REPLAY_FILE": DEFAULT_REPLAY,
+        "LLM_RECORD_FILE": None,
+        "LLM_CACHE_ENABLED": False,
+        "TRANSCRIPTION_BACKEND": "fixture",
+        "QUIZ_STORE_BACKEND": "memory",
+        "OUTPUT_DIRECTORY": str(tmp_path / "output"),
+        "TRANSCRIPT_DIRECTORY": str(tmp_path / "transcripts"),
+    }.items():
+        monkeypatch.setattr(Config, name, value)
+    # Fresh process-wide clients: an empty embedded Qdrant and the hashing embedder.
+    for cached in (qdrant_ops._qdrant_client, qdrant_ops.get_embedding_model, get_replay_llm):
+        cached.cache_clear()
+    monkeypatch.setattr(qdrant_ops, "_ensured_collections", set())
+    monkeypatch.setattr(qdrant_ops, "_sparse_collections", {})
+    monkeypatch.setattr(MemoryQuizStore, "quizzes", {})
+    yield tmp_path
+    for cached in (qdrant_ops._qdrant_client, qdrant_ops.get_embedding_model, get_replay_llm):
+        cached.cache_clear()
+
+
+def test_every_lecture_gets_a_quiz(local_backends):
+    lectures = write_fixtures(str(local_backends / "videos"), 3, 40, corpus_sentences(DEFAULT_REPLAY))
+    jobs = [pipeline.run_pipeline(pipeline.new_job(*lecture)) for lecture in lectures]
+
+    for job in jobs:
+        assert job["status"] == "success", job["error"]
+        assert set(job["stages"]) == set(pipeline.STAGE_NAMES)
+        stored = MemoryQuizStore.quizzes[job["lecture_id"]]
+        assert job["quiz"]
+        assert stored["quiz"] == job["quiz"] and stored["course_id"] == job["course_id"]
+        assert all({"question", "options", "answer"} <= set(question) for question in job["quiz"])
+        # The transcript is kept for re-embedding.
+        assert os.path.isfile(job["transcript_path"])
@@ -0,0 +1,112 @@
+# tests/test_question_bank.py
+"""QuestionBank on an embedded Qdrant with the hashing embedder, and its use by the pipeline."""
+import pytest
+from qdrant_client import QdrantClient
+
+from quiz import pipeline
+from quiz.config import Config
+from quiz.local_backends import HashingEmbedder, MemoryQuizStore
+from quiz.question_bank import QuestionBank
+
+COURSE, LECTURE, OTHER_LECTURE = "course-1", "lecture-1", "lecture-2"
+
+
+def questions(*texts):
+    return [{"question": text, "options": ["a", "b"], "answer": "a", "explanation": "", "difficulty": "Easy"}
+            for text in texts]
+
+
+QUIZ = questions("What does a Python decorator wrap?", "How is a list comprehension evaluated?")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = QdrantClient(location=":memory:")
+    monkeypatch.setattr(pipeline, "get_qdrant_client", lambda url=None: client)
+    return client
+
+
+@pytest.fixture
+def bank(client):
+    return QuestionBank(client, HashingEmbedder(Config.EMBEDDING_DIMENSION))
+
+
+def test_rejects_questions_already_in_the_course(bank):
+    bank.add(COURSE, OTHER_LECTURE, QUIZ[:1], bank.embed(QUIZ[:1]))
+    fresh, embeddings = bank.filter_fresh(COURSE, QUIZ)
+    assert fresh == QUIZ[1:]
+    assert embeddings.shape == (1, Config.EMBEDDING_DIMENSION)
+
+
+def test_ignores_other_courses(bank):
+    bank.add("course-2", OTHER_LECTURE, QUIZ, bank.embed(QUIZ))
+    fresh, _ = bank.filter_fresh(COURSE, QUIZ)
+    assert fresh == QUIZ
+
+
+def test_add_keeps_the_lectures_earlier_questions(bank, client):
+    bank.add(COURSE, LECTURE, QUIZ[:1], bank.embed(QUIZ[:1]))
+    bank.add(COURSE, LECTURE, QUIZ[1:], bank.embed(QUIZ[1:]))
+    assert client.count(Config.QUESTION_BANK_COLLECTION).count == len(QUIZ)
+
+
+class FakeGenerator:
+    """Stands in for MCQGenerator: serves the queued quizzes and records use_cache."""
+    quizzes = []
+    calls = []
+
+    def __init__(self, api_key, qdrant_url, qdrant_collection):
+        self.qdrant_client = pipeline.get_qdrant_client(qdrant_url)
+        self.embedding_model = HashingEmbedder(Config.EMBEDDING_DIMENSION)
+
+    def generate_mcqs(self, query, num_questions, use_cache=True):
+        FakeGenerator.calls.append(use_cache)
+        return {"status": "success", "quiz": FakeGenerator.quizzes.pop(0)}
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    monkeypatch.setattr(pipeline, "MCQGenerator", FakeGenerator)
+    monkeypatch.setattr(Config, "QUESTION_BANK_ENABLED", True)
+    monkeypatch.setattr(Config, "QUIZ_STORE_BACKEND", "memory")
+    FakeGenerator.calls = []
+    return FakeGenerator
+
+
+def new_job():
+    job = pipeline.new_job(COURSE, LECTURE, "video.mp4")
+    job["status"] = "running"
+    return job
+
+
+def test_bank_is_filled_only_after_persist(client, bank, generator):
+    generator.quizzes = [QUIZ]
+    job = pipeline.generate_stage(new_job())
+    assert job["quiz"] == QUIZ
+    assert not client.collection_exists(Config.QUESTION_BANK_COLLECTION) \
+        or client.count(Config.QUESTION_BANK_COLLECTION).count == 0
+
+    job = pipeline.persist_stage(job)
+    assert job["status"] == "success"
+    assert MemoryQuizStore.quizzes[LECTURE]
+    assert client.count(Config.QUESTION_BANK_COLLECTION).count == len(QUIZ)
+    assert "question_embeddings" not in job
+
+
+def test_regenerates_without_cache_when_every_candidate_is_rejected(bank, generator):
+    bank.add(COURSE, OTHER_LECTURE, QUIZ, bank.embed(QUIZ))
+    fresh_quiz = questions("Which HTTP method is idempotent by definition?")
+    generator.quizzes = [QUIZ, fresh_quiz]
+    job = pipeline.generate_stage(new_job())
+    assert generator.calls == [True, False]
+    assert job["quiz"] == fresh_quiz
+
+
+def test_repeat_of_the_lectures_previous_quiz_is_regenerated_without_cache(bank, generator):
+    # The lecture's previous quiz is in the bank; the cached completion serves it again.
+    bank.add(COURSE, LECTURE, QUIZ, bank.embed(QUIZ))
+    fresh_quiz = questions("Which HTTP method is idempotent by definition?")
+    generator.quizzes = [QUIZ, fresh_quiz]
+    job = pipeline.generate_stage(new_job())
+    assert generator.calls == [True, False]
+    assert job["quiz"] == fresh_quiz
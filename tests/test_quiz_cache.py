@@ -0,0 +1,69 @@
+# tests/test_quiz_cache.py
+import pytest
+
+from quiz.config import Config
+from quiz.llm_cache import set_content_hash
+from quiz.quiz import MCQGenerator, LECTURE_QUIZ_QUERY
+
+QUIZ = [{"question": "What defines a function?", "options": ["def", "func"], "answer": "def",
+         "explanation": "", "difficulty": "Easy"}]
+
+
+@pytest.fixture
+def generator(redis_client, monkeypatch):
+    monkeypatch.setattr(Config, "LLM_CACHE_ENABLED", True)
+    gen = MCQGenerator(api_key="test-key", qdrant_url=":memory:", qdrant_collection="lecture_1")
+
+    def no_retrieval(*args, **kwargs):
+        raise AssertionError("retrieval must not run on a cache hit")
+
+    monkeypatch.setattr(gen, "retrieve_content", no_retrieval)
+    monkeypatch.setattr(gen, "fetch_lecture_chunks", no_retrieval)
+    return gen
+
+
+def cache_for(gen, num_questions=5, retrieval="coverage"):
+    key = gen.quiz_cache_key(LECTURE_QUIZ_QUERY, num_questions, retrieval, False)
+    gen.cache_quiz(key, QUIZ)
+
+
+def test_hit_is_served_before_retrieval(generator, monkeypatch):
+    monkeypatch.setattr(Config, "QUIZ_RETRIEVAL_MODE", "coverage")
+    set_content_hash("lecture_1", "hash-1")
+    cache_for(generator)
+    result = generator.generate_mcqs(LECTURE_QUIZ_QUERY, num_questions=5)
+    assert result["status"] == "success"
+    assert result["quiz"] == QUIZ
+    assert result["metadata"]["cached"] is True
+
+
+def test_streamed_hit_is_served_before_retrieval(generator):
+    set_content_hash("lecture_1", "hash-1")
+    cache_for(generator, retrieval="coverage")
+    assert list(generator.stream_mcqs(LECTURE_QUIZ_QUERY, 5, retrieval="coverage")) == QUIZ
+
+
+def test_changed_content_misses(generator, monkeypatch):
+    set_content_hash("lecture_1", "hash-1")
+    cache_for(generator)
+    set_content_hash("lecture_1", "hash-2")
+    with pytest.raises(AssertionError, match="retrieval"):
+        generator.generate_mcqs(LECTURE_QUIZ_QUERY, num_questions=5, retrieval="coverage")
+
+
+def test_other_settings_miss(generator):
+    set_content_hash("lecture_1", "hash-1")
+    cache_for(generator, num_questions=5)
+    with pytest.raises(AssertionError, match="retrieval"):
+        generator.generate_mcqs(LECTURE_QUIZ_QUERY, num_questions=8, retrieval="coverage")
+
+
+def test_use_cache_false_regenerates(generator):
+    set_content_hash("lecture_1", "hash-1")
+    cache_for(generator)
+    with pytest.raises(AssertionError, match="retrieval"):
+        generator.generate_mcqs(LECTURE_QUIZ_QUERY, num_questions=5, use_cache=False, retrieval="coverage")
+
+
+def test_unknown_content_hash_has_no_key(generator):
+    assert generator.quiz_cache_key(LECTURE_QUIZ_QUERY, 5, "coverage", False) is None
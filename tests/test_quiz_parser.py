@@ -0,0 +1,86 @@
+# tests/test_quiz_parser.py
+import json
+
+import pytest
+
+from quiz.quiz import QuizParser
+
+COMPLETION = """Question:
+What keyword defines a function in Python?
+(A) def
+(B) func
+(C) lambda
+(D) define
+Correct Answer: (A)
+Explanation: Functions are declared with the def keyword.
+Difficulty: Easy
+---
+Question 2: Which built-in returns the length of a list?
+(A) size()
+(B) len()
+Correct Answer: (B) len()
+Explanation: len() works on any container.
+Difficulty: medium
+---
+"""
+
+
+@pytest.fixture
+def parser():
+    return QuizParser()
+
+
+def test_parses_every_field(parser):
+    first, second = parser.parse(COMPLETION)
+    assert first == {
+        "question": "What keyword defines a function in Python?",
+        "options": ["def", "func", "lambda", "define"],
+        "answer": "def",
+        "explanation": "Functions are declared with the def keyword.",
+        "difficulty": "Easy",
+    }
+    assert second["question"] == "Which built-in returns the length of a list?"
+    assert second["options"] == ["size()", "len()"]
+    assert second["answer"] == "len()"
+    assert second["difficulty"] == "Medium"
+
+
+def test_labels_are_case_insensitive(parser):
+    [question] = parser.parse("QUESTION: Why?\n(a) Because\n(b) No\ncorrect answer: (a)\nDIFFICULTY: HARD")
+    assert question["options"] == ["Because", "No"]
+    assert question["answer"] == "Because"
+    assert question["difficulty"] == "Hard"
+
+
+def test_first_occurrence_of_a_field_wins(parser):
+    [question] = parser.parse("Question: Q?\n(A) x\n(A) y\n(B) z\nCorrect Answer: (B)\nCorrect Answer: (A)")
+    assert question["options"] == ["x", "z"]
+    assert question["answer"] == "z"
+
+
+def test_unknown_answer_letter_gives_empty_answer(parser):
+    [question] = parser.parse("Question: Q?\n(A) x\n(B) y\nCorrect Answer: (D)")
+    assert question["answer"] == ""
+
+
+def test_blocks_without_a_question_are_skipped(parser):
+    assert parser.parse("Here are your questions:\n---\n\n---\nQuestion: Q?\n(A) x") == []
+    assert len(parser.parse("Intro text\n---\n" + COMPLETION)) == 2
+
+
+def test_parse_json_matches_text_format(parser):
+    quiz_json = json.dumps({"questions": [{
+        "question": "What keyword defines a function in Python?",
+        "options": {"A": "def", "B": "func", "C": "lambda", "D": "define"},
+        "correct_answer": "(A)",
+        "explanation": "Functions are declared with the def keyword.",
+        "difficulty": "easy",
+    }]})
+    assert parser.parse_json(quiz_json) == parser.parse(COMPLETION)[:1]
+
+
+def test_parse_json_accepts_option_lists_and_skips_empty_items(parser):
+    quiz_json = json.dumps([{"question": "Q?", "options": ["x", "y"], "correct_answer": "B"}, {"question": ""}])
+    [question] = parser.parse_json(quiz_json)
+    assert question["options"] == ["x", "y"]
+    assert question["answer"] == "y"
@@ -0,0 +1,75 @@
+# tests/test_quiz_stream.py
+import json
+import os
+
+import pytest
+
+from quiz.config import Config
+from quiz.quiz import IncrementalQuizParser, MCQGenerator, QuizParser
+
+CORPUS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                      "benchmarks", "data", "quiz_completions.jsonl")
+LECTURE_ID = "5b6c1c1e-6f0e-4f7a-9d5e-1a2b3c4d5e6f"
+
+
+def completions():
+    with open(CORPUS, "r", encoding="utf-8") as f:
+        return [json.loads(line)["completion"] for line in f if line.strip()]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 16, 1000])
+def test_incremental_parser_matches_full_parse(chunk_size):
+    parser = QuizParser()
+    for completion in completions():
+        incremental = IncrementalQuizParser(parser)
+        streamed = []
+        for start in range(0, len(completion), chunk_size):
+            streamed.extend(incremental.feed(completion[start:start + chunk_size]))
+        streamed.extend(incremental.close())
+        assert streamed == parser.parse(completion)
+
+
+def test_incremental_parser_emits_question_when_delimiter_arrives():
+    incremental = IncrementalQuizParser()
+    assert incremental.feed("Question: What is 2+2?\n(A) 3\n(B) 4\nCorrect Answer: (B)\n--") == []
+    questions = incremental.feed("-\nQuestion: Next?")
+    assert [q["question"] for q in questions] == ["What is 2+2?"]
+    assert questions[0]["answer"] == "4"
+
+
+@pytest.fixture
+def client():
+    from app import create_app
+
+    app = create_app()
+    app.config["TESTING"] = True
+    return app.test_client()
+
+
+@pytest.fixture
+def streamed_calls(monkeypatch):
+    calls = []
+
+    def fake_stream(self, query, num_questions=5, use_cache=True, retrieval=None):
+        calls.append({"collection": self.qdrant_collection, "num_questions": num_questions})
+        yield {"question": "Q?", "options": ["a", "b"], "answer": "a", "explanation": "", "difficulty": "Easy"}
+
+    monkeypatch.setattr(MCQGenerator, "stream_mcqs", fake_stream)
+    return calls
+
+
+def test_stream_rejects_malformed_lecture_id(client, streamed_calls):
+    assert client.get("/quiz/lectures/not-a-uuid/quiz/stream").status_code == 404
+    assert streamed_calls == []
+
+
+def test_stream_clamps_num_questions(client, streamed_calls):
+    response = client.get(f"/quiz/lectures/{LECTURE_ID}/quiz/stream?num_questions=100000")
+    body = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert "event: question" in body and "event: done" in body
+    assert streamed_calls == [{"collection": f"lecture_{LECTURE_ID}", "num_questions": Config.QUIZ_MAX_QUESTIONS}]
+
+
+def test_stream_rejects_non_positive_num_questions(client, streamed_calls):
+    assert client.get(f"/quiz/lectures/{LECTURE_ID}/quiz/stream?num_questions=0").status_code == 400
@@ -0,0 +1,94 @@
+# tests/test_rank_courses.py
+"""rank_courses against a direct, loop-based implementation of the same scoring."""
+import math
+import random
+
+import pytest
+
+from recommendation.services import enrollment_record, rank_courses
+
+
+def final_rating(record):
+    return (0.5 * record['course_rating'] + 0.3 * record['student_score'] / 50.0
+            + 0.2 * record['progress'] / 100.0)
+
+
+def reference_ranking(data, user_id, max_results, rating_threshold, neighbours):
+    """Collaborative scores computed user by user with plain Python (no cold start handling)."""
+    sums, counts = {}, {}
+    for record in data:
+        key = (record['user_id'], record['course_id'])
+        sums[key] = sums.get(key, 0.0) + final_rating(record)
+        counts[key] = counts.get(key, 0) + 1
+    users = sorted({user for user, _ in sums})
+    courses = sorted({course for _, course in sums})
+    matrix = {user: [sums[(user, c)] / counts[(user, c)] if (user, c) in sums else 0.0 for c in courses]
+              for user in users}
+
+    def cosine(a, b):
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(x * x for x in b))
+        return sum(x * y for x, y in zip(a, b)) / norm if norm else 0.0
+
+    target = matrix[user_id]
+    others = sorted((u for u in users if u != user_id), key=lambda u: -cosine(target, matrix[u]))[:neighbours]
+    weights = {u: max(cosine(target, matrix[u]), 0.0) for u in others}
+    total = sum(weights.values())
+    scores = {}
+    for j, course in enumerate(courses):
+        if target[j] != 0 or total == 0:
+            continue
+        score = sum(weights[u] * (matrix[u][j] if matrix[u][j] > rating_threshold else 0.0) for u in others) / total
+        if score > 0:
+            scores[course] = score
+    best = sorted(scores, key=lambda c: -scores[c])[:max_results]
+    return [(course, round(scores[course], 4)) for course in best]
+
+
+def random_enrollments(seed, users=40, courses=25, per_user=6):
+    rng = random.Random(seed)
+    data = []
+    for u in range(users):
+        for c in rng.sample(range(courses), per_user):
+            data.append(enrollment_record(f"u{u}", f"c{c}", rng.uniform(0, 100), rng.uniform(0.5, 5),
+                                          rng.uniform(0, 100)))
+    return data
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("neighbours,max_results,threshold", [(5, 100, 1.0), (3, 4, 2.0), (50, 10, 0.0)])
+def test_matches_reference(seed, neighbours, max_results, threshold):
+    data = random_enrollments(seed)
+    ranking = rank_courses(data, "u0", max_results, threshold, neighbours=neighbours)
+    expected = reference_ranking(data, "u0", max_results, threshold, neighbours)
+    if not expected:
+        assert ranking['strategy'] == 'popular'
+        return
+    assert ranking['strategy'] == 'collaborative'
+    assert [(item['course_id'], item['score']) for item in ranking['items']] == expected
+
+
+def test_excludes_courses_the_user_has():
+    data = random_enrollments(7)
+    owned = {record['course_id'] for record in data if record['user_id'] == "u3"}
+    ranking = rank_courses(data, "u3", 100, neighbours=10)
+    assert ranking['items']
+    assert not owned & {item['course_id'] for item in ranking['items']}
+
+
+def test_unknown_user_gets_popular_courses():
+    data = [enrollment_record("a", "c1", 50, 5, 50), enrollment_record("b", "c1", 50, 3, 50),
+            enrollment_record("b", "c2", 50, 4, 50)]
+    ranking = rank_courses(data, "new-user", 100)
+    assert ranking['strategy'] == 'popular'
+    # 0.7 * average rating + 0.3 * enrollments
+    assert ranking['items'] == [{'course_id': 'c1', 'score': 3.4}, {'course_id': 'c2', 'score': 3.1}]
+
+
+def test_falls_back_when_neighbours_suggest_nothing():
+    # The only other user has nothing the target user lacks.
+    data = [enrollment_record("a", "c1", 50, 5, 50), enrollment_record("b", "c1", 50, 4, 50)]
+    assert rank_courses(data, "a", 100)['strategy'] == 'popular'
+
+
+def test_empty_data():
+    assert rank_courses([], "a") == {'strategy': 'popular', 'items': []}
@@ -0,0 +1,74 @@
+# tests/test_recommendation_api.py
+"""The Flask and async (Quart) recommendation endpoints, on a stand-in enrollment table."""
+import asyncio
+
+import pytest
+
+from app import create_app
+from recommendation import async_app, services
+from recommendation.ranking_cache import rankings
+
+USER = "u1"
+ENROLLMENTS = [
+    services.enrollment_record(user_id, course_id, progress, rating, score)
+    for user_id, course_id, progress, rating, score in [
+        ("u1", "c1", 80, 5, 90), ("u1", "c2", 60, 4, 70),
+        ("u2", "c1", 90, 5, 85), ("u2", "c2", 50, 4, 60), ("u2", "c3", 70, 5, 80),
+        ("u3", "c1", 40, 3, 50), ("u3", "c4", 90, 5, 95),
+        ("u4", "c5", 20, 2, 30), ("u4", "c3", 60, 4, 65),
+    ]
+]
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    """Serves ENROLLMENTS to both endpoints and counts the loads."""
+    calls = []
+
+    def load_enrollments():
+        calls.append("sync")
+        return list(ENROLLMENTS)
+
+    async def load_enrollments_async(pool):
+        calls.append("async")
+        return list(ENROLLMENTS)
+
+    async def no_pool(*args, **kwargs):
+        return None
+
+    monkeypatch.setattr(services, "load_enrollments", load_enrollments)
+    monkeypatch.setattr(async_app, "load_enrollments_async", load_enrollments_async)
+    monkeypatch.setattr(async_app.asyncpg, "create_pool", no_pool)
+    rankings.clear()
+    yield calls
+    rankings.clear()
+
+
+def get_sync(query):
+    response = create_app().test_client().get(f"/recommendation/recommendations?{query}")
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def get_async(query):
+    async def run():
+        response = await async_app.create_async_app().test_client().get(
+            f"{async_app.ASYNC_PREFIX}/recommendations?{query}")
+        assert response.status_code == 200
+        return await response.get_json()
+    return asyncio.run(run())
+
+
+def test_async_endpoint_matches_flask(loads):
+    flask_body = get_sync(f"user_id={USER}&limit=3")
+    rankings.clear()
+    assert get_async(f"user_id={USER}&limit=3") == flask_body
+    assert flask_body["recommendations"]
+
+
+def test_endpoints_share_cached_rankings(loads):
+    flask_body = get_sync(f"user_id={USER}&limit=2")
+    assert get_async(f"user_id={USER}&limit=2") == flask_body
+    assert get_sync(f"user_id={USER}&limit=2&offset=2")["offset"] == 2
+    # One load for all three requests: the async endpoint reads the Flask endpoint's entry.
+    assert loads == ["sync"]
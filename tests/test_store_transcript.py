@@ -0,0 +1,46 @@
+# tests/test_store_transcript.py
+import pytest
+from qdrant_client import QdrantClient, models
+
+from quiz import qdrant_ops
+from quiz.config import Config
+from quiz.local_backends import HashingEmbedder
+from quiz.qdrant_ops import store_transcript_in_qdrant, transcript_chunks
+from quiz.transcripts import write_segments
+
+LECTURE = "lecture-1"
+COLLECTION = f"lecture_{LECTURE}"
+
+
+@pytest.fixture
+def client(redis_client, monkeypatch):
+    monkeypatch.setattr(qdrant_ops, "_ensured_collections", set())
+    monkeypatch.setattr(qdrant_ops, "_sparse_collections", {})
+    client = QdrantClient(location=":memory:")
+    monkeypatch.setattr(qdrant_ops, "get_qdrant_client", lambda url=None: client)
+    monkeypatch.setattr(qdrant_ops, "get_embedding_model", lambda: HashingEmbedder(Config.EMBEDDING_DIMENSION))
+    return client
+
+
+def transcript(tmp_path, name, segments):
+    path = str(tmp_path / name)
+    write_segments(path, (
+        {"start": 10.0 * n, "end": 10.0 * n + 9.5, "text": f"Segment {n} explains topic {n} in detail. " * 20}
+        for n in range(segments)
+    ))
+    return path
+
+
+def test_re_embedding_replaces_the_lectures_points(client, tmp_path):
+    long_path, short_path = transcript(tmp_path, "long.jsonl", 30), transcript(tmp_path, "short.jsonl", 5)
+    assert len(transcript_chunks(short_path)) < len(transcript_chunks(long_path))
+
+    store_transcript_in_qdrant(LECTURE, long_path, course_id="course-1")
+    # A point left by an older version of the pipeline, keyed differently.
+    client.upsert(COLLECTION, points=[models.PointStruct(
+        id=1, vector={"": [1.0] + [0.0] * (Config.EMBEDDING_DIMENSION - 1)}, payload={"text": "stale"})])
+    store_transcript_in_qdrant(LECTURE, short_path, course_id="course-1")
+
+    expected = len(transcript_chunks(short_path))
+    assert client.count(COLLECTION).count == expected
+    assert client.count(Config.TRANSCRIPT_CHUNKS_COLLECTION).count == expected
@@ -0,0 +1,33 @@
+# tests/test_tracing.py
+import pytest
+
+from observability.config import Config
+from observability.tracing import sampling_decision
+
+
+@pytest.fixture(autouse=True)
+def no_sampling(monkeypatch):
+    monkeypatch.setattr(Config, "TRACE_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(Config, "TRACE_HEADER_SECRET", "s3cret")
+
+
+def test_header_with_token_forces_tracing():
+    assert sampling_decision("profile", "s3cret") == "profile"
+    assert sampling_decision("1", "s3cret") == "trace"
+
+
+def test_header_without_valid_token_is_ignored():
+    assert sampling_decision("profile", None) is None
+    assert sampling_decision("profile", "guess") is None
+
+
+def test_header_is_ignored_without_configured_secret(monkeypatch):
+    monkeypatch.setattr(Config, "TRACE_HEADER_SECRET", None)
+    assert sampling_decision("profile", "") is None
+    assert sampling_decision("profile", None) is None
+
+
+def test_untrusted_requests_still_follow_sample_rate(monkeypatch):
+    monkeypatch.setattr(Config, "TRACE_SAMPLE_RATE", 1.0)
+    assert sampling_decision("0", None) == "trace"
+    assert sampling_decision("0", "s3cret") is None
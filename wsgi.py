@@ -0,0 +1,18 @@
+# wsgi.py
+"""WSGI entry point for production serving: gunicorn -c gunicorn.conf.py wsgi:app"""
+import os
+import importlib
+
+from app import create_app
+
+# Opt-in: with preload_app the gunicorn master imports these once and the forked workers
+# share them copy-on-write, instead of every worker importing them on its first request.
+# Off by default, since it puts pandas/scikit-learn back into every web process's startup.
+PRELOAD_MODULES = [
+    name.strip() for name in os.getenv("WEB_PRELOAD_MODULES", "").split(",")
+    if name.strip()
+]
+for module_name in PRELOAD_MODULES:
+    importlib.import_module(module_name)
+
+app = create_app()